@@ -0,0 +1,97 @@
+"""
+Logging Overhead Benchmark
+
+Measures the per-record cost of logging on the pipeline threads:
+- a message below the log level, built with an f-string versus %-style
+  arguments that are only formatted when the record is emitted
+- an emitted message written synchronously by the handler versus handed to
+  the QueueListener thread set up by src.utils.logger, both for a local log
+  file and for a slow sink (a busy terminal or network file system,
+  simulated by a fixed delay per write)
+
+Usage:
+    python -m benchmarks.bench_logging --records 100000 --sink-latency-us 200
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from src.utils import logger as log_setup
+
+CITY = 'Athens'
+PATH = 'data/raw/raw_current_weather_Athens_20250823_184954.json.gz'
+
+
+class SlowStream:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def write(self, text):
+        time.sleep(self.latency)
+
+    def flush(self):
+        pass
+
+
+def per_record(logger, n):
+    start = time.perf_counter()
+    for i in range(n):
+        logger.info('Processing current weather data for %s from %s (%s)', CITY, PATH, i)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def emit_cost(handler, use_queue, n):
+    handler.setFormatter(logging.Formatter(log_setup.TEXT_FORMAT))
+    handlers = [handler]
+    if use_queue:
+        log_setup.start_listener(handlers)
+        handlers = [log_setup.ThreadQueueHandler(log_setup._listener.queue)]
+    logging.basicConfig(level='INFO', handlers=handlers, force=True)
+
+    start = time.perf_counter()
+    caller = per_record(logging.getLogger('bench'), n)
+    log_setup.stop_logging()
+    handler.close()
+    return caller, (time.perf_counter() - start) / n * 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--records', type=int, default=100000)
+    parser.add_argument('--sink-latency-us', type=float, default=200)
+    args = parser.parse_args(argv)
+    logger = logging.getLogger('bench')
+
+    logging.basicConfig(level='WARNING', handlers=[logging.NullHandler()], force=True)
+    start = time.perf_counter()
+    for i in range(args.records):
+        logger.info(f'Processing current weather data for {CITY} from {PATH} ({i})')
+    eager = (time.perf_counter() - start) / args.records * 1e9
+    lazy = per_record(logger, args.records)
+    print(f'Filtered record, f-string:    {eager:9.0f} ns')
+    print(f'Filtered record, %-style:     {lazy:9.0f} ns '
+          f'({eager - lazy:.0f} ns saved per record)')
+
+    slow_records = max(1, args.records // 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        sinks = [
+            ('log file', lambda: logging.FileHandler(os.path.join(tmp, 'bench.log')),
+             args.records),
+            ('slow sink', lambda: logging.StreamHandler(
+                SlowStream(args.sink_latency_us / 1e6)), slow_records),
+        ]
+        for name, make_handler, n in sinks:
+            for use_queue in (False, True):
+                caller, total = emit_cost(make_handler(), use_queue, n)
+                mode = 'queue' if use_queue else 'sync'
+                print(f'Emitted record, {name}, {mode:5}: {caller:9.0f} ns on the caller '
+                      f'({total:.0f} ns until written)')
+
+    logging.basicConfig(handlers=[logging.NullHandler()], force=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+End-to-End Pipeline Benchmark
+
+Runs extract, transform and load for N synthetic cities against the local
+mock OpenWeatherMap server and a SQLite database, and reports wall time,
+rows/s and peak traced memory for each stage and for the whole run.
+
+The server can add a fixed latency to every response and reject every Nth
+request with 429, to exercise the rate-limit retry path. Results can be
+saved as JSON and compared against a saved baseline, so each stage can be
+tracked across releases.
+
+Peak memory is measured with tracemalloc in this process; allocations made
+by transform worker processes (TRANSFORM_WORKERS > 1) are not included.
+
+Usage:
+    python -m benchmarks.bench_pipeline --cities 200 --latency-ms 20 \\
+        --rate-limit-every 50 --output bench.json
+    python -m benchmarks.bench_pipeline --cities 200 --baseline bench.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.fixtures import make_cities
+from benchmarks.mock_server import MockServer
+from src.extract import extract
+from src.load import dispose_engines, load_all
+from src.transform import run_transform
+from src.utils.etl_config import ExtractConfig, LoadConfig, TransformConfig
+
+STAGES = ['extract', 'transform', 'load']
+
+
+def measure(func, trace_memory):
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def stage_result(seconds, rows, peak):
+    return {
+        'seconds': round(seconds, 4),
+        'rows': rows,
+        'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None,
+        'peak_memory_mb': round(peak / 2**20, 2) if peak is not None else None,
+    }
+
+# Run the three stages once and return their timings
+
+
+def run_benchmark(args, tmp):
+    with MockServer(latency=args.latency_ms / 1000,
+                    rate_limit_every=args.rate_limit_every) as server:
+        extract_config = ExtractConfig(
+            cities=make_cities(args.cities),
+            api_key='bench',
+            raw_path=os.path.join(tmp, 'raw'),
+            units='metric',
+            max_workers=args.workers,
+            calls_per_minute=10**9,
+            rate_limit_burst=10**6,
+            stream=args.stream,
+            raw_compression=args.compression,
+            api_url=f'{server.url}/data/2.5',
+            geo_url=f'{server.url}/geo/1.0',
+        )
+        os.makedirs(extract_config.raw_path)
+        saved_files, extract_seconds, extract_peak = measure(
+            lambda: extract(extract_config), args.memory)
+        requests_served, rate_limited = server.requests, server.rate_limited
+
+    transform_config = TransformConfig(mode=args.transform_mode,
+                                       workers=args.transform_workers)
+    frames, transform_seconds, transform_peak = measure(
+        lambda: run_transform(saved_files, transform_config), args.memory)
+    for df, name in zip(frames, ['air_pollution', 'current_weather', 'forecast_weather']):
+        df.name = name
+
+    load_config = LoadConfig(host=None, database=None, driver=None,
+                             url=f'sqlite:///{os.path.join(tmp, "bench.sqlite")}',
+                             chunksize=args.chunksize)
+    loaded, load_seconds, load_peak = measure(
+        lambda: load_all(frames, load_config), args.memory)
+    dispose_engines()
+
+    payloads = sum(len(files) for files in saved_files.values())
+    rows = sum(len(df) for df in frames)
+    stages = {
+        'extract': stage_result(extract_seconds, payloads, extract_peak),
+        'transform': stage_result(transform_seconds, rows, transform_peak),
+        'load': stage_result(load_seconds, loaded, load_peak),
+    }
+    total = sum(stage['seconds'] for stage in stages.values())
+    peaks = [stage['peak_memory_mb'] for stage in stages.values()]
+    stages['total'] = {
+        'seconds': round(total, 4),
+        'rows': loaded,
+        'rows_per_second': round(loaded / total, 1) if total > 0 else None,
+        'peak_memory_mb': max(peaks) if args.memory else None,
+    }
+    return {
+        'settings': {k: v for k, v in vars(args).items()
+                     if k not in ('output', 'baseline')},
+        'requests': requests_served,
+        'rate_limited': rate_limited,
+        'stages': stages,
+    }
+
+
+def print_report(result, baseline=None):
+    print(f"{result['requests']} requests served, "
+          f"{result['rate_limited']} rejected with 429")
+    print(f"{'stage':<10}{'seconds':>10}{'rows':>10}{'rows/s':>12}{'peak MB':>10}"
+          + ('  vs baseline' if baseline else ''))
+    for name in STAGES + ['total']:
+        stage = result['stages'][name]
+        peak = stage['peak_memory_mb']
+        line = (f"{name:<10}{stage['seconds']:>10.3f}{stage['rows']:>10}"
+                f"{stage['rows_per_second'] or 0:>12.1f}"
+                f"{peak if peak is not None else '-':>10}")
+        if baseline and name in baseline['stages']:
+            before = baseline['stages'][name]['seconds']
+            if before:
+                line += f"  {(stage['seconds'] - before) / before:+.1%} time"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cities', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Concurrent extraction threads')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='Delay added to every mock API response')
+    parser.add_argument('--rate-limit-every', type=int, default=0,
+                        help='Reject every Nth request with 429 (0 = never)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Hand payloads to transform in memory')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], default=None)
+    parser.add_argument('--transform-mode', choices=['serial', 'batch'], default='batch')
+    parser.add_argument('--transform-workers', type=int, default=1)
+    parser.add_argument('--chunksize', type=int, default=None)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='Skip tracemalloc, which slows the stages down')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a saved JSON result')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        result = run_benchmark(args, tmp)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
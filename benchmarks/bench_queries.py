@@ -0,0 +1,88 @@
+"""
+Time-Series Query Benchmark
+
+Loads synthetic forecast_weather history into a local SQLite database and
+times a typical dashboard query (one city over a date range) without and
+with the (city, dt) index from sql/ddl_script.sql.
+
+Usage:
+    python -m benchmarks.bench_queries --cities 500 --days 60
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.load import get_engine, load
+from src.utils.etl_config import LoadConfig
+
+QUERY = (
+    "SELECT dt, main_temp, main_humidity FROM forecast_weather "
+    "WHERE city = ? AND dt >= ? AND dt < ? ORDER BY dt"
+)
+
+
+def make_forecast_history(cities, days):
+    dts = pd.date_range('2025-01-01', periods=days * 8, freq='3h')
+    n = len(dts) * cities
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'main_temp': rng.normal(20, 5, n),
+        'main_feels_like': rng.normal(20, 5, n),
+        'main_temp_max': rng.normal(22, 5, n),
+        'main_temp_min': rng.normal(18, 5, n),
+        'main_humidity': rng.integers(20, 100, n),
+        'main_pressure': rng.integers(990, 1030, n),
+        'dt': np.tile(dts, cities),
+        'coord_lat': 0.0,
+        'coord_lon': 0.0,
+        'city': np.repeat([f'City{i}' for i in range(cities)], len(dts)),
+    })
+    df.name = 'forecast_weather'
+    return df
+
+
+def time_queries(engine, cities, repeats):
+    params = [(f'City{i % cities}', '2025-01-10 00:00:00', '2025-01-17 00:00:00')
+              for i in range(repeats)]
+    with engine.connect() as con:
+        start = time.perf_counter()
+        for p in params:
+            con.exec_driver_sql(QUERY, p).fetchall()
+    return (time.perf_counter() - start) / repeats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cities', type=int, default=500)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = LoadConfig(host=None, database=None, driver=None,
+                            url=f"sqlite:///{Path(tmp) / 'bench.db'}")
+        df = make_forecast_history(args.cities, args.days)
+        load(df, config)
+        engine = get_engine(config)
+
+        scan = time_queries(engine, args.cities, args.repeats)
+        with engine.begin() as con:
+            con.exec_driver_sql(
+                'CREATE INDEX IX_forecast_weather_city_dt '
+                'ON forecast_weather (city, dt)')
+        indexed = time_queries(engine, args.cities, args.repeats)
+        engine.dispose()
+
+    print(f'rows           : {len(df)}')
+    print(f'full scan      : {scan * 1000:.3f} ms/query')
+    print(f'(city, dt) idx : {indexed * 1000:.3f} ms/query')
+    print(f'speedup        : {scan / indexed:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Connection Pooling Benchmark
+
+Compares per-request latency of one-off requests.get calls against the
+pooled keep-alive session built by src.extract.create_session, using a local
+mock HTTP server.
+
+Usage:
+    python -m benchmarks.bench_session --requests 500
+"""
+
+import argparse
+import time
+
+import requests
+
+from benchmarks.mock_server import MockServer
+from src.extract import create_session
+from src.utils.etl_config import ExtractConfig
+
+
+def time_requests(get, url, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        get(url, timeout=10).json()
+    return (time.perf_counter() - start) / n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    config = ExtractConfig(cities=[], api_key='bench',
+                           raw_path='.', units='metric')
+
+    with MockServer() as server:
+        url = f'{server.url}/data/2.5/weather'
+        unpooled = time_requests(requests.get, url, args.requests)
+        with create_session(config) as session:
+            pooled = time_requests(session.get, url, args.requests)
+
+    print(f'requests.get   : {unpooled * 1000:.3f} ms/request')
+    print(f'pooled session : {pooled * 1000:.3f} ms/request')
+    print(f'speedup        : {unpooled / pooled:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Synthetic OpenWeatherMap Fixtures
+
+Builds realistic geocoding, current weather, forecast and air pollution
+payloads for any number of cities. Values are derived from the city name
+with a fixed seed, so every run of a benchmark sees identical responses.
+
+Usage:
+    from benchmarks.fixtures import make_cities, make_payload
+
+    cities = make_cities(100)
+    make_payload('forecast', lat=37.98, lon=23.72)
+"""
+
+import random
+import zlib
+
+BASE_DT = 1755964194  # 2025-08-23 15:49:54 UTC
+FORECAST_STEPS = 40
+AIR_POLLUTION_STEPS = 1
+
+
+def make_cities(n):
+    return [f'City{i:05d}' for i in range(n)]
+
+
+def _rng(*key):
+    return random.Random(zlib.crc32(repr(key).encode('utf-8')))
+
+
+def make_geo(city):
+    rng = _rng(city)
+    return [{
+        'name': city,
+        'lat': round(rng.uniform(-60, 70), 4),
+        'lon': round(rng.uniform(-180, 180), 4),
+        'country': 'XX',
+    }]
+
+
+def _main(rng):
+    temp = round(rng.uniform(-10, 40), 2)
+    return {
+        'temp': temp,
+        'feels_like': round(temp + rng.uniform(-3, 3), 2),
+        'temp_min': round(temp - rng.uniform(0, 2), 2),
+        'temp_max': round(temp + rng.uniform(0, 2), 2),
+        'pressure': rng.randint(990, 1030),
+        'humidity': rng.randint(10, 100),
+        'sea_level': rng.randint(990, 1030),
+        'grnd_level': rng.randint(950, 1020),
+    }
+
+
+def _weather(rng):
+    return [{'id': 800, 'main': 'Clear', 'description': 'clear sky',
+             'icon': '01d' if rng.random() < 0.5 else '01n'}]
+
+
+def _wind(rng):
+    return {'speed': round(rng.uniform(0, 15), 2), 'deg': rng.randint(0, 359),
+            'gust': round(rng.uniform(0, 20), 2)}
+
+
+def make_current_weather(lat, lon, dt=BASE_DT):
+    rng = _rng('weather', lat, lon, dt)
+    return {
+        'coord': {'lon': lon, 'lat': lat},
+        'weather': _weather(rng),
+        'base': 'stations',
+        'main': _main(rng),
+        'visibility': 10000,
+        'wind': _wind(rng),
+        'clouds': {'all': rng.randint(0, 100)},
+        'dt': dt,
+        'sys': {'type': 2, 'id': 2000000, 'country': 'XX',
+                'sunrise': dt - 30000, 'sunset': dt + 15000},
+        'timezone': 10800,
+        'id': zlib.crc32(f'{lat},{lon}'.encode('utf-8')),
+        'name': 'Synthetic',
+        'cod': 200,
+    }
+
+
+def make_forecast_weather(lat, lon, dt=BASE_DT):
+    rng = _rng('forecast', lat, lon, dt)
+    start = dt - dt % 10800 + 10800
+    steps = []
+    for i in range(FORECAST_STEPS):
+        step_dt = start + i * 10800
+        steps.append({
+            'dt': step_dt,
+            'main': _main(rng),
+            'weather': _weather(rng),
+            'clouds': {'all': rng.randint(0, 100)},
+            'wind': _wind(rng),
+            'visibility': 10000,
+            'pop': round(rng.random(), 2),
+            'sys': {'pod': 'd'},
+            'dt_txt': f'step {i}',
+        })
+    return {
+        'cod': '200',
+        'message': 0,
+        'cnt': FORECAST_STEPS,
+        'list': steps,
+        'city': {
+            'id': zlib.crc32(f'{lat},{lon}'.encode('utf-8')),
+            'name': 'Synthetic',
+            'coord': {'lat': lat, 'lon': lon},
+            'country': 'XX',
+            'population': rng.randint(1000, 5000000),
+            'timezone': 10800,
+            'sunrise': dt - 30000,
+            'sunset': dt + 15000,
+        },
+    }
+
+
+def make_air_pollution(lat, lon, dt=BASE_DT):
+    rng = _rng('air_pollution', lat, lon, dt)
+    return {
+        'coord': {'lon': lon, 'lat': lat},
+        'list': [{
+            'main': {'aqi': rng.randint(1, 5)},
+            'components': {
+                name: round(rng.uniform(0, high), 2) for name, high in (
+                    ('co', 500), ('no', 20), ('no2', 80), ('o3', 180),
+                    ('so2', 40), ('pm2_5', 75), ('pm10', 150), ('nh3', 20))
+            },
+            'dt': dt - i * 3600,
+        } for i in range(AIR_POLLUTION_STEPS)],
+    }
+
+
+PAYLOADS = {
+    'weather': make_current_weather,
+    'forecast': make_forecast_weather,
+    'air_pollution': make_air_pollution,
+}
+
+# Payload for one API endpoint (weather, forecast or air_pollution)
+
+
+def make_payload(endpoint, lat, lon, dt=BASE_DT):
+    return PAYLOADS[endpoint](lat, lon, dt)
@@ -0,0 +1,121 @@
+"""
+Mock OpenWeatherMap Server
+
+A small local HTTP/1.1 server with keep-alive support, used by the
+benchmarks to measure extraction performance without touching the real API.
+
+With a fixed payload every request returns it. Otherwise the server routes
+like the real API: /geo/1.0/direct answers with coordinates and
+/data/2.5/{weather,forecast,air_pollution} with synthetic payloads from
+benchmarks.fixtures. Each response can be delayed by a fixed latency, and
+every Nth request can be rejected with 429 Too Many Requests.
+
+Usage:
+    from benchmarks.mock_server import MockServer
+
+    with MockServer(latency=0.02, rate_limit_every=50) as server:
+        requests.get(f'{server.url}/data/2.5/weather?lat=37.98&lon=23.72')
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.fixtures import PAYLOADS, make_geo
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if server.count_request():
+            self.send_json({'cod': 429, 'message': 'Too many requests'},
+                           status=429, headers={'Retry-After': '0'})
+            return
+
+        if server.payload is not None:
+            self.send_json(server.payload)
+            return
+
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+        if endpoint == 'direct':
+            self.send_json(make_geo(query.get('q', '')))
+        elif endpoint in PAYLOADS:
+            self.send_json(PAYLOADS[endpoint](
+                float(query.get('lat', 0)), float(query.get('lon', 0))))
+        else:
+            self.send_json({'cod': 404, 'message': 'Not found'}, status=404)
+
+    def send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, payload=None, latency=0.0, rate_limit_every=0):
+        super().__init__(address, MockHandler)
+        self.payload = payload
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+
+    # Count a request and return True when it should be answered with 429
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+            limited = bool(self.rate_limit_every) and \
+                self.requests % self.rate_limit_every == 0
+            self.rate_limited += limited
+            return limited
+
+
+class MockServer:
+    def __init__(self, payload=None, host='127.0.0.1', port=0, latency=0.0,
+                 rate_limit_every=0):
+        self.httpd = MockHTTPServer(
+            (host, port), payload, latency, rate_limit_every)
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    @property
+    def rate_limited(self):
+        return self.httpd.rate_limited
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
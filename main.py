@@ -1,47 +1,122 @@
 """
 ETL Pipeline Entry Point
 
-Loads configuration, sets up logging, ensures folder structure, 
+Loads configuration, sets up logging, ensures folder structure,
 and runs the ETL pipeline.
 
+Each command imports only the stages it runs, so `--help`, `--dry-run` and
+extract-only runs start without loading pandas or SQLAlchemy. Check the
+startup cost with `python -X importtime main.py --help`.
+
 Usage:
-    python main.py
+    python main.py                  # extract, transform and load (same as `run`)
+    python main.py extract          # fetch raw files only
+    python main.py transform        # transform unprocessed raw files and stage them as Parquet
+    python main.py load             # load staged Parquet into the database
+    python main.py incremental      # transform and load unprocessed raw files only
+    python main.py schedule         # run as a daemon, refreshing each endpoint on its interval
+    python main.py enqueue          # split CITIES into batches in the shared work queue
+    python main.py worker --wait    # extract queued batches (run on any number of hosts)
+    python main.py distribute --workers 4   # enqueue, extract on 4 processes, load once
+    python main.py --dry-run run    # validate the configuration without running anything
 """
 
 
-from src.extract import extract
-from src.transform import transform
-from src.load import load
+import argparse
 import logging
-from src.utils.logger import setup_logging
-from src.utils.etl_config import setup_extraction_config
-
-setup_logging()
+import os
 
 logger = logging.getLogger(__name__)
 
+COMMANDS = {
+    'run': 'Extract from the API, then transform and load (default)',
+    'extract': 'Fetch raw files from the API without transforming them',
+    'transform': 'Transform unprocessed raw files and stage them for load',
+    'load': 'Load staged transformed data into the database',
+    'incremental': 'Transform and load raw files that have not been processed yet',
+    'schedule': 'Run as a long-lived daemon that refreshes each endpoint on '
+                'its configured interval',
+    'enqueue': 'Split the configured cities into batches in the shared work queue',
+    'worker': 'Claim city batches from the work queue and extract them',
+    'distribute': 'Queue the cities, extract them on several worker processes, '
+                  'then load the results once',
+}
+
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+
+    from src.utils.logger import setup_logging
+    from src.utils.etl_config import setup_extraction_config
+
+    setup_logging()
     logger.info('Setting up extraction configuration')
     config = setup_extraction_config()
 
-    logger.info('Starting extraction of data from API')
-    saved_files = extract(config.Extract)
-    logger.info('Extraction of data from API finished')
-
-    logger.info('Starting transformation of extracted data')
-    air_pollution_df, current_weather_df, forecast_weather_df = transform(
-        saved_files)
-    logger.info('Transformation of extracted data finished')
-
-    logger.info('Starting loading of transformed data into database')
-    air_pollution_df.name = "air_pollution"
-    current_weather_df.name = "current_weather"
-    forecast_weather_df.name = "forecast_weather"
-    load(air_pollution_df, config.Load)
-    load(current_weather_df, config.Load)
-    load(forecast_weather_df, config.Load)
-    logger.info('Loading of transformed data into database finished')
+    if args.dry_run:
+        logger.info(
+            f'Configuration is valid; {args.command} would process '
+            f'{len(config.Extract.cities)} cities')
+        return
+
+    run_command(args.command, config, workers=args.workers, wait=args.wait)
+
+
+def run_command(command, config, workers=None, wait=False):
+    if command == 'run':
+        from src.pipeline import run_full
+        run_full(config)
+    elif command == 'extract':
+        from src.pipeline import extract_only
+        extract_only(config)
+    elif command == 'transform':
+        from src.pipeline import transform_only
+        transform_only(config)
+    elif command == 'load':
+        from src.pipeline import load_only
+        load_only(config)
+    elif command == 'incremental':
+        from src.pipeline import run_incremental
+        run_incremental(config)
+    elif command == 'schedule':
+        from src.scheduler import Scheduler
+        Scheduler(config).run()
+    elif command == 'enqueue':
+        from src.pipeline import enqueue_cities
+        enqueue_cities(config)
+    elif command == 'worker':
+        from src.pipeline import run_worker
+        run_worker(config, wait=wait)
+    elif command == 'distribute':
+        from src.pipeline import run_distributed
+        run_distributed(config, workers or os.cpu_count() or 1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Weather ETL pipeline')
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help='Load and validate the configuration, then exit')
+    parser.add_argument(
+        '--incremental', dest='command', action='store_const', const='incremental',
+        help=argparse.SUPPRESS)
+    parser.add_argument(
+        '--schedule', dest='command', action='store_const', const='schedule',
+        help=argparse.SUPPRESS)
+    sub = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands = {command: sub.add_parser(command, help=help_text, description=help_text)
+                for command, help_text in COMMANDS.items()}
+    commands['worker'].add_argument(
+        '--wait', action='store_true',
+        help='Keep polling while other workers hold leases, in case they expire')
+    commands['distribute'].add_argument(
+        '--workers', type=int, default=None,
+        help='Number of worker processes (default: number of CPUs)')
+
+    parser.set_defaults(workers=None, wait=False)
+    args = parser.parse_args(argv)
+    args.command = args.command or 'run'
+    return args
 
 
 if __name__ == '__main__':
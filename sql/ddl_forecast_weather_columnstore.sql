@@ -0,0 +1,71 @@
+/*
+===============================================================================
+DDL Script: Partitioned Columnstore Variant of Forecast Weather
+===============================================================================
+Script Purpose:
+    Optional alternative to the forecast_weather definition in ddl_script.sql
+    for deployments that keep a long forecast history.
+    - forecast_weather is partitioned by month on dt, so date-filtered
+      queries and old-data cleanup only touch the relevant partitions.
+    - Rows are stored in a clustered columnstore index, which compresses
+      the history and speeds up scans and aggregates over it.
+    - A nonclustered (city, dt) index keeps point lookups and the upsert
+      MERGE run by the loader fast.
+	  Run this script instead of the forecast_weather part of ddl_script.sql.
+	  Add boundaries to pf_weather_month ahead of time as new months start
+	  by scheduling extend_weather_partitions.sql, which runs
+	  ALTER PARTITION FUNCTION ... SPLIT RANGE for the coming year.
+===============================================================================
+*/
+
+IF OBJECT_ID('forecast_weather', 'U') IS NOT NULL
+	DROP TABLE forecast_weather;
+GO
+
+IF EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = 'ps_weather_month')
+	DROP PARTITION SCHEME ps_weather_month;
+GO
+
+IF EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = 'pf_weather_month')
+	DROP PARTITION FUNCTION pf_weather_month;
+GO
+
+CREATE PARTITION FUNCTION pf_weather_month (DATETIME)
+	AS RANGE RIGHT FOR VALUES (
+		'2025-01-01', '2025-02-01', '2025-03-01', '2025-04-01',
+		'2025-05-01', '2025-06-01', '2025-07-01', '2025-08-01',
+		'2025-09-01', '2025-10-01', '2025-11-01', '2025-12-01',
+		'2026-01-01', '2026-02-01', '2026-03-01', '2026-04-01',
+		'2026-05-01', '2026-06-01', '2026-07-01', '2026-08-01',
+		'2026-09-01', '2026-10-01', '2026-11-01', '2026-12-01'
+	);
+GO
+
+CREATE PARTITION SCHEME ps_weather_month
+	AS PARTITION pf_weather_month ALL TO ([PRIMARY]);
+GO
+
+CREATE TABLE forecast_weather (
+	id INT IDENTITY(1,1) NOT NULL,
+	main_temp FLOAT,
+	main_feels_like FLOAT,
+	main_temp_max FLOAT,
+	main_temp_min FLOAT,
+	main_humidity INT,
+	main_pressure INT,
+	dt DATETIME NOT NULL,
+	coord_lat FLOAT,
+	coord_lon FLOAT,
+	city NVARCHAR(50)
+) ON ps_weather_month (dt);
+GO
+
+CREATE CLUSTERED COLUMNSTORE INDEX CCI_forecast_weather
+	ON forecast_weather
+	ON ps_weather_month (dt);
+GO
+
+CREATE NONCLUSTERED INDEX IX_forecast_weather_city_dt
+	ON forecast_weather (city, dt)
+	ON ps_weather_month (dt);
+GO
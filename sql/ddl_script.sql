@@ -5,7 +5,13 @@ DDL Script: Create Air Pollution , Current and Forecast Weather Tables
 Script Purpose:
     This script creates tables for the Air Pollution , Current and Forecast Weather
     data, dropping existing tables if they already exist.
-	  Run this script to re-define the DDL structure of weather Tables
+	  Run this script to re-define the DDL structure of weather Tables.
+    Each table gets a nonclustered (city, dt) index that supports the upsert
+    MERGE run by the loader and queries filtering by city and time.
+    air_quality_aggregates holds the rolling pollutant averages and derived
+    AQI that the pipeline computes for each air_pollution row.
+    See ddl_forecast_weather_columnstore.sql for a partitioned columnstore
+    variant of forecast_weather and migrations/ for upgrading existing tables.
 ===============================================================================
 */
 
@@ -32,6 +38,10 @@ CREATE TABLE air_pollution (
 	);
 GO
 
+CREATE NONCLUSTERED INDEX IX_air_pollution_city_dt
+	ON air_pollution (city, dt);
+GO
+
 IF OBJECT_ID('current_weather', 'U') IS NOT NULL
 	DROP TABLE current_weather;
 GO
@@ -51,6 +61,10 @@ CREATE TABLE current_weather (
 );
 GO
 
+CREATE NONCLUSTERED INDEX IX_current_weather_city_dt
+	ON current_weather (city, dt);
+GO
+
 IF OBJECT_ID('forecast_weather', 'U') IS NOT NULL
 	DROP TABLE forecast_weather;
 GO
@@ -69,3 +83,29 @@ CREATE TABLE forecast_weather (
 	city NVARCHAR(50)
 );
 GO
+
+CREATE NONCLUSTERED INDEX IX_forecast_weather_city_dt
+	ON forecast_weather (city, dt);
+GO
+
+IF OBJECT_ID('air_quality_aggregates', 'U') IS NOT NULL
+	DROP TABLE air_quality_aggregates;
+GO
+
+CREATE TABLE air_quality_aggregates (
+	id INT IDENTITY(1,1) PRIMARY KEY,
+	city NVARCHAR(50),
+	dt DATETIME,
+	window_hours FLOAT,
+	pm2_5_avg FLOAT,
+	pm10_avg FLOAT,
+	o3_avg FLOAT,
+	samples INT,
+	aqi INT,
+	aqi_desc NVARCHAR(50)
+);
+GO
+
+CREATE NONCLUSTERED INDEX IX_air_quality_aggregates_city_dt
+	ON air_quality_aggregates (city, dt);
+GO
@@ -0,0 +1,29 @@
+/*
+===============================================================================
+Maintenance Script: Extend the Monthly Weather Partitions
+===============================================================================
+Script Purpose:
+    Adds monthly boundaries to pf_weather_month so that there is always a
+    year of empty partitions ahead of the current month. Boundaries that
+    already exist are skipped, so the script is safe to re-run.
+	  Schedule it monthly (e.g. as a SQL Agent job). With a columnstore
+	  index only empty partitions can be split, so the boundaries have to
+	  be added before rows for those months arrive; rows past the last
+	  boundary all land in the last partition.
+===============================================================================
+*/
+
+DECLARE @next DATETIME = (
+	SELECT DATEADD(MONTH, 1, CAST(MAX(prv.value) AS DATETIME))
+	FROM sys.partition_range_values prv
+	JOIN sys.partition_functions pf ON pf.function_id = prv.function_id
+	WHERE pf.name = 'pf_weather_month');
+DECLARE @until DATETIME = DATEADD(MONTH, 12, DATEFROMPARTS(YEAR(GETDATE()), MONTH(GETDATE()), 1));
+
+WHILE @next <= @until
+BEGIN
+	ALTER PARTITION SCHEME ps_weather_month NEXT USED [PRIMARY];
+	ALTER PARTITION FUNCTION pf_weather_month() SPLIT RANGE (@next);
+	SET @next = DATEADD(MONTH, 1, @next);
+END;
+GO
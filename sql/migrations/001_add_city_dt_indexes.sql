@@ -0,0 +1,30 @@
+/*
+===============================================================================
+Migration 001: Add (city, dt) Indexes to Existing Weather Tables
+===============================================================================
+Script Purpose:
+    Brings deployments created with an earlier ddl_script.sql up to date
+    without dropping any data. Creates the nonclustered (city, dt) index on
+    each weather table if it is missing, so the script is safe to re-run.
+	  ONLINE = ON keeps the tables readable while the indexes build; remove it
+	  on SQL Server editions that do not support online index operations.
+===============================================================================
+*/
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes
+	WHERE name = 'IX_air_pollution_city_dt' AND object_id = OBJECT_ID('air_pollution'))
+	CREATE NONCLUSTERED INDEX IX_air_pollution_city_dt
+		ON air_pollution (city, dt) WITH (ONLINE = ON);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes
+	WHERE name = 'IX_current_weather_city_dt' AND object_id = OBJECT_ID('current_weather'))
+	CREATE NONCLUSTERED INDEX IX_current_weather_city_dt
+		ON current_weather (city, dt) WITH (ONLINE = ON);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes
+	WHERE name = 'IX_forecast_weather_city_dt' AND object_id = OBJECT_ID('forecast_weather'))
+	CREATE NONCLUSTERED INDEX IX_forecast_weather_city_dt
+		ON forecast_weather (city, dt) WITH (ONLINE = ON);
+GO
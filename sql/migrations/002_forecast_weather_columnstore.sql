@@ -0,0 +1,116 @@
+/*
+===============================================================================
+Migration 002: Move Existing Forecast Weather to Partitioned Columnstore
+===============================================================================
+Script Purpose:
+    Converts an existing rowstore forecast_weather table to the partitioned
+    clustered columnstore layout in ddl_forecast_weather_columnstore.sql
+    while keeping its history.
+    1. Creates the monthly partition function and scheme if missing.
+    2. Copies the rows into forecast_weather_new, keeping their ids.
+    3. Swaps the tables in one transaction and keeps the old table as
+       forecast_weather_old until the copy has been verified.
+    4. Extends the partition range to a year past the current month
+       (SPLIT RANGE), as in extend_weather_partitions.sql. Schedule that
+       script monthly afterwards so new months get their own partition.
+    Each step is skipped once done, so the script is safe to re-run, also
+    after it stopped partway; steps 2 and 3 are skipped entirely once
+    forecast_weather is a columnstore table.
+	  Pause the pipeline while this runs. Drop forecast_weather_old afterwards.
+===============================================================================
+*/
+
+IF NOT EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = 'pf_weather_month')
+	CREATE PARTITION FUNCTION pf_weather_month (DATETIME)
+		AS RANGE RIGHT FOR VALUES (
+			'2025-01-01', '2025-02-01', '2025-03-01', '2025-04-01',
+			'2025-05-01', '2025-06-01', '2025-07-01', '2025-08-01',
+			'2025-09-01', '2025-10-01', '2025-11-01', '2025-12-01',
+			'2026-01-01', '2026-02-01', '2026-03-01', '2026-04-01',
+			'2026-05-01', '2026-06-01', '2026-07-01', '2026-08-01',
+			'2026-09-01', '2026-10-01', '2026-11-01', '2026-12-01'
+		);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = 'ps_weather_month')
+	CREATE PARTITION SCHEME ps_weather_month
+		AS PARTITION pf_weather_month ALL TO ([PRIMARY]);
+GO
+
+IF OBJECT_ID('forecast_weather_new', 'U') IS NULL AND NOT EXISTS (
+	SELECT 1 FROM sys.indexes
+	WHERE object_id = OBJECT_ID('forecast_weather') AND type_desc = 'CLUSTERED COLUMNSTORE')
+	CREATE TABLE forecast_weather_new (
+		id INT IDENTITY(1,1) NOT NULL,
+		main_temp FLOAT,
+		main_feels_like FLOAT,
+		main_temp_max FLOAT,
+		main_temp_min FLOAT,
+		main_humidity INT,
+		main_pressure INT,
+		dt DATETIME NOT NULL,
+		coord_lat FLOAT,
+		coord_lon FLOAT,
+		city NVARCHAR(50)
+	) ON ps_weather_month (dt);
+GO
+
+IF OBJECT_ID('forecast_weather_new', 'U') IS NOT NULL AND NOT EXISTS (
+	SELECT 1 FROM sys.indexes
+	WHERE name = 'CCI_forecast_weather_new' AND object_id = OBJECT_ID('forecast_weather_new'))
+	CREATE CLUSTERED COLUMNSTORE INDEX CCI_forecast_weather_new
+		ON forecast_weather_new
+		ON ps_weather_month (dt);
+GO
+
+-- Copy only into an empty table, so a re-run after a failed swap does not copy twice
+IF OBJECT_ID('forecast_weather_new', 'U') IS NOT NULL
+	AND NOT EXISTS (SELECT 1 FROM forecast_weather_new)
+BEGIN
+	SET IDENTITY_INSERT forecast_weather_new ON;
+	INSERT INTO forecast_weather_new WITH (TABLOCK) (
+		id, main_temp, main_feels_like, main_temp_max, main_temp_min,
+		main_humidity, main_pressure, dt, coord_lat, coord_lon, city)
+	SELECT
+		id, main_temp, main_feels_like, main_temp_max, main_temp_min,
+		main_humidity, main_pressure, ISNULL(dt, '1970-01-01'), coord_lat, coord_lon, city
+	FROM forecast_weather;
+	SET IDENTITY_INSERT forecast_weather_new OFF;
+END;
+GO
+
+IF OBJECT_ID('forecast_weather_new', 'U') IS NOT NULL
+BEGIN
+	BEGIN TRANSACTION;
+		EXEC sp_rename 'forecast_weather', 'forecast_weather_old';
+		EXEC sp_rename 'forecast_weather_new', 'forecast_weather';
+		EXEC sp_rename 'forecast_weather.CCI_forecast_weather_new', 'CCI_forecast_weather', 'INDEX';
+		IF EXISTS (SELECT 1 FROM sys.indexes
+			WHERE name = 'IX_forecast_weather_city_dt' AND object_id = OBJECT_ID('forecast_weather_old'))
+			EXEC sp_rename 'forecast_weather_old.IX_forecast_weather_city_dt', 'IX_forecast_weather_old_city_dt', 'INDEX';
+	COMMIT TRANSACTION;
+END;
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes
+	WHERE name = 'IX_forecast_weather_city_dt' AND object_id = OBJECT_ID('forecast_weather'))
+	CREATE NONCLUSTERED INDEX IX_forecast_weather_city_dt
+		ON forecast_weather (city, dt)
+		ON ps_weather_month (dt);
+GO
+
+-- Extend the partition range to a year past the current month
+DECLARE @next DATETIME = (
+	SELECT DATEADD(MONTH, 1, CAST(MAX(prv.value) AS DATETIME))
+	FROM sys.partition_range_values prv
+	JOIN sys.partition_functions pf ON pf.function_id = prv.function_id
+	WHERE pf.name = 'pf_weather_month');
+DECLARE @until DATETIME = DATEADD(MONTH, 12, DATEFROMPARTS(YEAR(GETDATE()), MONTH(GETDATE()), 1));
+
+WHILE @next <= @until
+BEGIN
+	ALTER PARTITION SCHEME ps_weather_month NEXT USED [PRIMARY];
+	ALTER PARTITION FUNCTION pf_weather_month() SPLIT RANGE (@next);
+	SET @next = DATEADD(MONTH, 1, @next);
+END;
+GO
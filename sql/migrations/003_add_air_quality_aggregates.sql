@@ -0,0 +1,35 @@
+/*
+===============================================================================
+Migration 003: Add the Air Quality Aggregates Table
+===============================================================================
+Script Purpose:
+    Creates air_quality_aggregates, which holds the per-city rolling
+    pm2_5, pm10 and o3 averages and the derived AQI written by the pipeline
+    on each load, and its (city, dt) index. Existing tables are not touched
+    and the script is safe to re-run.
+	  Aggregates are only written for rows loaded after the migration; the
+	  air_pollution history already loaded is used as their window.
+===============================================================================
+*/
+
+IF OBJECT_ID('air_quality_aggregates', 'U') IS NULL
+	CREATE TABLE air_quality_aggregates (
+		id INT IDENTITY(1,1) PRIMARY KEY,
+		city NVARCHAR(50),
+		dt DATETIME,
+		window_hours FLOAT,
+		pm2_5_avg FLOAT,
+		pm10_avg FLOAT,
+		o3_avg FLOAT,
+		samples INT,
+		aqi INT,
+		aqi_desc NVARCHAR(50)
+	);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes
+	WHERE name = 'IX_air_quality_aggregates_city_dt'
+	AND object_id = OBJECT_ID('air_quality_aggregates'))
+	CREATE NONCLUSTERED INDEX IX_air_quality_aggregates_city_dt
+		ON air_quality_aggregates (city, dt);
+GO
@@ -0,0 +1,131 @@
+"""
+Enrich Module
+
+Derives air-quality aggregates from the transformed air pollution frame, so
+consumers can read per-city rolling averages instead of computing them with
+slow queries over air_pollution.
+
+For every new (city, dt) row, build_aggregates() computes the mean pm2_5,
+pm10 and o3 over the preceding window (24 hours by default), the number of
+samples in the window, and a derived AQI: the worst OpenWeatherMap grade of
+the three averages, with its description as a categorical.
+
+Aggregates are incremental: the rows already loaded for the same cities
+within one window of the new data are read back from the database and
+combined with the new rows, so a run only recomputes the windows of its own
+rows, and those still cover the history loaded by earlier runs.
+
+Usage:
+    from src.enrich import build_aggregates
+    aggregates_df = build_aggregates(air_pollution_df, engine, hours=24)
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+from src.transform import AQI_LABELS
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES_TABLE = 'air_quality_aggregates'
+
+# Aggregated pollutants and the air_pollution column each one comes from
+POLLUTANTS = {
+    'pm2_5': 'components_pm2_5',
+    'pm10': 'components_pm10',
+    'o3': 'components_o3',
+}
+
+# Upper bounds of the Good, Fair, Moderate and Poor grades; anything above is Very Poor
+AQI_BREAKPOINTS = {
+    'pm2_5': [10, 25, 50, 75],
+    'pm10': [20, 50, 100, 200],
+    'o3': [60, 100, 140, 180],
+}
+
+HISTORY_COLUMNS = ['city', 'dt', *POLLUTANTS.values()]
+
+# Number of cities per history query, below the SQL Server parameter limit
+HISTORY_CHUNK = 1000
+
+
+def build_aggregates(air_pollution_df, engine, hours=24):
+    if air_pollution_df.empty:
+        df = pd.DataFrame()
+    else:
+        with engine.connect() as con:
+            history = read_history(con, air_pollution_df, hours)
+        df = rolling_aggregates(air_pollution_df, history, hours)
+        logger.info(
+            f'Built {len(df)} {hours:g}h air quality aggregates from '
+            f'{len(history)} rows of history')
+    df.name = AGGREGATES_TABLE
+    return df
+
+# Read the loaded air_pollution rows that fall in the windows of the new rows
+
+
+def read_history(con, air_pollution_df, hours=24):
+    if not sa.inspect(con).has_table('air_pollution'):
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    table = sa.table('air_pollution', sa.column('city'), sa.column('dt', sa.DateTime),
+                     *(sa.column(c) for c in POLLUTANTS.values()))
+    since = (air_pollution_df['dt'].min() - pd.Timedelta(hours=hours)).to_pydatetime()
+    until = air_pollution_df['dt'].max().to_pydatetime()
+    cities = sorted(air_pollution_df['city'].unique())
+
+    frames = []
+    for i in range(0, len(cities), HISTORY_CHUNK):
+        query = sa.select(*(table.c[c] for c in HISTORY_COLUMNS)).where(
+            table.c.city.in_(cities[i:i + HISTORY_CHUNK]),
+            table.c.dt >= since, table.c.dt <= until)
+        frames.append(pd.read_sql(query, con, parse_dates=['dt']))
+    return pd.concat(frames, ignore_index=True)
+
+# Rolling means per city over the history and new rows, returned for the new rows only
+
+
+def rolling_aggregates(air_pollution_df, history=None, hours=24):
+    new = air_pollution_df[HISTORY_COLUMNS].assign(_new=True)
+    frames = [new]
+    if history is not None and not history.empty:
+        frames.insert(0, history[HISTORY_COLUMNS].assign(_new=False))
+
+    # New rows replace loaded rows with the same key, e.g. on upsert re-runs
+    df = pd.concat(frames, ignore_index=True)
+    df['dt'] = pd.to_datetime(df['dt'])
+    df = df.drop_duplicates(subset=['city', 'dt'], keep='last')
+    df = df.sort_values(['city', 'dt'], kind='stable', ignore_index=True)
+    df['city'] = df['city'].astype('category')
+
+    rolling = df.groupby('city', observed=True, sort=False)[
+        ['dt', *POLLUTANTS.values()]].rolling(pd.Timedelta(hours=hours), on='dt')
+    means = rolling.mean().droplevel(0).sort_index()
+    samples = rolling.count().droplevel(0).sort_index()['components_pm2_5']
+
+    result = pd.DataFrame({'city': df['city'].astype(str), 'dt': df['dt'],
+                           'window_hours': hours})
+    for name, column in POLLUTANTS.items():
+        result[f'{name}_avg'] = means[column]
+    result['samples'] = samples.astype('int64')
+    result['aqi'] = derived_aqi(
+        {name: means[column] for name, column in POLLUTANTS.items()})
+    result['aqi_desc'] = pd.Categorical.from_codes(
+        np.where(result['aqi'] > 0, result['aqi'] - 1, len(AQI_LABELS) - 1),
+        categories=AQI_LABELS)
+    return result[df['_new'].to_numpy()].reset_index(drop=True)
+
+# Worst OpenWeatherMap grade (1-5) of the pollutant averages, 0 when all are missing
+
+
+def derived_aqi(averages):
+    grades = []
+    for name, values in averages.items():
+        values = values.to_numpy(dtype='float64', na_value=np.nan)
+        grade = np.searchsorted(AQI_BREAKPOINTS[name], values, side='right') + 1
+        grades.append(np.where(np.isnan(values), 0, grade))
+    return np.max(grades, axis=0).astype('int64')
@@ -3,7 +3,26 @@ Weather Data Extraction Module
 
 Provides functions to fetch and save weather, forecast, and air pollution data 
 from the OpenWeatherMap API. Cities are resolved to coordinates, data is 
-downloaded, and results are stored as JSON files in ./data/raw/.
+downloaded, and results are stored as compact (optionally gzip or zstd
+compressed) JSON files in ./data/raw/.
+Cities are fetched concurrently on a bounded thread pool sized by
+config.max_workers, and every request is throttled by a shared token-bucket
+rate limiter. All requests share one pooled keep-alive session that retries
+failed connections. Requests answered with 429 or a 5xx error are retried by
+http_get(), which takes a rate limiter token for every attempt, so retries
+never go over the request budget. Coordinates are cached on disk, so geocoding only
+happens for cities that are not in the cache yet.
+
+With a change tracker (config.change_tracker_path) responses whose content
+has not changed since the last fetch of that city are dropped before they are
+saved or returned.
+
+Fetches that fail are logged and, when a failures list is passed in, recorded
+there as (city, data_type, error) so the caller can retry them later.
+
+In streaming mode (config.stream) responses are returned as in-memory
+Payload objects for transform(), and raw files are archived on a background
+thread only when config.archive_raw is set.
 
 Usage:
     from extract import extract
@@ -11,93 +30,301 @@ Usage:
 """
 
 import requests
-import json
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 from pathlib import Path
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.utils.archiver import RawArchiver
+from src.utils.change_tracker import ChangeTracker
+from src.utils.etl_config import DEFAULT_GEO_URL
+from src.utils.geo_cache import GeoCache
+from src.utils.metrics import metrics
+from src.utils.payload import DATA_TYPES, Payload
+from src.utils.rate_limiter import RateLimiter
+from src.utils.serializer import COMPRESSION_SUFFIXES, write_json
 
 logger = logging.getLogger(__name__)
 
+MAX_RATE_LIMIT_RETRIES = 3
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+SERVER_ERROR_BACKOFF = 0.5
+
 # Main extraction function
 
 
-def extract(config):
+def extract(config, session=None, limiter=None, tracker=None, failures=None):
+    limiter = limiter if limiter is not None else create_rate_limiter(config)
+    owns_tracker = tracker is None and bool(config.change_tracker_path)
+    if owns_tracker:
+        tracker = ChangeTracker(config.change_tracker_path)
+    geo_cache = GeoCache(
+        config.geo_cache_path, config.geo_cache_ttl) if config.geo_cache_path else None
+    archiver = RawArchiver(
+        save_file) if config.stream and config.archive_raw else None
+    owns_session = session is None
+    session = session if session is not None else create_session(config)
+    workers = max(1, min(config.max_workers, len(config.cities)))
+
+    try:
+        if workers == 1:
+            results = [extract_city(city, config, limiter, geo_cache, session,
+                                    archiver, tracker, failures)
+                       for city in config.cities]
+        else:
+            logger.info(
+                f'Extracting {len(config.cities)} cities with {workers} workers')
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda city: extract_city(
+                        city, config, limiter, geo_cache, session, archiver,
+                        tracker, failures),
+                    config.cities))
+    finally:
+        if archiver is not None:
+            archiver.close()
+        if owns_session:
+            session.close()
+
+    if owns_tracker:
+        tracker.flush()
+        log_skipped(tracker)
+
     saved_files = {}
-    for city in config.cities:
+    for city, files in zip(config.cities, results):
+        if files is not None:
+            saved_files[city] = files
+
+    return saved_files
+
+# Fetch coordinates and weather data for a single city
 
-        logger.info(f'Fetching coordinates for {city}')
-        lat, lon = fetch_coordinates(city, config.api_key)
+
+def extract_city(city, config, limiter=None, geo_cache=None, session=None,
+                 archiver=None, tracker=None, failures=None):
+    with metrics.timer('etl_city_extract_seconds', city=city):
+        return _extract_city(city, config, limiter, geo_cache, session,
+                             archiver, tracker, failures)
+
+
+def _extract_city(city, config, limiter, geo_cache, session, archiver, tracker,
+                  failures):
+    cached = geo_cache.get(city) if geo_cache is not None else None
+    if cached is not None:
+        lat, lon = cached
+        logger.info('Using cached coordinates for %s: lat=%s, lon=%s', city, lat, lon)
+    else:
+        logger.info('Fetching coordinates for %s', city)
+        lat, lon = fetch_coordinates(
+            city, config.api_key, limiter=limiter, session=session,
+            base_url=config.geo_url, retries=config.http_retries)
 
         if lat is None or lon is None:
-            logger.info(f'{lat} or {lon} is empty, skipping')
-            continue
+            logger.info('Coordinates for %s are empty (%s, %s), skipping', city, lat, lon)
+            if failures is not None:
+                failures.extend((city, data_type, 'No coordinates')
+                                for data_type in config.data_types or DATA_TYPES)
+            return None
 
-        logger.info(f'Fetching weather data for {city}')
-        saved_files[city] = fetch_weather(city, lat, lon, config)
+        if geo_cache is not None:
+            geo_cache.set(city, lat, lon)
 
-    return saved_files
+    logger.info('Fetching weather data for %s', city)
+    return fetch_weather(city, lat, lon, config, limiter=limiter,
+                         session=session, archiver=archiver, tracker=tracker,
+                         failures=failures)
 
 # Fetch coordinates for a city from OpenWeatherMap API
 
 
-def fetch_coordinates(city, api_key):
-    geo_url = f'http://api.openweathermap.org/geo/1.0/direct?q={city}&limit=5&appid={api_key}'
+def fetch_coordinates(city, api_key, limiter=None, session=None,
+                      base_url=DEFAULT_GEO_URL, retries=0):
+    geo_url = f'{base_url}/direct?q={city}&limit=5&appid={api_key}'
 
     try:
-        response = requests.get(geo_url, timeout=10)
-        response.raise_for_status()
+        response = http_get(geo_url, limiter, session, retries)
         geo_data = response.json()
     except requests.RequestException as e:
         logger.exception(f"Error fetching coordinates for {city}: {e}")
         return None, None
 
     if not geo_data:
-        logger.warning(f"No coordinates found for {city}")
+        logger.warning("No coordinates found for %s", city)
         return None, None
 
     lat, lon = geo_data[0]['lat'], geo_data[0]['lon']
-    logger.info(f"Coordinates for {city}: lat={lat}, lon={lon}")
+    logger.info('Coordinates for %s: lat=%s, lon=%s', city, lat, lon)
     return lat, lon
 
 # Fetch weather data for a city from OpenWeatherMap API
 
 
-def fetch_weather(city, lat, lon, config):
+def fetch_weather(city, lat, lon, config, limiter=None, session=None,
+                  archiver=None, tracker=None, failures=None):
 
     urls = {
-        'current_weather': f'https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&units={config.units}&appid={config.api_key}',
-        'forecast_weather': f'https://api.openweathermap.org/data/2.5/forecast?lat={lat}&lon={lon}&units={config.units}&appid={config.api_key}',
-        'air_pollution': f'https://api.openweathermap.org/data/2.5/air_pollution?lat={lat}&lon={lon}&units={config.units}&appid={config.api_key}'
+        'current_weather': f'{config.api_url}/weather?lat={lat}&lon={lon}&units={config.units}&appid={config.api_key}',
+        'forecast_weather': f'{config.api_url}/forecast?lat={lat}&lon={lon}&units={config.units}&appid={config.api_key}',
+        'air_pollution': f'{config.api_url}/air_pollution?lat={lat}&lon={lon}&units={config.units}&appid={config.api_key}'
     }
 
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     city_safe = city.replace(" ", "_")
+    suffix = COMPRESSION_SUFFIXES[config.raw_compression]
+
+    data_types = config.data_types or list(urls)
 
     saved_files = []
     for data_type, api_url in urls.items():
+        if data_type not in data_types:
+            continue
         file_path = Path(config.raw_path) / \
-            f'raw_{data_type}_{city_safe}_{timestamp}.json'
+            f'raw_{data_type}_{city_safe}_{timestamp}{suffix}'
 
         try:
-            res = requests.get(api_url, timeout=10)
-            res.raise_for_status()
+            res = http_get(api_url, limiter, session, config.http_retries)
             weather_data = res.json()
-            logger.info(f'Fetched weather data for {city}')
+            logger.info('Fetched weather data for %s', city)
+            if tracker is not None and not tracker.observe(city, data_type, weather_data):
+                logger.info('%s data for %s unchanged, skipping', data_type, city)
+                metrics.inc('etl_payloads_skipped_total', data_type=data_type)
+                continue
+            if config.stream:
+                saved_files.append(
+                    stream_payload(data_type, weather_data, file_path, config, archiver))
+                continue
             save_file(file_path, weather_data)
             saved_files.append(file_path)
-            logger.info(f"Saved {data_type} data for {city} at {file_path}")
+            logger.info('Saved %s data for %s at %s', data_type, city, file_path)
         except requests.RequestException as e:
             logger.exception(
                 f"Error fetching {data_type} data for {city}: {e}")
+            if failures is not None:
+                failures.append((city, data_type, str(e)))
 
-        logger.debug("Sleeping 1 second to avoid hitting API rate limit")
-        time.sleep(1)
     return saved_files
 
-# Save data to a JSON file
+# Wrap a response for in-memory hand-off, archiving it off the critical path
+
+
+def stream_payload(data_type, data, file_path, config, archiver=None):
+    if not config.archive_raw:
+        return Payload(data_type, data)
+
+    if archiver is not None:
+        archiver.submit(file_path, data)
+    else:
+        save_file(file_path, data)
+    return Payload(data_type, data, file_path)
+
+# Log how many unchanged payloads the change tracker dropped
+
+
+def log_skipped(tracker):
+    skipped = sum(tracker.skipped.values())
+    if skipped:
+        counts = ', '.join(f'{k}={v}' for k, v in sorted(tracker.skipped.items()))
+        logger.info(f'Skipped {skipped} unchanged payloads ({counts})')
+
+# Create the token-bucket rate limiter described by the extraction config
+
+
+def create_rate_limiter(config):
+    return RateLimiter(
+        config.calls_per_minute,
+        burst=config.rate_limit_burst,
+        state_path=config.rate_limit_state
+    )
+
+# Create a pooled keep-alive session shared by all extraction requests. The
+# adapter only retries connections that could not be opened, which never
+# reached the API; error responses are retried by http_get through the limiter.
+
+
+def create_session(config):
+    retry = Retry(
+        total=config.http_retries,
+        connect=config.http_retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=SERVER_ERROR_BACKOFF,
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=max(config.pool_size, config.max_workers),
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+# Send a GET request through the rate limiter, retrying on HTTP 429 and, up to
+# retries times with exponential backoff, on 5xx errors
+
+
+def http_get(url, limiter=None, session=None, retries=0):
+    client = session if session is not None else requests
+    endpoint = urlsplit(url).path.rsplit('/', 1)[-1]
+    rate_limited = server_errors = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        with metrics.timer('etl_http_request_seconds', endpoint=endpoint):
+            response = client.get(url, timeout=10)
+        metrics.inc('etl_http_requests_total', endpoint=endpoint,
+                    status=response.status_code)
+
+        if response.status_code == 429 and rate_limited < MAX_RATE_LIMIT_RETRIES:
+            delay = retry_after(response, rate_limited)
+            rate_limited += 1
+            logger.warning(
+                f"Rate limited by API (attempt {rate_limited}), retrying in {delay:.1f} seconds")
+            if limiter is not None:
+                limiter.backoff(delay)
+            else:
+                time.sleep(delay)
+        elif response.status_code in RETRY_STATUS_CODES and server_errors < retries:
+            delay = SERVER_ERROR_BACKOFF * 2 ** server_errors
+            server_errors += 1
+            logger.warning(
+                f"API returned {response.status_code} (attempt {server_errors}), "
+                f"retrying in {delay:.1f} seconds")
+            time.sleep(delay)
+        else:
+            break
+
+    response.raise_for_status()
+    return response
+
+# Seconds to wait after a 429, from Retry-After or exponential backoff
+
+
+def retry_after(response, attempt):
+    header = response.headers.get('Retry-After')
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(header)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return float(2 ** attempt)
+
+# Save data to a compact JSON file, compressed according to its suffix
 
 
 def save_file(file_path, data):
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    written = write_json(file_path, data)
+    metrics.inc('etl_raw_bytes_written_total', written)
+    return written
@@ -4,30 +4,223 @@ Weather data loading module.
 This module is responsible for loading the transformed weather data
 into the SQL Server database.
 
+Loading goes through a pluggable backend selected by config.method:
+- default: pandas to_sql with the driver's standard executemany
+- fast_executemany: to_sql in large chunks over a pyodbc engine created
+  with fast_executemany enabled
+- bulk_insert: stage the frame as CSV and run SQL Server BULK INSERT
+
+Setting DB_URL points the loader at any SQLAlchemy database (for example
+SQLite for local testing) instead of SQL Server.
+
+Engines are created once per process and reused, and load_all() writes
+every table inside a single transaction so that a run is atomic.
+
+With config.mode set to upsert, rows are written to a staging table named
+uniquely for each load, then merged into the target on the (city, dt) key,
+so re-runs and overlapping forecast windows update rows instead of
+duplicating them, and concurrent loaders never touch each other's staging
+tables.
+
 Usage:
-    from src.load import load
-    load(df)
+    from src.load import load, load_all
+    load(df, config)
+    load_all([air_pollution_df, current_weather_df, forecast_weather_df], config)
 '''
 
+import logging
+import os
+import tempfile
+import threading
+import uuid
+
 import sqlalchemy as sa
 from sqlalchemy.engine import URL
 
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+UPSERT_KEYS = ['city', 'dt']
+
+_engines = {}
+_engines_lock = threading.Lock()
+
 
 def load(df, config):
-    connection_url = URL.create(
-        "mssql+pyodbc",
-        host=config.host,
-        database=config.database,
-        query={
-            "driver": config.driver,
-            "trusted_connection": "yes"
-        }
-    )
-    engine = sa.create_engine(connection_url)
+    load_all([df], config)
+
+# Load several frames into their tables inside one transaction
+
+
+def load_all(dfs, config, engine=None):
+    engine = engine if engine is not None else get_engine(config)
+    backend = get_backend(config.method)
+
+    loaded = []
+    with engine.begin() as con:
+        for df in dfs:
+            if df.empty:
+                logger.info(f'No rows to load into {df.name}, skipping')
+                continue
+            logger.info(f'Loading {len(df)} rows into {df.name}')
+            if config.mode == 'upsert':
+                upsert(df, con, config, backend)
+            else:
+                backend(df, con, config)
+            loaded.append((df.name, len(df)))
+
+    for table, rows in loaded:
+        metrics.inc('etl_rows_loaded_total', rows, table=table)
+    return sum(rows for _, rows in loaded)
+
+# Return the process-wide engine for a load configuration, creating it once
+
+
+def get_engine(config):
+    key = (config.url, config.host, config.database,
+           config.driver, config.method)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            logger.info('Creating database engine')
+            engine = _engines[key] = create_db_engine(config)
+        return engine
+
+# Close every cached engine and its connection pool
+
+
+def dispose_engines():
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+# Build the database engine described by the load configuration
+
+
+def create_db_engine(config):
+    if config.url:
+        connection_url = sa.make_url(config.url)
+    else:
+        connection_url = URL.create(
+            "mssql+pyodbc",
+            host=config.host,
+            database=config.database,
+            query={
+                "driver": config.driver,
+                "trusted_connection": "yes"
+            }
+        )
 
+    engine_options = {}
+    if config.method == 'fast_executemany':
+        if connection_url.drivername == 'mssql+pyodbc':
+            engine_options['fast_executemany'] = True
+        else:
+            logger.warning(
+                f'fast_executemany is only supported by mssql+pyodbc, '
+                f'using default executemany for {connection_url.drivername}')
+
+    return sa.create_engine(connection_url, **engine_options)
+
+# Append a frame with pandas to_sql
+
+
+def load_to_sql(df, con, config, table=None):
     df.to_sql(
-        df.name,
-        con=engine,
+        table or df.name,
+        con=con,
         if_exists="append",
-        index=False
+        index=False,
+        chunksize=config.chunksize
     )
+
+# Stage a frame as CSV and load it with SQL Server BULK INSERT
+
+
+def load_bulk_insert(df, con, config, table=None):
+    if con.dialect.name != 'mssql':
+        raise ValueError(
+            f'bulk_insert load method requires SQL Server, not {con.dialect.name}')
+
+    table = table or df.name
+    staging_dir = config.staging_path or tempfile.gettempdir()
+    os.makedirs(staging_dir, exist_ok=True)
+    csv_path = os.path.abspath(os.path.join(
+        staging_dir, f'{table}_{uuid.uuid4().hex}.csv'))
+    staging_table = f'{table}_bulk_staging_{uuid.uuid4().hex}'
+    columns = ', '.join(f'[{c}]' for c in df.columns)
+
+    df.to_csv(csv_path, index=False, lineterminator='\n',
+              date_format='%Y-%m-%d %H:%M:%S')
+    try:
+        df.head(0).to_sql(staging_table, con=con, index=False)
+        con.exec_driver_sql(
+            f"BULK INSERT [{staging_table}] FROM '{csv_path}' "
+            f"WITH (FORMAT = 'CSV', FIRSTROW = 2, ROWTERMINATOR = '0x0a', TABLOCK)")
+        con.exec_driver_sql(
+            f'INSERT INTO [{table}] ({columns}) '
+            f'SELECT {columns} FROM [{staging_table}]')
+        con.exec_driver_sql(f'DROP TABLE [{staging_table}]')
+    finally:
+        os.remove(csv_path)
+
+    logger.info(f'Bulk inserted {len(df)} rows into {table}')
+
+# Stage a frame and merge it into its table on the (city, dt) key
+
+
+def upsert(df, con, config, backend=load_to_sql):
+    table = df.name
+    # Unique per load, so concurrent loaders never replace each other's staging table
+    staging_table = f'{table}_staging_{uuid.uuid4().hex}'
+    df = df.drop_duplicates(subset=UPSERT_KEYS, keep='last')
+
+    if not sa.inspect(con).has_table(table):
+        df.head(0).to_sql(table, con=con, index=False)
+
+    df.head(0).to_sql(staging_table, con=con, index=False)
+    backend(df, con, config, table=staging_table)
+
+    quote = con.dialect.identifier_preparer.quote
+    target, source = quote(table), quote(staging_table)
+    columns = [quote(c) for c in df.columns]
+    keys = [quote(k) for k in UPSERT_KEYS]
+    on = ' AND '.join(f'target.{k} = source.{k}' for k in keys)
+
+    if con.dialect.name == 'mssql':
+        updates = ', '.join(f'target.{c} = source.{c}'
+                            for c in columns if c not in keys)
+        con.exec_driver_sql(
+            f'MERGE INTO {target} AS target USING {source} AS source ON {on} '
+            f'WHEN MATCHED THEN UPDATE SET {updates} '
+            f'WHEN NOT MATCHED THEN INSERT ({", ".join(columns)}) '
+            f'VALUES ({", ".join("source." + c for c in columns)});')
+    else:
+        con.exec_driver_sql(
+            f'DELETE FROM {target} AS target WHERE EXISTS '
+            f'(SELECT 1 FROM {source} AS source WHERE {on})')
+        con.exec_driver_sql(
+            f'INSERT INTO {target} ({", ".join(columns)}) '
+            f'SELECT {", ".join(columns)} FROM {source}')
+
+    con.exec_driver_sql(f'DROP TABLE {source}')
+    logger.info(f'Upserted {len(df)} rows into {table}')
+
+
+LOAD_BACKENDS = {
+    'default': load_to_sql,
+    'fast_executemany': load_to_sql,
+    'bulk_insert': load_bulk_insert,
+}
+
+# Look up a load backend by name
+
+
+def get_backend(method):
+    try:
+        return LOAD_BACKENDS[method]
+    except KeyError:
+        raise ValueError(
+            f'Unknown load method {method}, expected one of {sorted(LOAD_BACKENDS)}')
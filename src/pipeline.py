@@ -0,0 +1,460 @@
+"""
+Pipeline Module
+
+Orchestrates the extract, transform and load stages for the different run
+modes of the ETL pipeline.
+
+- run_full: extract from the API, then transform and load, optionally in
+  bounded batches of cities. Unchanged payloads are dropped by the change
+  tracker, whose state is saved once a batch has been loaded. With a
+  checkpoint, an interrupted run resumes where it stopped and failed fetches
+  are retried with backoff by later runs, before the configured cities
+- run_incremental: transform and load only raw files the manifest has not
+  seen processed
+- extract_only: fetch raw files and register them in the manifest as
+  unprocessed
+- transform_only: transform unprocessed raw files and stage the frames as
+  Parquet for a later load
+- load_only: load every staged run into the database
+- enqueue_cities / run_worker: split the cities into batches in a shared work
+  queue, and extract the batches claimed by this worker into the manifest
+- run_distributed: queue the cities, extract them on several worker
+  processes sharing one rate limit budget, then load the results once
+
+Every load also writes rolling air quality aggregates of the new air
+pollution rows, computed on top of the history already in the database.
+
+The transform, storage and load modules (pandas, pyarrow, SQLAlchemy) are
+imported by the functions that use them, so extract-only runs and the
+command line start without paying for them.
+
+Every run records stage timings and row counts in the metrics registry and
+exports them when it finishes, even if it failed.
+
+Usage:
+    from src.pipeline import run_full
+    run_full(config)
+"""
+
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+
+from src.extract import create_rate_limiter, create_session, extract, log_skipped
+from src.utils.change_tracker import ChangeTracker
+from src.utils.checkpoint import Checkpoint
+from src.utils.manifest import RawManifest
+from src.utils.metrics import metrics
+from src.utils.payload import DATA_TYPES
+from src.utils.work_queue import WorkQueue
+
+logger = logging.getLogger(__name__)
+
+# Extract from the API, then transform and load everything that was fetched,
+# in batches of config.Pipeline.batch_size cities to bound peak memory. Every
+# batch shares one rate limiter and one pooled session, so batching neither
+# refills the request budget nor reopens connections.
+
+
+def run_full(config, session=None, limiter=None):
+    limiter = limiter if limiter is not None else create_rate_limiter(config.Extract)
+    owns_session = session is None
+    session = session if session is not None else create_session(config.Extract)
+    try:
+        with tracked_run(config):
+            _run_full(config, session, limiter)
+    finally:
+        if owns_session:
+            session.close()
+
+
+def _run_full(config, session, limiter):
+    cities = config.Extract.cities
+    data_types = tuple(config.Extract.data_types or DATA_TYPES)
+    tracker = ChangeTracker(
+        config.Extract.change_tracker_path) if config.Extract.change_tracker_path else None
+    checkpoint = create_checkpoint(config.Pipeline)
+
+    if checkpoint is None:
+        work = [(city, data_types) for city in cities]
+    else:
+        run_id = checkpoint.begin(config.Pipeline.resume_minutes, data_types)
+        resume_unloaded(checkpoint, run_id, config)
+        work = checkpoint.plan(run_id, cities, data_types)
+        if len(work) != len(cities):
+            logger.info(f'{len(work)} cities to fetch after resuming and retries')
+
+    batch_size = config.Pipeline.batch_size or len(work) or 1
+    for start in range(0, len(work), batch_size):
+        batch = work[start:start + batch_size]
+        if batch_size < len(work):
+            logger.info(
+                f'Processing cities {start + 1}-{start + len(batch)} of {len(work)}')
+
+        logger.info('Starting extraction of data from API')
+        failures = []
+        with metrics.timer('etl_stage_seconds', stage='extract'):
+            saved_files = extract_work(batch, config, session, limiter, tracker, failures)
+        metrics.inc('etl_stage_rows_total',
+                    sum(len(files) for files in saved_files.values()), stage='extract')
+        logger.info('Extraction of data from API finished')
+        if checkpoint is not None:
+            checkpoint.record_fetched(run_id, batch, saved_files, failures)
+
+        transform_and_load(saved_files, config)
+        record_processed(saved_files, config)
+        if checkpoint is not None:
+            checkpoint.record_loaded(run_id)
+        if tracker is not None:
+            tracker.flush()
+        del saved_files
+
+    if checkpoint is not None:
+        checkpoint.finish(run_id)
+    if tracker is not None:
+        log_skipped(tracker)
+
+
+def create_checkpoint(pipeline):
+    if pipeline is None or not pipeline.checkpoint_path:
+        return None
+    return Checkpoint(pipeline.checkpoint_path,
+                      retry_base_seconds=pipeline.retry_base_seconds,
+                      max_attempts=pipeline.retry_max_attempts)
+
+# Load the raw files an interrupted run fetched but did not load
+
+
+def resume_unloaded(checkpoint, run_id, config):
+    unloaded = checkpoint.unloaded(run_id)
+    if not unloaded:
+        return
+    logger.info(
+        f'Loading {sum(len(f) for f in unloaded.values())} raw files fetched '
+        f'before the run was interrupted')
+    transform_and_load(unloaded, config)
+    record_processed(unloaded, config)
+    checkpoint.record_loaded(run_id)
+
+# Extract (city, data_types) work with one extract() call per group of data
+# types, all drawing on the same rate limiter budget and session
+
+
+def extract_work(work, config, session, limiter, tracker=None, failures=None):
+    saved_files = {}
+    for data_types, cities in group_by_data_types(work):
+        extract_config = replace(config.Extract, cities=cities,
+                                 data_types=list(data_types))
+        saved_files.update(extract(
+            extract_config, session=session, limiter=limiter,
+            tracker=tracker, failures=failures))
+    return saved_files
+
+# Group (city, data_types) work by data types, keeping the city order
+
+
+def group_by_data_types(work):
+    groups = {}
+    for city, data_types in work:
+        groups.setdefault(data_types, []).append(city)
+    return list(groups.items())
+
+# Register the raw files of a finished run in the manifest as processed
+
+
+def record_processed(saved_files, config):
+    if not config.Extract.manifest_path:
+        return
+
+    manifest = RawManifest(config.Extract.manifest_path)
+    for city, files in saved_files.items():
+        paths = [getattr(f, 'path', f) for f in files]
+        paths = [p for p in paths if p is not None]
+        manifest.register(paths, city=city)
+        manifest.mark_processed(paths)
+
+# Transform and load only the raw files the manifest has not seen processed
+
+
+def run_incremental(config):
+    if not config.Extract.manifest_path:
+        raise ValueError('Incremental mode needs RAW_MANIFEST to be set.')
+
+    with tracked_run(config):
+        _run_incremental(config)
+
+
+def _run_incremental(config):
+    manifest = RawManifest(config.Extract.manifest_path)
+    manifest.scan(config.Extract.raw_path)
+    raw_file = manifest.pending()
+    if not raw_file:
+        logger.info('No unprocessed raw files found')
+        return
+
+    logger.info(
+        f'Processing {sum(len(f) for f in raw_file.values())} unprocessed raw files')
+    transform_and_load(raw_file, config)
+    manifest.mark_processed(
+        path for files in raw_file.values() for path in files)
+
+
+def transform_and_load(raw_file, config):
+    load_frames(transform_frames(raw_file, config), config)
+
+# Fetch raw files only, leaving them unprocessed for transform_only or run_incremental
+
+
+def extract_only(config):
+    with tracked_run(config):
+        logger.info('Starting extraction of data from API')
+        with metrics.timer('etl_stage_seconds', stage='extract'):
+            saved_files = extract(replace(config.Extract, stream=False))
+        metrics.inc('etl_stage_rows_total',
+                    sum(len(files) for files in saved_files.values()), stage='extract')
+        logger.info('Extraction of data from API finished')
+
+        if config.Extract.manifest_path:
+            manifest = RawManifest(config.Extract.manifest_path)
+            for city, files in saved_files.items():
+                manifest.register(files, city=city)
+    return saved_files
+
+# Transform unprocessed raw files and stage the frames for load_only
+
+
+def transform_only(config):
+    if not config.Extract.manifest_path:
+        raise ValueError('Transform-only mode needs RAW_MANIFEST to be set.')
+
+    from src.storage import stage_frames
+
+    with tracked_run(config):
+        manifest = RawManifest(config.Extract.manifest_path)
+        manifest.scan(config.Extract.raw_path)
+        raw_file = manifest.pending()
+        if not raw_file:
+            logger.info('No unprocessed raw files found')
+            return None
+
+        frames = transform_frames(raw_file, config)
+        run_dir = stage_frames(frames, config.Storage)
+        manifest.mark_processed(
+            path for files in raw_file.values() for path in files)
+    return run_dir
+
+# Load every staged transform run, oldest first, removing each once committed
+
+
+def load_only(config):
+    from src.storage import read_staged, remove_staged, staged_runs
+
+    with tracked_run(config):
+        runs = staged_runs(config.Storage)
+        if not runs:
+            logger.info('No staged data to load')
+        for run_dir in runs:
+            logger.info(f'Loading staged data from {run_dir}')
+            load_frames(read_staged(run_dir), config)
+            remove_staged(run_dir)
+    return len(runs)
+
+
+# Queue the configured cities as batches for extraction workers, returning the job ids
+
+
+def enqueue_cities(config):
+    queue = create_work_queue(config.Pipeline)
+    return queue.enqueue(config.Extract.cities, config.Pipeline.queue_batch_size)
+
+# Claim city batches from the work queue and extract them until none are left.
+# With wait, keep polling while other workers hold leases that may expire.
+# Cities that fail inside a batch are scheduled for retry in the checkpoint,
+# or without one, the whole batch is failed so the queue retries it.
+
+
+def run_worker(config, worker=None, wait=False, poll_seconds=5):
+    queue = create_work_queue(config.Pipeline)
+    worker = worker or f'{socket.gethostname()}-{os.getpid()}'
+    if not config.Extract.rate_limit_state:
+        logger.warning(
+            'RATE_LIMIT_STATE is not set, this worker does not share its rate limit budget')
+    manifest = RawManifest(
+        config.Extract.manifest_path) if config.Extract.manifest_path else None
+    limiter = create_rate_limiter(config.Extract)
+    checkpoint = create_checkpoint(config.Pipeline)
+
+    completed = 0
+    with tracked_run(config), create_session(config.Extract) as session:
+        while True:
+            job = queue.claim(worker)
+            if job is None:
+                if wait and not queue.drained():
+                    time.sleep(poll_seconds)
+                    continue
+                break
+
+            job_id, cities = job
+            logger.info(f'Worker {worker} extracting job {job_id} ({len(cities)} cities)')
+            failures = []
+            try:
+                with queue.lease(job_id, worker):
+                    with metrics.timer('etl_stage_seconds', stage='extract'):
+                        saved_files = extract(
+                            replace(config.Extract, cities=cities, stream=False),
+                            session=session, limiter=limiter, failures=failures)
+                    if manifest is not None:
+                        for city, files in saved_files.items():
+                            manifest.register(files, city=city)
+            except Exception as e:
+                logger.exception(f'Job {job_id} failed: {e}')
+                queue.fail(job_id, worker, e)
+                continue
+
+            if failures and checkpoint is None:
+                logger.warning(
+                    f'Job {job_id} had {len(failures)} failed fetches, returning it to the queue')
+                queue.fail(job_id, worker, '; '.join(
+                    f'{city} {data_type}: {error}' for city, data_type, error in failures))
+                continue
+            if failures:
+                logger.warning(
+                    f'Job {job_id} had {len(failures)} failed fetches, scheduled for retry')
+                checkpoint.record_failures(failures)
+            queue.complete(job_id, worker)
+            completed += 1
+
+    logger.info(f'Worker {worker} finished {completed} jobs')
+    return completed
+
+# Extract on several local worker processes, then load everything once
+
+
+def run_distributed(config, workers):
+    if not config.Extract.manifest_path:
+        raise ValueError('Distributed mode needs RAW_MANIFEST to be set.')
+    if not config.Extract.rate_limit_state:
+        config = replace(config, Extract=replace(
+            config.Extract,
+            rate_limit_state=os.path.join(config.Extract.raw_path, 'rate_limit.sqlite')))
+
+    job_ids = enqueue_cities(config)
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(config,),
+                                kwargs={'wait': True}, name=f'extract-worker-{i}')
+        for i in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    # Only this run's jobs: the queue file keeps the jobs of earlier runs
+    status = create_work_queue(config.Pipeline).status(job_ids)
+    if status['failed']:
+        logger.error(f'{status["failed"]} city batches failed to extract')
+    run_incremental(config)
+    return status
+
+
+def create_work_queue(pipeline):
+    if not pipeline.queue_path:
+        raise ValueError('Distributed extraction needs WORK_QUEUE to be set.')
+    return WorkQueue(pipeline.queue_path, lease_seconds=pipeline.lease_seconds)
+
+
+def transform_frames(raw_file, config):
+    from src.transform import run_transform
+
+    logger.info('Starting transformation of extracted data')
+    with metrics.timer('etl_stage_seconds', stage='transform'):
+        air_pollution_df, current_weather_df, forecast_weather_df = run_transform(
+            raw_file, config.Transform)
+    logger.info('Transformation of extracted data finished')
+
+    air_pollution_df.name = "air_pollution"
+    current_weather_df.name = "current_weather"
+    forecast_weather_df.name = "forecast_weather"
+    frames = [air_pollution_df, current_weather_df, forecast_weather_df]
+    metrics.inc('etl_stage_rows_total', sum(len(df) for df in frames),
+                stage='transform')
+    return frames
+
+# Load transformed frames, then copy them to processed Parquet storage. Parquet
+# is only written once the load has committed, so a failed load that is
+# retried does not leave the same rows in the processed layer twice.
+
+
+def load_frames(frames, config):
+    from src.load import get_engine, load_all
+    from src.storage import write_processed
+
+    engine = get_engine(config.Load)
+    frames = list(frames)
+    tables = list(frames)
+    if config.Transform is not None and config.Transform.aggregate_hours:
+        tables.append(enrich_frames(frames, config, engine))
+
+    logger.info('Starting loading of transformed data into database')
+    with metrics.timer('etl_stage_seconds', stage='load'):
+        rows = load_all(tables, config.Load, engine=engine)
+    metrics.inc('etl_stage_rows_total', rows, stage='load')
+    logger.info('Loading of transformed data into database finished')
+
+    if config.Storage is not None and config.Storage.write_parquet:
+        logger.info('Writing transformed data to processed Parquet storage')
+        with metrics.timer('etl_stage_seconds', stage='storage'):
+            write_processed(frames, config.Storage)
+
+
+# Build the rolling air quality aggregates of the air pollution frame
+
+
+def enrich_frames(frames, config, engine):
+    from src.enrich import build_aggregates
+
+    air_pollution_df = next(df for df in frames if df.name == 'air_pollution')
+    with metrics.timer('etl_stage_seconds', stage='enrich'):
+        aggregates_df = build_aggregates(
+            air_pollution_df, engine, config.Transform.aggregate_hours)
+    metrics.inc('etl_stage_rows_total', len(aggregates_df), stage='enrich')
+    return aggregates_df
+
+
+# Reset the metrics for a run, then log and export them when it ends
+
+
+@contextmanager
+def tracked_run(config):
+    metrics.reset()
+    try:
+        with metrics.timer('etl_run_seconds'):
+            yield
+    finally:
+        log_metrics()
+        export_metrics(config)
+
+
+def log_metrics():
+    summary = metrics.to_dict()
+    for timing in summary['timings'].get('etl_stage_seconds', []):
+        stage = timing['labels']['stage']
+        rate = summary['rows_per_second'].get(stage)
+        rate = f' ({rate} rows/s)' if rate is not None else ''
+        logger.info(f'Stage {stage} took {timing["sum"]:.2f} seconds{rate}')
+
+
+def export_metrics(config):
+    pipeline = config.Pipeline
+    if pipeline is None:
+        return
+    try:
+        if pipeline.metrics_json:
+            metrics.write_json(pipeline.metrics_json)
+        if pipeline.metrics_textfile:
+            metrics.write_prometheus(pipeline.metrics_textfile)
+    except OSError as e:
+        logger.error(f'Failed to export run metrics: {e}')
@@ -0,0 +1,88 @@
+"""
+Scheduler Module
+
+Long-running daemon mode for the ETL pipeline. Each endpoint is refreshed
+on its own interval, matching how often OpenWeatherMap updates it (current
+weather every few minutes, forecasts every 3 hours), so a cycle only fetches
+the endpoints whose data can have changed. The HTTP session, rate limiter
+and database engine stay warm between cycles.
+
+Usage:
+    from src.scheduler import Scheduler
+
+    Scheduler(config).run()
+"""
+
+import logging
+import signal
+import threading
+import time
+from dataclasses import replace
+
+from src.extract import create_rate_limiter, create_session
+from src.load import dispose_engines
+from src.pipeline import run_full
+from src.utils.payload import DATA_TYPES
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    def __init__(self, config, clock=time.monotonic):
+        self.config = config
+        self.clock = clock
+        self.intervals = {data_type: config.Pipeline.intervals[data_type] * 60
+                          for data_type in DATA_TYPES}
+        self.next_due = {data_type: 0.0 for data_type in DATA_TYPES}
+        self.stop_event = threading.Event()
+
+    # Endpoints whose refresh interval has elapsed
+
+    def due(self, now):
+        return [data_type for data_type in DATA_TYPES
+                if now >= self.next_due[data_type]]
+
+    # Run one cycle for the due endpoints and return the seconds until the next one
+
+    def run_once(self, session=None, limiter=None):
+        now = self.clock()
+        due = self.due(now)
+        if due:
+            logger.info(f'Refreshing {", ".join(due)}')
+            extract_config = replace(self.config.Extract, data_types=due)
+            try:
+                run_full(replace(self.config, Extract=extract_config),
+                         session=session, limiter=limiter)
+            except Exception:
+                logger.exception(f'Scheduled refresh of {", ".join(due)} failed')
+            for data_type in due:
+                self.next_due[data_type] = now + self.intervals[data_type]
+
+        return max(0.0, min(self.next_due.values()) - self.clock())
+
+    def run(self):
+        self._install_signal_handlers()
+        limiter = create_rate_limiter(self.config.Extract)
+        logger.info(
+            'Starting scheduler with intervals (minutes): ' +
+            ', '.join(f'{k}={v / 60:g}' for k, v in self.intervals.items()))
+
+        with create_session(self.config.Extract) as session:
+            try:
+                while not self.stop_event.is_set():
+                    wait = self.run_once(session, limiter)
+                    logger.debug(f'Next refresh in {wait:.0f} seconds')
+                    self.stop_event.wait(wait)
+            except KeyboardInterrupt:
+                logger.info('Scheduler interrupted')
+            finally:
+                dispose_engines()
+        logger.info('Scheduler stopped')
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _install_signal_handlers(self):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
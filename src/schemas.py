@@ -0,0 +1,167 @@
+"""
+Payload Schemas Module
+
+Typed record schemas for the three OpenWeatherMap responses. Each decoder
+reads only the fields the weather tables need (see sql/ddl_script.sql)
+straight from the payload into __slots__ dataclasses, instead of
+flattening the whole response and discarding most of its columns.
+
+Fields are read from the nested API layout (data['main']['temp']) or from
+already flattened keys (data['main_temp']); missing fields decode as None.
+
+Usage:
+    from src.schemas import decode_current_weather, TypedColumns, CurrentWeather
+
+    columns = TypedColumns(CurrentWeather)
+    columns.extend(decode_current_weather(data))
+    df = columns.to_frame()
+"""
+
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(slots=True)
+class AirPollution:
+    dt: int
+    main_aqi: int
+    components_co: float
+    components_no: float
+    components_no2: float
+    components_o3: float
+    components_so2: float
+    components_pm2_5: float
+    components_pm10: float
+    components_nh3: float
+    coord_lon: float
+    coord_lat: float
+
+
+@dataclass(slots=True)
+class CurrentWeather:
+    main_temp: float
+    main_feels_like: float
+    main_temp_max: float
+    main_temp_min: float
+    main_humidity: int
+    main_pressure: int
+    dt: int
+    coord_lat: float
+    coord_lon: float
+
+
+@dataclass(slots=True)
+class ForecastWeather:
+    main_temp: float
+    main_feels_like: float
+    main_temp_max: float
+    main_temp_min: float
+    main_humidity: int
+    main_pressure: int
+    dt: int
+    coord_lat: float
+    coord_lon: float
+
+
+COMPONENTS = ('co', 'no', 'no2', 'o3', 'so2', 'pm2_5', 'pm10', 'nh3')
+
+# Read data[group][key], falling back to the flattened data['group_key']
+
+
+def _get(data, group, key):
+    nested = data.get(group)
+    if isinstance(nested, dict) and key in nested:
+        return nested[key]
+    return data.get(f'{group}_{key}')
+
+
+def _main_fields(item):
+    main = item.get('main')
+    if not isinstance(main, dict):
+        main = {}
+    return (
+        main.get('temp', item.get('main_temp')),
+        main.get('feels_like', item.get('main_feels_like')),
+        main.get('temp_max', item.get('main_temp_max')),
+        main.get('temp_min', item.get('main_temp_min')),
+        main.get('humidity', item.get('main_humidity')),
+        main.get('pressure', item.get('main_pressure')),
+    )
+
+# Decode an air pollution payload into one record per list entry
+
+
+def decode_air_pollution(data):
+    coord = data['coord']
+    lon, lat = coord.get('lon'), coord.get('lat')
+    records = []
+    for item in data['list']:
+        components = item.get('components')
+        if not isinstance(components, dict):
+            components = {}
+        records.append(AirPollution(
+            item.get('dt'),
+            _get(item, 'main', 'aqi'),
+            *(components.get(c, item.get(f'components_{c}')) for c in COMPONENTS),
+            lon,
+            lat
+        ))
+    return records
+
+# Decode a current weather payload into a single record
+
+
+def decode_current_weather(data):
+    return [CurrentWeather(
+        *_main_fields(data),
+        data.get('dt'),
+        _get(data, 'coord', 'lat'),
+        _get(data, 'coord', 'lon')
+    )]
+
+# Decode a forecast payload into one record per forecast step
+
+
+def decode_forecast_weather(data):
+    coord = data['city']['coord']
+    lat, lon = coord['lat'], coord['lon']
+    return [ForecastWeather(*_main_fields(item), item.get('dt'), lat, lon)
+            for item in data['list']]
+
+
+DECODERS = {
+    'air_pollution': (AirPollution, decode_air_pollution),
+    'current_weather': (CurrentWeather, decode_current_weather),
+    'forecast_weather': (ForecastWeather, decode_forecast_weather),
+}
+
+
+class TypedColumns:
+    """Per-field column buffers for one record schema."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.names = [f.name for f in fields(schema)]
+        self.types = [f.type for f in fields(schema)]
+        self.columns = {name: [] for name in self.names}
+        self.length = 0
+
+    def extend(self, records):
+        for name, column in self.columns.items():
+            column.extend(getattr(record, name) for record in records)
+        self.length += len(records)
+
+    # Build a frame whose float fields are float64 and int fields int64,
+    # or float64 when the field has missing values
+
+    def to_frame(self):
+        data = {}
+        for name, kind in zip(self.names, self.types):
+            values = self.columns[name]
+            if kind is int and None not in values:
+                data[name] = np.array(values, dtype=np.int64)
+            else:
+                data[name] = np.array(values, dtype=np.float64)
+        return pd.DataFrame(data)
@@ -0,0 +1,234 @@
+"""
+Columnar Storage Module
+
+Writes the processed and raw data layers as partitioned Parquet datasets so
+that reprocessing and analytics only read the columns and partitions they
+need.
+
+- Processed layer: the transformed air_pollution, current_weather and
+  forecast_weather frames under PROCESSED_DIR/<table>/date=.../city=.../,
+  in files named after their content so rewriting a frame is idempotent
+- Raw layer: raw JSON files compacted into one flattened Parquet dataset per
+  data type under PROCESSED_DIR/raw_<data_type>/date=.../
+- Staging area: transformed frames of a `main.py transform` run waiting for
+  `main.py load`, one directory per run under PROCESSED_DIR/_staging/
+
+Requires pyarrow.
+
+Usage:
+    from src.storage import write_processed, read_processed, compact_raw
+
+    write_processed([air_pollution_df, current_weather_df, forecast_weather_df], config)
+    read_processed('current_weather', config, columns=['city', 'main_temp'],
+                   filters=[('city', '=', 'Athens')])
+
+    python -m src.storage compact data/raw data/processed
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from src.transform import json_open
+from src.utils.payload import parse_raw_path
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLS = ['date', 'city']
+STAGING_DIR = '_staging'
+TABLES = ['air_pollution', 'current_weather', 'forecast_weather']
+
+# Write transformed frames as Parquet partitioned by date and city
+
+
+def write_processed(dfs, config):
+    for df in dfs:
+        if df.empty:
+            continue
+        path = Path(config.processed_path) / df.name
+        partitioned = df.assign(date=df['dt'].dt.strftime('%Y-%m-%d'))
+        partitioned.to_parquet(
+            path, partition_cols=PARTITION_COLS, index=False,
+            basename_template=f'part-{frame_digest(df)}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore')
+        logger.info(f'Wrote {len(df)} {df.name} rows to {path}')
+
+# Content hash of a frame, used to name its Parquet files so that writing the
+# same rows again replaces the files instead of adding duplicates
+
+
+def frame_digest(df):
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:16]
+
+# Read a processed table, optionally selecting columns and partitions
+
+
+def read_processed(table, config, columns=None, filters=None):
+    path = Path(config.processed_path) / table
+    df = pd.read_parquet(path, columns=columns, filters=filters)
+    for col in PARTITION_COLS:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
+    return df
+
+# Stage transformed frames for a later load, one directory per run
+
+
+def stage_frames(dfs, config):
+    run_dir = Path(config.processed_path) / STAGING_DIR / \
+        datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    tmp_dir = run_dir.with_name(run_dir.name + '.tmp')
+    tmp_dir.mkdir(parents=True)
+    for df in dfs:
+        if not df.empty:
+            df.to_parquet(tmp_dir / f'{df.name}.parquet', index=False)
+    tmp_dir.rename(run_dir)
+    logger.info(f'Staged transformed data for loading at {run_dir}')
+    return run_dir
+
+# Staged run directories, oldest first
+
+
+def staged_runs(config):
+    staging = Path(config.processed_path) / STAGING_DIR
+    if not staging.is_dir():
+        return []
+    return sorted(path for path in staging.iterdir()
+                  if path.is_dir() and not path.name.endswith('.tmp'))
+
+# Read the frames of a staged run, named after their tables
+
+
+def read_staged(run_dir):
+    dfs = []
+    for table in TABLES:
+        path = Path(run_dir) / f'{table}.parquet'
+        df = pd.read_parquet(path) if path.exists() else pd.DataFrame()
+        df.name = table
+        dfs.append(df)
+    return dfs
+
+
+def remove_staged(run_dir):
+    shutil.rmtree(run_dir)
+
+# Compact raw JSON files into flattened Parquet datasets per data type
+
+
+def compact_raw(raw_path, processed_path, remove=False):
+    buffers = {}
+    compacted = []
+    for file in sorted(Path(raw_path).glob('raw_*.json*')):
+        parsed = parse_raw_path(file)
+        if parsed is None:
+            continue
+        data_type, city, fetched_at = parsed
+        data = json_open(file)
+        if data is None:
+            continue
+
+        buffer = buffers.setdefault(data_type, ColumnBuffer())
+        for record in raw_records(data_type, data):
+            record.update(city=city, fetched_at=fetched_at, source=file.name,
+                          date=fetched_at.strftime('%Y-%m-%d'))
+            buffer.append(record)
+        compacted.append(file)
+
+    for data_type, buffer in buffers.items():
+        path = Path(processed_path) / f'raw_{data_type}'
+        buffer.to_frame().to_parquet(
+            path, partition_cols=['date'], index=False)
+        logger.info(
+            f'Compacted {buffer.length} raw {data_type} records into {path}')
+
+    if remove:
+        for file in compacted:
+            os.remove(file)
+    return compacted
+
+# Flatten a raw payload into one record per row, with lists stored as JSON
+
+
+def raw_records(data_type, data):
+    if data_type == 'current_weather':
+        items, shared = [data], {}
+    elif data_type == 'air_pollution':
+        items = data.get('list', [])
+        shared = {'coord_' + k: v for k, v in data.get('coord', {}).items()}
+    else:
+        items = data.get('list', [])
+        shared = flatten_record(data.get('city', {}), 'city_')
+
+    records = []
+    for item in items:
+        record = flatten_record(item)
+        record.update(shared)
+        records.append({k: json.dumps(v) if isinstance(v, list) else v
+                        for k, v in record.items()})
+    return records
+
+# Flatten nested dicts into "_" separated keys, in json_normalize column order
+
+
+def flatten_record(record, prefix=''):
+    flat = {}
+    nested = {}
+    for key, value in record.items():
+        key = f'{prefix}{key}'
+        if isinstance(value, dict):
+            nested.update(flatten_record(value, key + '_'))
+        elif prefix:
+            nested[key] = value
+        else:
+            flat[key] = value
+    flat.update(nested)
+    return flat
+
+
+class ColumnBuffer:
+    """Accumulates records as per-column lists, keeping first-seen order."""
+
+    def __init__(self):
+        self.columns = {}
+        self.length = 0
+
+    def append(self, record):
+        for key, value in record.items():
+            column = self.columns.get(key)
+            if column is None:
+                column = self.columns[key] = [None] * self.length
+            column.append(value)
+        self.length += 1
+        if len(record) < len(self.columns):
+            for column in self.columns.values():
+                if len(column) < self.length:
+                    column.append(None)
+
+    def to_frame(self):
+        return pd.DataFrame(self.columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compact raw JSON files into Parquet.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    compact = sub.add_parser('compact')
+    compact.add_argument('raw_path')
+    compact.add_argument('processed_path')
+    compact.add_argument('--remove', action='store_true',
+                         help='Delete the JSON files once compacted')
+    args = parser.parse_args(argv)
+
+    compact_raw(args.raw_path, args.processed_path, remove=args.remove)
+
+
+if __name__ == '__main__':
+    main()
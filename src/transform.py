@@ -2,151 +2,207 @@
 Transform Module
 
 Functions to convert raw JSON data into structured pandas DataFrames.
+Raw items may be JSON file paths or in-memory Payload objects produced by
+extraction in streaming mode.
+
+Payloads are decoded with the typed schemas in src.schemas, which read only
+the fields the weather tables need. transform() builds a frame per file;
+transform_batch() gathers the records of every file into typed column
+buffers first and builds each output DataFrame once, which is much faster
+for thousands of cities.
+AQI descriptions are built as a categorical in one vectorized pass, with
+values outside 1-5 described as Unknown.
+transform_parallel() shards the cities across a process pool and runs either
+of them per shard, producing exactly the same frames as a serial run.
 
 Usage:
     from src import transform
 """
 import pandas as pd
-import json
+import numpy as np
 import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from src.schemas import DECODERS, TypedColumns
+from src.utils.payload import DATA_TYPES, Payload
+from src.utils.serializer import DECODE_ERRORS, read_json
 
 logger = logging.getLogger(__name__)
 
 aqi_map = {1: "Good", 2: "Fair", 3: "Moderate", 4: "Poor", 5: "Very Poor"}
+AQI_LABELS = [*aqi_map.values(), "Unknown"]
 
 
 def transform(raw_file):
-    all_air_pollution = []
-    all_current_weather = []
-    all_forecast_weather = []
+    all_frames = {data_type: [] for data_type in DATA_TYPES}
     for city, files in raw_file.items():
         for file in files:
-            if 'air_pollution' in str(file):
-                logger.info(
-                    f"Processing air pollution data for {city} from {file}")
-                data = json_open(file)
-                if data is None:
-                    continue
-                try:
-                    air_pollution_df = pd.json_normalize(
-                        data, record_path="list", meta=["coord"], sep="_")
-                except KeyError as e:
-                    logger.error(
-                        f"Missing expected field in air pollution JSON for {city}: {e}")
-                    continue
-
-                air_pollution_df['main_aqi_desc'] = air_pollution_df['main_aqi'].map(
-                    aqi_map)
-
-                coord_df = pd.json_normalize(air_pollution_df['coord'])
-                coord_df.columns = ['coord_' + c for c in coord_df.columns]
-                air_pollution_df = pd.concat(
-                    [air_pollution_df.drop(columns='coord'), coord_df], axis=1)
-
-                air_pollution_df['city'] = city
-                air_pollution_df['dt'] = pd.to_datetime(
-                    air_pollution_df['dt'], unit='s')
-                drop_dupes_and_fill(air_pollution_df, ['city', 'dt'], {
-                    'main_aqi': -1,
-                    'dt': pd.Timestamp("1970-01-01")
-                })
-                mask = air_pollution_df['main_aqi'].between(1, 5)
-                air_pollution_df.loc[mask == False,
-                                     'main_aqi_desc'] = 'Unknown'
-                logger.info(
-                    f"Finished processing air pollution data for {city} from {file}")
-                all_air_pollution.append(air_pollution_df)
-
-            elif 'current_weather' in str(file):
-                logger.info(
-                    f"Processing current weather data for {city} from {file}")
-                data = json_open(file)
-                if data is None:
-                    continue
-
-                try:
-                    df = pd.json_normalize(data, meta=["coord"], sep="_")
-                except KeyError as e:
-                    logger.error(
-                        f"Missing expected field in current weather JSON for {city}: {e}")
-                    continue
-
-                columns_to_keep = [
-                    "main_temp",
-                    "main_feels_like",
-                    "main_temp_max",
-                    "main_temp_min",
-                    "main_humidity",
-                    "main_pressure",
-                    "dt",
-                    "coord_lat",
-                    "coord_lon"
-                ]
-
-                current_weather_df = df[columns_to_keep].copy()
-                current_weather_df['city'] = city
-
-                current_weather_df['dt'] = pd.to_datetime(
-                    current_weather_df['dt'], unit='s')
-                drop_dupes_and_fill(current_weather_df, ['city', 'dt'], {
-                    'dt': pd.Timestamp("1970-01-01")
-                })
-                logger.info(
-                    f"Finished processing current weather data for {city} from {file}")
-                all_current_weather.append(current_weather_df)
-
-            elif 'forecast_weather' in str(file):
-                logger.info(
-                    f"Processing forecast weather data for {city} from {file}")
-                data = json_open(file)
-                if data is None:
-                    continue
-
-                try:
-                    df = pd.json_normalize(
-                        data, record_path='list', meta=['city'], sep='_')
-                except KeyError as e:
-                    logger.error(
-                        f"Missing expected field in forecast weather JSON for {city}: {e}")
-                    continue
-
-                df['dt'] = pd.to_datetime(df['dt'], unit='s')
-
-                coord_df = pd.json_normalize(df['city'], sep='_')
-
-                columns_to_keep = [
-                    "main_temp",
-                    "main_feels_like",
-                    "main_temp_max",
-                    "main_temp_min",
-                    "main_humidity",
-                    "main_pressure",
-                    "dt"
-                ]
-
-                forecast_weather_df = df[columns_to_keep].copy()
-                forecast_weather_df['coord_lat'] = coord_df['coord_lat']
-                forecast_weather_df['coord_lon'] = coord_df['coord_lon']
-                forecast_weather_df['city'] = city
-
-                forecast_weather_df['dt'] = pd.to_datetime(
-                    forecast_weather_df['dt'], unit='s')
-                drop_dupes_and_fill(forecast_weather_df, ['city', 'dt'], {
-                    'dt': pd.Timestamp("1970-01-01")})
-                logger.info(
-                    f"Finished processing forecast weather data for {city} from {file}")
-                all_forecast_weather.append(forecast_weather_df)
-
-    air_pollution_df = pd.concat(
-        all_air_pollution, ignore_index=True) if all_air_pollution else pd.DataFrame()
-    current_weather_df = pd.concat(
-        all_current_weather, ignore_index=True) if all_current_weather else pd.DataFrame()
-    forecast_weather_df = pd.concat(
-        all_forecast_weather, ignore_index=True) if all_forecast_weather else pd.DataFrame()
+            data_type = raw_data_type(file)
+            if data_type is None:
+                continue
+            label = data_type.replace('_', ' ')
+            logger.info('Processing %s data for %s from %s', label, city, file)
+            data = raw_data(file)
+            if data is None:
+                continue
+
+            records = decode_records(data_type, data, city)
+            if not records:
+                continue
+            columns = TypedColumns(DECODERS[data_type][0])
+            columns.extend(records)
+
+            df = finish_frame(data_type, columns.to_frame(),
+                              [city] * columns.length)
+            logger.info(
+                'Finished processing %s data for %s from %s', label, city, file)
+            all_frames[data_type].append(df)
+
+    air_pollution_df, current_weather_df, forecast_weather_df = (
+        pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        for frames in all_frames.values())
 
     return air_pollution_df, current_weather_df, forecast_weather_df
 
 
+# Run the transform selected by the transform configuration
+
+
+def run_transform(raw_file, config):
+    transform_func = transform_batch if config.mode == 'batch' else transform
+    if config.workers > 1:
+        return transform_parallel(raw_file, config.workers, transform_func)
+    return transform_func(raw_file)
+
+# Transform contiguous shards of cities on a process pool and merge in order
+
+
+def transform_parallel(raw_file, workers, transform_func=transform,
+                       shards_per_worker=4):
+    cities = list(raw_file)
+    if workers <= 1 or len(cities) < 2:
+        return transform_func(raw_file)
+
+    shard_size = math.ceil(len(cities) / (workers * shards_per_worker))
+    shards = [{city: raw_file[city] for city in cities[i:i + shard_size]}
+              for i in range(0, len(cities), shard_size)]
+    logger.info(
+        f"Transforming {len(cities)} cities in {len(shards)} shards on {workers} processes")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(transform_func, shards))
+
+    merged = []
+    for frames in zip(*results):
+        frames = [df for df in frames if not df.empty]
+        merged.append(pd.concat(frames, ignore_index=True)
+                      if frames else pd.DataFrame())
+    return tuple(merged)
+
+# Transform all raw items at once from typed column buffers
+
+
+def transform_batch(raw_file):
+    buffers = {data_type: TypedColumns(DECODERS[data_type][0])
+               for data_type in DATA_TYPES}
+    keys = {data_type: {'city': [], 'source': []} for data_type in DATA_TYPES}
+
+    source = 0
+    for city, files in raw_file.items():
+        for file in files:
+            source += 1
+            data_type = raw_data_type(file)
+            if data_type is None:
+                continue
+            logger.debug('Collecting %s data for %s from %s', data_type, city, file)
+            data = raw_data(file)
+            if data is None:
+                continue
+
+            records = decode_records(data_type, data, city)
+            if not records:
+                continue
+            buffers[data_type].extend(records)
+            keys[data_type]['city'].extend([city] * len(records))
+            keys[data_type]['source'].extend([source] * len(records))
+
+    logger.info(
+        "Building batch frames from " + ", ".join(
+            f"{buffer.length} {data_type} records" for data_type, buffer in buffers.items()))
+
+    air_pollution_df, current_weather_df, forecast_weather_df = (
+        finish_frame(data_type, buffers[data_type].to_frame(),
+                     keys[data_type]['city'], keys[data_type]['source'])
+        if buffers[data_type].length else pd.DataFrame()
+        for data_type in DATA_TYPES)
+
+    return air_pollution_df, current_weather_df, forecast_weather_df
+
+# Decode the records of one payload, logging and skipping malformed payloads
+
+
+def decode_records(data_type, data, city):
+    try:
+        return DECODERS[data_type][1](data)
+    except (KeyError, TypeError, AttributeError) as e:
+        logger.error(
+            f"Missing expected field in {data_type.replace('_', ' ')} JSON for {city}: {e}")
+        return None
+
+# Add city, convert dt, de-duplicate and fill a decoded frame. Duplicates are
+# only dropped within one source file, as each file is processed separately.
+
+
+def finish_frame(data_type, df, cities, sources=None):
+    df['city'] = cities
+    df['dt'] = pd.to_datetime(df['dt'], unit='s')
+    fill_values = {'dt': pd.Timestamp("1970-01-01")}
+
+    if data_type == 'air_pollution':
+        df.insert(df.columns.get_loc('coord_lon'), 'main_aqi_desc',
+                  aqi_description(df['main_aqi']))
+        fill_values['main_aqi'] = -1
+
+    subset = ['city', 'dt']
+    if sources is not None:
+        df['_source'] = sources
+        subset = ['_source'] + subset
+    drop_dupes_and_fill(df, subset, fill_values)
+
+    if sources is not None:
+        df = df.drop(columns='_source')
+    return df.reset_index(drop=True)
+
+# Describe AQI values 1-5 as a categorical, with anything else (including
+# missing values) as Unknown, in one vectorized pass
+
+
+def aqi_description(aqi):
+    values = pd.to_numeric(aqi, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    valid = (values >= 1) & (values <= 5)
+    codes = np.where(valid, np.nan_to_num(values) - 1, len(AQI_LABELS) - 1).astype('int8')
+    return pd.Categorical.from_codes(codes, categories=AQI_LABELS)
+
+# Work out which endpoint a raw item came from
+
+
+def raw_data_type(file):
+    if isinstance(file, Payload):
+        return file.data_type
+    for data_type in DATA_TYPES:
+        if data_type in str(file):
+            return data_type
+    return None
+
+# Return the parsed payload of a raw item, reading it from disk if needed
+
+
+def raw_data(file):
+    if isinstance(file, Payload):
+        return file.data
+    return json_open(file)
+
+
 def drop_dupes_and_fill(df, subset, fill_values=None):
     df.drop_duplicates(subset=subset, inplace=True)
     if fill_values:
@@ -156,12 +212,11 @@ def drop_dupes_and_fill(df, subset, fill_values=None):
 
 def json_open(file):
     try:
-        with open(file) as f:
-            return json.load(f)
+        return read_json(file)
     except FileNotFoundError:
         logger.error(f"Missing file: {file}")
         return None
-    except json.JSONDecodeError:
+    except DECODE_ERRORS:
         logger.error(f"Corrupted JSON in: {file}")
         return None
     except Exception as e:
@@ -0,0 +1,50 @@
+"""
+Raw Archiver Module
+
+Writes raw API responses to disk on a background thread so that archival
+stays off the extraction critical path in streaming mode.
+
+Usage:
+    from src.utils.archiver import RawArchiver
+
+    with RawArchiver(save_file) as archiver:
+        archiver.submit(file_path, data)
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class RawArchiver:
+    def __init__(self, writer, max_workers=1):
+        self.writer = writer
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='raw-archiver')
+        self._futures = []
+
+    def submit(self, file_path, data):
+        self._futures.append(
+            self._executor.submit(self._write, file_path, data))
+
+    # Wait for pending writes and return the paths that were written
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        return [f.result() for f in self._futures if f.result() is not None]
+
+    def _write(self, file_path, data):
+        try:
+            self.writer(file_path, data)
+            logger.debug('Archived raw data at %s', file_path)
+            return file_path
+        except OSError as e:
+            logger.error(f'Failed to archive raw data at {file_path}: {e}')
+            return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,136 @@
+"""
+Change Tracker Module
+
+Remembers the last seen timestamp (dt) and content checksum of every
+(city, data_type) payload in a small SQLite file, so extract() can drop
+responses that have not changed since the previous fetch before they are
+written to disk, transformed and loaded again as duplicate rows.
+
+The known state is read once when the tracker is created and new state is
+written back in one transaction by flush(), which callers run after the
+fetched data has been loaded, so a failed run fetches the same data again.
+
+Usage:
+    from src.utils.change_tracker import ChangeTracker
+
+    tracker = ChangeTracker('data/raw/changes.sqlite')
+    if tracker.observe('Athens', 'current_weather', data):
+        ...  # new data, save and transform it
+    tracker.flush()
+
+    # Forget one city or everything from the command line
+    python -m src.utils.change_tracker data/raw/changes.sqlite --clear Athens
+"""
+
+import argparse
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import closing
+from datetime import datetime
+
+from src.utils.serializer import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeTracker:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.skipped = Counter()
+        self.changed = Counter()
+        self.updates = {}
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS last_seen ('
+                'city TEXT, data_type TEXT, dt INTEGER, checksum TEXT, '
+                'seen_at TEXT, PRIMARY KEY (city, data_type))')
+            self.seen = {
+                (city, data_type): (dt, checksum) for city, data_type, dt, checksum
+                in conn.execute('SELECT city, data_type, dt, checksum FROM last_seen')}
+
+    # Return True and remember the payload when it differs from the last one seen
+
+    def observe(self, city, data_type, data):
+        key = (self._key(city), data_type)
+        state = (payload_dt(data_type, data), payload_checksum(data))
+        with self.lock:
+            if self.seen.get(key) == state:
+                self.skipped[data_type] += 1
+                return False
+            self.seen[key] = state
+            self.updates[key] = state
+            self.changed[data_type] += 1
+            return True
+
+    # Persist the state observed since the last flush
+
+    def flush(self):
+        with self.lock:
+            updates, self.updates = self.updates, {}
+        if not updates:
+            return 0
+
+        seen_at = datetime.now().isoformat()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO last_seen VALUES (?, ?, ?, ?, ?)',
+                [(city, data_type, dt, checksum, seen_at)
+                 for (city, data_type), (dt, checksum) in updates.items()])
+        return len(updates)
+
+    # Drop one city, or every city when none is given
+
+    def invalidate(self, city=None):
+        with closing(self._connect()) as conn, conn:
+            if city is None:
+                conn.execute('DELETE FROM last_seen')
+            else:
+                conn.execute('DELETE FROM last_seen WHERE city = ?',
+                             (self._key(city),))
+        with self.lock:
+            self.seen = {key: state for key, state in self.seen.items()
+                         if city is not None and key[0] != self._key(city)}
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _key(city):
+        return city.strip().casefold()
+
+# Timestamp of the newest observation in a payload, or None
+
+
+def payload_dt(data_type, data):
+    if data_type == 'current_weather':
+        return data.get('dt')
+    items = data.get('list') or [{}]
+    return items[0].get('dt')
+
+
+def payload_checksum(data):
+    return hashlib.sha256(dumps(data)).hexdigest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Forget the last seen payloads so they are fetched again.')
+    parser.add_argument('path', help='Path to the change tracker file')
+    parser.add_argument('--clear', nargs='*', metavar='CITY', required=True,
+                        help='Cities to forget; all cities if none given')
+    args = parser.parse_args(argv)
+
+    tracker = ChangeTracker(args.path)
+    if args.clear:
+        for city in args.clear:
+            tracker.invalidate(city)
+    else:
+        tracker.invalidate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Checkpoint Module
+
+Persists the progress of pipeline runs in a small SQLite file so that an
+interrupted run can resume instead of fetching every city again, and keeps a
+retry queue of (city, data_type) fetches that failed.
+
+- items: every (city, data_type) pair of a run and its state: fetched (with
+  the raw file, if one was written), loaded, or failed
+- retries: failed pairs with their attempt count and the time of the next
+  attempt, which backs off exponentially. Pairs that failed max_attempts
+  times stay in the table as dead letters until requeued. Distributed
+  extraction workers add their failed fetches here with record_failures().
+
+A run that did not finish resumes if it started within the resume window
+and was for the same data types: its fetched but unloaded raw files are
+loaded first, and pairs that are already done are not fetched again. Due retries are fetched before the
+configured cities.
+
+Usage:
+    from src.utils.checkpoint import Checkpoint
+
+    checkpoint = Checkpoint('data/raw/checkpoint.sqlite')
+    run_id = checkpoint.begin(resume_minutes=60)
+    work = checkpoint.plan(run_id, cities, data_types)
+    ...
+    checkpoint.record_fetched(run_id, work, saved_files, failures)
+    checkpoint.record_loaded(run_id)
+    checkpoint.finish(run_id)
+
+    # List dead letters, or queue them for another round of retries
+    python -m src.utils.checkpoint data/raw/checkpoint.sqlite --list
+    python -m src.utils.checkpoint data/raw/checkpoint.sqlite --requeue
+"""
+
+import argparse
+import logging
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+
+from src.utils.payload import DATA_TYPES, parse_raw_path
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 6 * 3600
+
+
+class Checkpoint:
+    def __init__(self, path, retry_base_seconds=60, max_attempts=5):
+        self.path = path
+        self.retry_base_seconds = retry_base_seconds
+        self.max_attempts = max_attempts
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS runs ('
+                'run_id TEXT PRIMARY KEY, started_at REAL, finished_at REAL, '
+                'data_types TEXT)')
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(runs)')]
+            if 'data_types' not in columns:
+                conn.execute('ALTER TABLE runs ADD COLUMN data_types TEXT')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS items ('
+                'run_id TEXT, city TEXT, data_type TEXT, state TEXT, path TEXT, '
+                'updated_at REAL, PRIMARY KEY (run_id, city, data_type))')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS retries ('
+                'city TEXT, data_type TEXT, attempts INTEGER, error TEXT, '
+                'next_attempt_at REAL, PRIMARY KEY (city, data_type))')
+
+    # Resume the latest unfinished run for the same data types started within
+    # the window, or start one. Runs for other data types (e.g. another
+    # scheduler endpoint) are left alone for their own next run to resume.
+
+    def begin(self, resume_minutes=60, data_types=DATA_TYPES):
+        key = ','.join(sorted(data_types))
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                'SELECT run_id FROM runs WHERE finished_at IS NULL AND started_at >= ? '
+                'AND data_types IS ? ORDER BY started_at DESC LIMIT 1',
+                (now - resume_minutes * 60, key)).fetchone()
+            if row is not None:
+                logger.info(f'Resuming unfinished run {row[0]}')
+                return row[0]
+            conn.execute(
+                'UPDATE runs SET finished_at = ? WHERE finished_at IS NULL '
+                'AND data_types IS ?', (now, key))
+            run_id = uuid.uuid4().hex
+            conn.execute('INSERT INTO runs VALUES (?, ?, NULL, ?)', (run_id, now, key))
+        return run_id
+
+    def finish(self, run_id):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('UPDATE runs SET finished_at = ? WHERE run_id = ?',
+                         (time.time(), run_id))
+
+    # Data types per city that this run no longer needs to fetch: loaded, or
+    # fetched to a raw file. Failed pairs are fetched again when the run resumes.
+
+    def done(self, run_id):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT city, data_type FROM items WHERE run_id = ? AND "
+                "(state = 'loaded' OR (state = 'fetched' AND path IS NOT NULL))",
+                (run_id,)).fetchall()
+        done = {}
+        for city, data_type in rows:
+            done.setdefault(city, set()).add(data_type)
+        return done
+
+    # Raw files this run fetched but has not loaded yet, as {city: [path, ...]}
+
+    def unloaded(self, run_id):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT city, path FROM items WHERE run_id = ? AND state = 'fetched' "
+                "AND path IS NOT NULL ORDER BY city, data_type", (run_id,)).fetchall()
+        unloaded = {}
+        for city, path in rows:
+            if Path(path).exists():
+                unloaded.setdefault(city, []).append(Path(path))
+        return unloaded
+
+    # Due retries first, then the remaining (city, data_types) work of the run
+
+    def plan(self, run_id, cities, data_types):
+        done = self.done(run_id)
+        work = {}
+        for city, data_type in self.due_retries():
+            if data_type not in done.get(city, ()):
+                work.setdefault(city, set()).add(data_type)
+        for city in cities:
+            needed = {t for t in data_types if t not in done.get(city, ())}
+            if needed:
+                work.setdefault(city, set()).update(needed)
+        return [(city, tuple(t for t in DATA_TYPES if t in types))
+                for city, types in work.items()]
+
+    # Record the outcome of fetching a batch of planned work
+
+    def record_fetched(self, run_id, work, saved_files, failures):
+        now = time.time()
+        failed = {(city, data_type): error for city, data_type, error in failures}
+        paths = {}
+        for city, files in saved_files.items():
+            for item in files:
+                data_type, path = _describe(item)
+                paths[(city, data_type)] = path
+
+        items, succeeded = [], []
+        for city, data_types in work:
+            for data_type in data_types:
+                if (city, data_type) in failed:
+                    items.append((run_id, city, data_type, 'failed', None, now))
+                else:
+                    items.append((run_id, city, data_type, 'fetched',
+                                  paths.get((city, data_type)), now))
+                    succeeded.append((city, data_type))
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?)', items)
+            conn.executemany(
+                'DELETE FROM retries WHERE city = ? AND data_type = ?', succeeded)
+            for (city, data_type), error in failed.items():
+                self._schedule_retry(conn, city, data_type, error, now)
+
+    # Schedule retries for failures that happened outside a checkpointed run,
+    # e.g. in a distributed extraction worker, for a later run to pick up
+
+    def record_failures(self, failures):
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for city, data_type, error in failures:
+                self._schedule_retry(conn, city, data_type, error, now)
+            conn.commit()
+
+    # Everything fetched so far has been loaded
+
+    def record_loaded(self, run_id):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE items SET state = 'loaded', updated_at = ? "
+                "WHERE run_id = ? AND state = 'fetched'", (time.time(), run_id))
+
+    # (city, data_type) pairs whose next retry is due, oldest first
+
+    def due_retries(self, now=None):
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                'SELECT city, data_type FROM retries '
+                'WHERE attempts < ? AND next_attempt_at <= ? ORDER BY next_attempt_at',
+                (self.max_attempts, now if now is not None else time.time())).fetchall()
+
+    def dead_letters(self):
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                'SELECT city, data_type, attempts, error FROM retries '
+                'WHERE attempts >= ? ORDER BY city, data_type',
+                (self.max_attempts,)).fetchall()
+
+    # Give dead letters a fresh set of attempts, due immediately
+
+    def requeue(self):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                'UPDATE retries SET attempts = 0, next_attempt_at = 0 '
+                'WHERE attempts >= ?', (self.max_attempts,)).rowcount
+
+    def _schedule_retry(self, conn, city, data_type, error, now):
+        row = conn.execute(
+            'SELECT attempts FROM retries WHERE city = ? AND data_type = ?',
+            (city, data_type)).fetchone()
+        attempts = (row[0] if row else 0) + 1
+        delay = min(self.retry_base_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+        conn.execute('INSERT OR REPLACE INTO retries VALUES (?, ?, ?, ?, ?)',
+                     (city, data_type, attempts, error, now + delay))
+        if attempts >= self.max_attempts:
+            logger.error(
+                f'Giving up on {data_type} for {city} after {attempts} attempts: {error}')
+        else:
+            logger.warning(
+                f'Fetching {data_type} for {city} failed (attempt {attempts}), '
+                f'retrying in {delay:.0f} seconds: {error}')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+# Data type and raw file path of an extracted item (a path or a Payload)
+
+
+def _describe(item):
+    if hasattr(item, 'data_type'):
+        return item.data_type, str(item.path) if item.path is not None else None
+    parsed = parse_raw_path(item)
+    return (parsed[0] if parsed else None), str(item)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Inspect or requeue fetches that exhausted their retries.')
+    parser.add_argument('path', help='Path to the checkpoint file')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--list', action='store_true', help='List dead letters')
+    group.add_argument('--requeue', action='store_true',
+                       help='Retry dead letters on the next run')
+    parser.add_argument('--max-attempts', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    checkpoint = Checkpoint(args.path, max_attempts=args.max_attempts)
+    if args.list:
+        for city, data_type, attempts, error in checkpoint.dead_letters():
+            print(f'{city}\t{data_type}\t{attempts}\t{error}')
+    else:
+        print(f'Requeued {checkpoint.requeue()} dead letters')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,41 @@ Provides the ExtractionConfig dataclass, which contains:
 - api_key: OpenWeatherMap API key
 - raw_path: Directory path to store raw JSON data
 - units: Units of measurement for API responses (metric, imperial, etc.)
+- max_workers: Number of cities fetched concurrently during extraction
+- calls_per_minute / rate_limit_burst: Token-bucket budget for API requests
+- rate_limit_state: Optional SQLite file shared by concurrent pipeline processes
+- geo_cache_path / geo_cache_ttl: On-disk coordinate cache and its TTL in hours
+- pool_size / http_retries: HTTP connection pool size and transient-error retries
+- stream / archive_raw: Hand payloads to transform in memory, optionally
+  archiving raw JSON in the background
+- manifest_path: SQLite index of raw files and their processed state
+- raw_compression: Compression of raw JSON files (None, gzip or zstd)
+- data_types: Endpoints to fetch (None = all three)
+- api_url / geo_url: Base URLs of the weather and geocoding APIs, for
+  pointing extraction at a local stand-in server
+- change_tracker_path: SQLite record of the last payload seen per city and
+  endpoint, used to drop unchanged responses
+
+TransformConfig selects the transformation mode (serial or batch) and the
+number of worker processes used to transform shards of cities in parallel,
+plus the window in hours of the rolling air quality aggregates computed
+before load (0 = no aggregates).
+
+LoadConfig holds the SQL Server connection settings, or a DB_URL for any
+SQLAlchemy database, plus the load method (default, fast_executemany or
+bulk_insert), its chunk size, the CSV staging directory for bulk_insert and
+the write mode (append, or upsert on the (city, dt) key).
+
+StorageConfig holds the processed data directory and whether transformed
+frames are also written there as partitioned Parquet.
+
+PipelineConfig holds run-level settings such as the number of cities
+processed per extract -> transform -> load batch (0 = all at once) and the
+scheduler refresh interval of each endpoint in minutes, plus where run
+metrics are exported (a JSON lines history and a Prometheus textfile), and
+the checkpoint file used to resume interrupted runs and retry failed fetches
+with exponential backoff, and the shared work queue of city batches for
+distributed extraction workers.
 
 Usage:
     from etl_config import setup_extraction_config
@@ -16,10 +51,15 @@ Usage:
     print(config.cities, config.api_key, config.raw_path, config.units)
 """
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 from dotenv import load_dotenv
 
+from src.utils import serializer
+
+DEFAULT_API_URL = 'https://api.openweathermap.org/data/2.5'
+DEFAULT_GEO_URL = 'http://api.openweathermap.org/geo/1.0'
+
 
 @dataclass
 class ExtractConfig:
@@ -27,6 +67,41 @@ class ExtractConfig:
     api_key: str
     raw_path: str
     units: str
+    max_workers: int = 1
+    calls_per_minute: int = 60
+    rate_limit_burst: int = 1
+    rate_limit_state: str = None
+    geo_cache_path: str = None
+    geo_cache_ttl: float = None
+    pool_size: int = 10
+    http_retries: int = 3
+    stream: bool = False
+    archive_raw: bool = True
+    manifest_path: str = None
+    raw_compression: str = None
+    data_types: list = None
+    change_tracker_path: str = None
+    api_url: str = DEFAULT_API_URL
+    geo_url: str = DEFAULT_GEO_URL
+
+
+# Scheduler refresh intervals in minutes, matching the API update frequency
+DEFAULT_INTERVALS = {
+    'air_pollution': 60,
+    'current_weather': 10,
+    'forecast_weather': 180,
+}
+
+
+# Alias kept for callers that still use the original dataclass name
+ExtractionConfig = ExtractConfig
+
+
+@dataclass
+class TransformConfig:
+    mode: str = 'serial'
+    workers: int = 1
+    aggregate_hours: float = 24
 
 
 @dataclass
@@ -34,16 +109,59 @@ class LoadConfig:
     host: str
     database: str
     driver: str
+    url: str = None
+    method: str = 'default'
+    chunksize: int = None
+    staging_path: str = None
+    mode: str = 'append'
+
+
+@dataclass
+class StorageConfig:
+    processed_path: str
+    write_parquet: bool = False
+
+
+@dataclass
+class PipelineConfig:
+    batch_size: int = 0
+    intervals: dict = field(default_factory=lambda: dict(DEFAULT_INTERVALS))
+    metrics_json: str = None
+    metrics_textfile: str = None
+    checkpoint_path: str = None
+    resume_minutes: float = 60
+    retry_base_seconds: float = 60
+    retry_max_attempts: int = 5
+    queue_path: str = None
+    queue_batch_size: int = 25
+    lease_seconds: float = 600
 
 
 @dataclass
 class EtlConfig:
     Extract: ExtractConfig
     Load: LoadConfig
+    Transform: TransformConfig = None
+    Storage: StorageConfig = None
+    Pipeline: PipelineConfig = None
 
 
 logger = logging.getLogger(__name__)
 
+TRANSFORM_MODES = ('serial', 'batch')
+LOAD_METHODS = ('default', 'fast_executemany', 'bulk_insert')
+LOAD_MODES = ('append', 'upsert')
+RAW_COMPRESSIONS = ('none', 'gzip', 'zstd')
+
+# Read a boolean flag from the environment
+
+
+def env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None or value.strip() == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
 # Setup extraction configuration
 
 
@@ -76,21 +194,193 @@ def setup_extraction_config():
         logger.error('No cities found in environment variables')
         raise ValueError('No cities found in environment variables')
 
+    logger.info('Getting extraction concurrency from environment')
+    max_workers = int(os.environ.get('MAX_WORKERS', '4'))
+    if max_workers < 1:
+        logger.error('MAX_WORKERS must be at least 1.')
+        raise ValueError('MAX_WORKERS must be at least 1.')
+
+    logger.info('Getting API rate limit budget from environment')
+    calls_per_minute = int(os.environ.get('RATE_LIMIT_PER_MINUTE', '60'))
+    rate_limit_burst = int(os.environ.get('RATE_LIMIT_BURST', '10'))
+    if calls_per_minute < 1 or rate_limit_burst < 1:
+        logger.error(
+            'RATE_LIMIT_PER_MINUTE and RATE_LIMIT_BURST must be at least 1.')
+        raise ValueError(
+            'RATE_LIMIT_PER_MINUTE and RATE_LIMIT_BURST must be at least 1.')
+    rate_limit_state = os.environ.get('RATE_LIMIT_STATE') or None
+
+    logger.info('Getting geocoding cache settings from environment')
+    geo_cache_path = os.environ.get(
+        'GEO_CACHE', os.path.join(raw_path, 'geocode_cache.sqlite')) or None
+    geo_cache_ttl = os.environ.get('GEO_CACHE_TTL_HOURS')
+    geo_cache_ttl = float(geo_cache_ttl) if geo_cache_ttl else None
+
+    logger.info('Getting HTTP connection pool settings from environment')
+    pool_size = int(os.environ.get('HTTP_POOL_SIZE', '10'))
+    http_retries = int(os.environ.get('HTTP_RETRIES', '3'))
+
+    logger.info('Getting streaming mode settings from environment')
+    stream = env_flag('STREAM_MODE', False)
+    archive_raw = env_flag('ARCHIVE_RAW', True)
+
+    manifest_path = os.environ.get(
+        'RAW_MANIFEST', os.path.join(raw_path, 'manifest.sqlite')) or None
+
+    change_tracker_path = os.environ.get(
+        'CHANGE_TRACKER', os.path.join(raw_path, 'changes.sqlite')) or None
+
+    api_url = os.environ.get('OWM_API_URL') or DEFAULT_API_URL
+    geo_url = os.environ.get('OWM_GEO_URL') or DEFAULT_GEO_URL
+
+    raw_compression = os.environ.get('RAW_COMPRESSION', 'none') or 'none'
+    if raw_compression not in RAW_COMPRESSIONS:
+        logger.error(
+            f'Unknown RAW_COMPRESSION {raw_compression}, expected one of {RAW_COMPRESSIONS}.')
+        raise ValueError(
+            f'Unknown RAW_COMPRESSION {raw_compression}, expected one of {RAW_COMPRESSIONS}.')
+    if raw_compression == 'zstd' and serializer.zstandard is None:
+        logger.error('RAW_COMPRESSION=zstd requires the zstandard package.')
+        raise ValueError('RAW_COMPRESSION=zstd requires the zstandard package.')
+
     Extract = ExtractConfig(
         cities=cities,
         api_key=api_key,
         raw_path=raw_path,
-        units=units
+        units=units,
+        max_workers=max_workers,
+        calls_per_minute=calls_per_minute,
+        rate_limit_burst=rate_limit_burst,
+        rate_limit_state=rate_limit_state,
+        geo_cache_path=geo_cache_path,
+        geo_cache_ttl=geo_cache_ttl,
+        pool_size=pool_size,
+        http_retries=http_retries,
+        stream=stream,
+        archive_raw=archive_raw,
+        manifest_path=manifest_path,
+        raw_compression=None if raw_compression == 'none' else raw_compression,
+        change_tracker_path=change_tracker_path,
+        api_url=api_url.rstrip('/'),
+        geo_url=geo_url.rstrip('/')
     )
 
+    logger.info('Getting transformation mode from environment')
+    transform_mode = os.environ.get('TRANSFORM_MODE', 'serial')
+    if transform_mode not in TRANSFORM_MODES:
+        logger.error(
+            f'Unknown TRANSFORM_MODE {transform_mode}, expected one of {TRANSFORM_MODES}.')
+        raise ValueError(
+            f'Unknown TRANSFORM_MODE {transform_mode}, expected one of {TRANSFORM_MODES}.')
+    transform_workers = int(os.environ.get('TRANSFORM_WORKERS', '1'))
+    if transform_workers < 1:
+        logger.error('TRANSFORM_WORKERS must be at least 1.')
+        raise ValueError('TRANSFORM_WORKERS must be at least 1.')
+    aggregate_hours = float(os.environ.get('AGGREGATE_WINDOW_HOURS', '24'))
+    if aggregate_hours < 0:
+        logger.error('AGGREGATE_WINDOW_HOURS must not be negative.')
+        raise ValueError('AGGREGATE_WINDOW_HOURS must not be negative.')
+    Transform = TransformConfig(
+        mode=transform_mode, workers=transform_workers,
+        aggregate_hours=aggregate_hours)
+
     logger.info('Getting database configuration from environment')
+    load_method = os.environ.get('LOAD_METHOD', 'default')
+    if load_method not in LOAD_METHODS:
+        logger.error(
+            f'Unknown LOAD_METHOD {load_method}, expected one of {LOAD_METHODS}.')
+        raise ValueError(
+            f'Unknown LOAD_METHOD {load_method}, expected one of {LOAD_METHODS}.')
+    chunksize = os.environ.get('LOAD_CHUNKSIZE')
+    load_mode = os.environ.get('LOAD_MODE', 'append')
+    if load_mode not in LOAD_MODES:
+        logger.error(
+            f'Unknown LOAD_MODE {load_mode}, expected one of {LOAD_MODES}.')
+        raise ValueError(
+            f'Unknown LOAD_MODE {load_mode}, expected one of {LOAD_MODES}.')
+
     Load = LoadConfig(
         host=os.environ.get('HOST'),
         database=os.environ.get('DATABASE'),
-        driver=os.environ.get('DRIVER')
+        driver=os.environ.get('DRIVER'),
+        url=os.environ.get('DB_URL') or None,
+        method=load_method,
+        chunksize=int(chunksize) if chunksize else None,
+        staging_path=os.environ.get('LOAD_STAGING_DIR') or None,
+        mode=load_mode
+    )
+
+    logger.info('Getting processed data storage settings from environment')
+    processed_path = os.environ.get('PROCESSED_DIR', 'data/processed')
+    write_parquet = env_flag('WRITE_PARQUET', True)
+    if write_parquet:
+        os.makedirs(processed_path, exist_ok=True)
+    Storage = StorageConfig(
+        processed_path=processed_path,
+        write_parquet=write_parquet
+    )
+
+    logger.info('Getting pipeline batch size from environment')
+    batch_size = int(os.environ.get('BATCH_SIZE', '0') or 0)
+    if batch_size < 0:
+        logger.error('BATCH_SIZE must not be negative.')
+        raise ValueError('BATCH_SIZE must not be negative.')
+    intervals = {}
+    for data_type, default in DEFAULT_INTERVALS.items():
+        minutes = float(os.environ.get(
+            f'SCHEDULE_{data_type.upper()}_MINUTES', default))
+        if minutes <= 0:
+            logger.error(f'SCHEDULE_{data_type.upper()}_MINUTES must be positive.')
+            raise ValueError(
+                f'SCHEDULE_{data_type.upper()}_MINUTES must be positive.')
+        intervals[data_type] = minutes
+
+    logger.info('Getting metrics export paths from environment')
+    metrics_json = os.environ.get(
+        'METRICS_JSON', os.path.join('logs', 'metrics.jsonl')) or None
+    metrics_textfile = os.environ.get('METRICS_TEXTFILE') or None
+
+    logger.info('Getting checkpoint and retry settings from environment')
+    checkpoint_path = os.environ.get(
+        'CHECKPOINT', os.path.join(raw_path, 'checkpoint.sqlite')) or None
+    resume_minutes = float(os.environ.get('CHECKPOINT_RESUME_MINUTES', '60'))
+    retry_base_seconds = float(os.environ.get('RETRY_BASE_SECONDS', '60'))
+    retry_max_attempts = int(os.environ.get('RETRY_MAX_ATTEMPTS', '5'))
+    if retry_base_seconds <= 0 or retry_max_attempts < 1:
+        logger.error(
+            'RETRY_BASE_SECONDS must be positive and RETRY_MAX_ATTEMPTS at least 1.')
+        raise ValueError(
+            'RETRY_BASE_SECONDS must be positive and RETRY_MAX_ATTEMPTS at least 1.')
+
+    logger.info('Getting work queue settings from environment')
+    queue_path = os.environ.get(
+        'WORK_QUEUE', os.path.join(raw_path, 'work_queue.sqlite')) or None
+    queue_batch_size = int(os.environ.get('WORK_QUEUE_BATCH_SIZE', '25'))
+    lease_seconds = float(os.environ.get('WORK_LEASE_SECONDS', '600'))
+    if queue_batch_size < 1 or lease_seconds <= 0:
+        logger.error(
+            'WORK_QUEUE_BATCH_SIZE must be at least 1 and WORK_LEASE_SECONDS positive.')
+        raise ValueError(
+            'WORK_QUEUE_BATCH_SIZE must be at least 1 and WORK_LEASE_SECONDS positive.')
+
+    Pipeline = PipelineConfig(
+        batch_size=batch_size,
+        intervals=intervals,
+        metrics_json=metrics_json,
+        metrics_textfile=metrics_textfile,
+        checkpoint_path=checkpoint_path,
+        resume_minutes=resume_minutes,
+        retry_base_seconds=retry_base_seconds,
+        retry_max_attempts=retry_max_attempts,
+        queue_path=queue_path,
+        queue_batch_size=queue_batch_size,
+        lease_seconds=lease_seconds
     )
 
     return EtlConfig(
         Extract=Extract,
-        Load=Load
+        Load=Load,
+        Transform=Transform,
+        Storage=Storage,
+        Pipeline=Pipeline
     )
@@ -0,0 +1,95 @@
+"""
+Geocoding Cache Module
+
+Persists city coordinates in a small SQLite file so that extract() only calls
+the OpenWeatherMap geocoding endpoint for cities it has not seen before.
+Entries optionally expire after a TTL and can be invalidated manually.
+
+Usage:
+    from src.utils.geo_cache import GeoCache
+
+    cache = GeoCache('data/raw/geocode_cache.sqlite', ttl_hours=720)
+    cache.set('Athens', 37.98, 23.72)
+    cache.get('Athens')
+
+    # Invalidate one city or the whole cache from the command line
+    python -m src.utils.geo_cache data/raw/geocode_cache.sqlite --clear Athens
+"""
+
+import argparse
+import logging
+import sqlite3
+import time
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+
+class GeoCache:
+    def __init__(self, path, ttl_hours=None):
+        self.path = path
+        self.ttl_hours = ttl_hours
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS coordinates ('
+                'city TEXT PRIMARY KEY, lat REAL, lon REAL, fetched_at REAL)')
+
+    # Return cached (lat, lon) for a city, or None if missing or expired
+
+    def get(self, city):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                'SELECT lat, lon, fetched_at FROM coordinates WHERE city = ?',
+                (self._key(city),)).fetchone()
+
+        if row is None:
+            return None
+
+        lat, lon, fetched_at = row
+        if self.ttl_hours and time.time() - fetched_at > self.ttl_hours * 3600:
+            logger.info(f'Cached coordinates for {city} expired')
+            return None
+        return lat, lon
+
+    def set(self, city, lat, lon):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO coordinates VALUES (?, ?, ?, ?)',
+                (self._key(city), lat, lon, time.time()))
+
+    # Drop one city, or every city when none is given
+
+    def invalidate(self, city=None):
+        with closing(self._connect()) as conn, conn:
+            if city is None:
+                conn.execute('DELETE FROM coordinates')
+            else:
+                conn.execute('DELETE FROM coordinates WHERE city = ?',
+                             (self._key(city),))
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _key(city):
+        return city.strip().casefold()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Invalidate cached city coordinates.')
+    parser.add_argument('path', help='Path to the geocoding cache file')
+    parser.add_argument('--clear', nargs='*', metavar='CITY', required=True,
+                        help='Cities to invalidate; all cities if none given')
+    args = parser.parse_args(argv)
+
+    cache = GeoCache(args.path)
+    if args.clear:
+        for city in args.clear:
+            cache.invalidate(city)
+    else:
+        cache.invalidate()
+
+
+if __name__ == '__main__':
+    main()
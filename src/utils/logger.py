@@ -3,24 +3,125 @@ Logging Configuration Module
 
 Sets up logging for the ETL pipeline with both file and console output.
 
+- LOG_LEVEL: Root log level (DEBUG, INFO, WARNING, ERROR; default INFO)
+- LOG_FORMAT: text, or json for one JSON object per line
+- LOG_QUEUE: Hand records to a QueueListener thread that does the file and
+  console I/O, so pipeline threads never block on logging (default true)
+
+Hot paths log with %-style arguments (logger.info('... %s', city)) so that
+messages below the configured level are never formatted.
+
 Usage:
     from logger import setup_logging
     setup_logging()
 """
 
-import os
+import atexit
+import json
 import logging
+import os
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from dotenv import load_dotenv
+
+LOG_FILE = os.path.join('logs', 'etl.log')
+LOG_FORMATS = ['text', 'json']
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ThreadQueueHandler(QueueHandler):
+    """Queue records unformatted; the listener thread formats them."""
+
+    # The queue never leaves the process, so the record does not need to be
+    # formatted and copied on the calling thread to make it picklable
+
+    def prepare(self, record):
+        return record
 
 # Setup logging configuration
 
 
-def setup_logging():
-    os.makedirs('logs', exist_ok=True)
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler("logs/etl.log"),
-            logging.StreamHandler()
-        ]
-    )
+def setup_logging(level=None, fmt=None, use_queue=None, log_file=LOG_FILE,
+                  console=True):
+    load_dotenv('config.env')
+    level = (level or os.environ.get('LOG_LEVEL') or 'INFO').upper()
+    if not isinstance(logging.getLevelName(level), int):
+        raise ValueError(f'Unknown LOG_LEVEL {level}.')
+    fmt = (fmt or os.environ.get('LOG_FORMAT') or 'text').lower()
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f'Unknown LOG_FORMAT {fmt}, expected one of {LOG_FORMATS}.')
+    if use_queue is None:
+        use_queue = os.environ.get('LOG_QUEUE', 'true').strip().lower() in (
+            '1', 'true', 'yes', 'on')
+
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+    formatter = JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.FileHandler(log_file)]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    stop_logging()
+    if use_queue:
+        start_listener(handlers)
+        handlers = [ThreadQueueHandler(_listener.queue)]
+
+    logging.basicConfig(level=level, handlers=handlers, force=True)
+
+# Start the background thread that writes queued records to the real handlers
+
+
+def start_listener(handlers):
+    global _listener
+    _listener = QueueListener(queue.SimpleQueue(), *handlers,
+                              respect_handler_level=True)
+    _listener.start()
+
+# Flush queued records and stop the background logging thread
+
+
+def stop_logging():
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+# A forked child (e.g. a transform worker) has no listener thread reading the
+# inherited queue, so it writes to the listener's handlers directly instead
+
+
+def _after_fork_in_child():
+    global _listener
+    if _listener is None:
+        return
+    handlers, _listener = _listener.handlers, None
+    logging.basicConfig(level=logging.getLogger().level,
+                        handlers=handlers, force=True)
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_after_fork_in_child)
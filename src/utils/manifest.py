@@ -0,0 +1,109 @@
+"""
+Raw File Manifest Module
+
+Keeps a SQLite index of the raw files in RAW_DIR with their data type, city,
+fetch timestamp, checksum and processed state, so catch-up runs only
+transform and load files that have not been processed yet.
+
+Usage:
+    from src.utils.manifest import RawManifest
+
+    manifest = RawManifest('data/raw/manifest.sqlite')
+    manifest.scan('data/raw')
+    raw_file = manifest.pending()
+    ...
+    manifest.mark_processed(path for files in raw_file.values() for path in files)
+"""
+
+import hashlib
+import logging
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.payload import parse_raw_path
+
+logger = logging.getLogger(__name__)
+
+
+class RawManifest:
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS raw_files ('
+                'path TEXT PRIMARY KEY, data_type TEXT, city TEXT, '
+                'fetched_at TEXT, checksum TEXT, size INTEGER, '
+                'processed INTEGER NOT NULL DEFAULT 0, processed_at TEXT)')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_raw_files_processed '
+                'ON raw_files (processed, city, fetched_at)')
+
+    # Record raw files, resetting the processed flag of files whose content changed
+
+    def register(self, paths, city=None):
+        rows = []
+        for path in paths:
+            path = Path(path)
+            parsed = parse_raw_path(path)
+            if parsed is None or not path.exists():
+                logger.warning(f'Skipping unrecognised or missing raw file {path}')
+                continue
+            data_type, parsed_city, fetched_at = parsed
+            rows.append((str(path), data_type, city or parsed_city,
+                         fetched_at.isoformat(), file_checksum(path),
+                         path.stat().st_size))
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                'INSERT INTO raw_files (path, data_type, city, fetched_at, checksum, size) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(path) DO UPDATE SET '
+                'checksum = excluded.checksum, size = excluded.size, '
+                'processed = CASE WHEN raw_files.checksum = excluded.checksum '
+                'THEN raw_files.processed ELSE 0 END', rows)
+        return len(rows)
+
+    # Register raw files in a directory that are new or have changed size
+
+    def scan(self, raw_path):
+        with closing(self._connect()) as conn:
+            known = dict(conn.execute('SELECT path, size FROM raw_files'))
+
+        changed = [path for path in Path(raw_path).glob('raw_*.json*')
+                   if known.get(str(path)) != path.stat().st_size]
+        registered = self.register(changed)
+        logger.info(f'Registered {registered} new or changed raw files')
+        return registered
+
+    # Unprocessed raw files as a {city: [path, ...]} mapping for transform()
+
+    def pending(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT city, path FROM raw_files WHERE processed = 0 '
+                'ORDER BY city, fetched_at, path').fetchall()
+
+        raw_file = {}
+        for city, path in rows:
+            raw_file.setdefault(city, []).append(Path(path))
+        return raw_file
+
+    def mark_processed(self, paths):
+        processed_at = datetime.now().isoformat()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                'UPDATE raw_files SET processed = 1, processed_at = ? WHERE path = ?',
+                [(processed_at, str(path)) for path in paths])
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,207 @@
+"""
+Run Metrics Module
+
+Collects timings and throughput of a pipeline run: per-stage and per-city
+durations, HTTP latency histograms per endpoint, raw bytes written, rows
+produced per stage and rows loaded per table.
+
+Metrics live in one process-wide registry. At the end of a run they can be
+appended as one JSON line to a history file, to compare runs over time, and
+written as a Prometheus textfile for the node_exporter textfile collector.
+
+Usage:
+    from src.utils.metrics import metrics
+
+    metrics.reset()
+    with metrics.timer('etl_stage_seconds', stage='extract'):
+        ...
+    metrics.inc('etl_rows_loaded_total', 120, table='current_weather')
+    metrics.write_json('logs/metrics.jsonl')
+    metrics.write_prometheus('/var/lib/node_exporter/weather_etl.prom')
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+HELP = {
+    'etl_run_seconds': 'Duration of the whole pipeline run',
+    'etl_stage_seconds': 'Duration of each pipeline stage',
+    'etl_stage_rows_total': 'Rows produced or written by each pipeline stage',
+    'etl_city_extract_seconds': 'Time spent extracting each city',
+    'etl_http_request_seconds': 'Latency of OpenWeatherMap requests per endpoint',
+    'etl_http_requests_total': 'OpenWeatherMap responses per endpoint and status',
+    'etl_raw_bytes_written_total': 'Bytes of raw JSON written to disk',
+    'etl_payloads_skipped_total': 'Unchanged payloads dropped per data type',
+    'etl_rows_loaded_total': 'Rows loaded into each database table',
+}
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    # Cumulative bucket counts as Prometheus expects them
+
+    def cumulative(self):
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started_at = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _labels(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # Total of a counter, or of a histogram's observations, for one label set
+
+    def total(self, name, **labels):
+        key = (name, _labels(labels))
+        with self.lock:
+            if key in self.histograms:
+                return self.histograms[key].sum
+            return self.counters.get(key, 0)
+
+    # Plain dict of every metric plus rows per second for each stage
+
+    def to_dict(self):
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: (h.count, h.sum, h.buckets, h.cumulative())
+                          for key, h in self.histograms.items()}
+
+        result = {'started_at': self.started_at, 'counters': {}, 'timings': {}}
+        for (name, labels), value in sorted(counters.items()):
+            result['counters'].setdefault(name, []).append(
+                {'labels': dict(labels), 'value': value})
+        for (name, labels), (count, total, _, _) in sorted(histograms.items()):
+            result['timings'].setdefault(name, []).append(
+                {'labels': dict(labels), 'count': count, 'sum': round(total, 6)})
+
+        throughput = {}
+        for (name, labels), value in counters.items():
+            if name != 'etl_stage_rows_total':
+                continue
+            seconds = histograms.get(('etl_stage_seconds', labels))
+            if seconds and seconds[1] > 0:
+                throughput[dict(labels)['stage']] = round(value / seconds[1], 1)
+        result['rows_per_second'] = throughput
+        return result
+
+    # Append this run as one JSON line so runs can be compared over time
+
+    def write_json(self, path):
+        _makedirs(path)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict()) + '\n')
+
+    # Write the Prometheus text exposition format, replacing the file atomically
+
+    def write_prometheus(self, path):
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(
+                (key, (h.count, h.sum, h.buckets, h.cumulative()))
+                for key, h in self.histograms.items())
+
+        lines = []
+        declared = set()
+        for (name, labels), value in counters:
+            _declare(lines, declared, name, 'counter')
+            lines.append(f'{name}{_format(labels)} {value}')
+        for (name, labels), (count, total, buckets, cumulative) in histograms:
+            _declare(lines, declared, name, 'histogram')
+            for bound, bucket_count in zip(buckets, cumulative):
+                lines.append(
+                    f'{name}_bucket{_format(labels + (("le", f"{bound:g}"),))} {bucket_count}')
+            lines.append(f'{name}_bucket{_format(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_sum{_format(labels)} {total:.6f}')
+            lines.append(f'{name}_count{_format(labels)} {count}')
+        lines.append('# TYPE etl_last_run_timestamp_seconds gauge')
+        lines.append(f'etl_last_run_timestamp_seconds {self.started_at:.0f}')
+
+        _makedirs(path)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _declare(lines, declared, name, kind):
+    if name in declared:
+        return
+    declared.add(name)
+    if name in HELP:
+        lines.append(f'# HELP {name} {HELP[name]}')
+    lines.append(f'# TYPE {name} {kind}')
+
+
+def _makedirs(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+metrics = Metrics()
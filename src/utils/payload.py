@@ -0,0 +1,64 @@
+"""
+Payload Module
+
+In-memory representation of a raw API response, used when extraction runs in
+streaming mode and hands responses straight to transform() instead of going
+through JSON files on disk.
+
+Also knows the naming scheme of raw files written by extraction:
+raw_<data_type>_<city>_<YYYYmmdd>_<HHMMSS>.json
+
+Usage:
+    from src.utils.payload import Payload, parse_raw_path
+
+    payload = Payload('current_weather', data, path)
+    data_type, city, fetched_at = parse_raw_path(path)
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from src.utils.serializer import COMPRESSION_SUFFIXES
+
+DATA_TYPES = ('air_pollution', 'current_weather', 'forecast_weather')
+
+
+@dataclass
+class Payload:
+    data_type: str
+    data: dict
+    path: Path = None
+
+    def __str__(self):
+        if self.path is not None:
+            return str(self.path)
+        return f'<in-memory {self.data_type}>'
+
+
+# Split a raw file name into (data_type, city, fetched_at), or None if unknown.
+# Only the known raw file suffixes are stripped, as city names may contain dots.
+
+
+def parse_raw_path(path):
+    name = Path(path).name
+    for suffix in sorted(COMPRESSION_SUFFIXES.values(), key=len, reverse=True):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    else:
+        return None
+    for data_type in DATA_TYPES:
+        prefix = f'raw_{data_type}_'
+        if not name.startswith(prefix):
+            continue
+        parts = name[len(prefix):].rsplit('_', 2)
+        if len(parts) != 3:
+            return None
+        city_safe, day, clock = parts
+        try:
+            fetched_at = datetime.strptime(f'{day}_{clock}', '%Y%m%d_%H%M%S')
+        except ValueError:
+            return None
+        return data_type, city_safe.replace('_', ' '), fetched_at
+    return None
@@ -0,0 +1,125 @@
+"""
+Rate Limiter Module
+
+Token-bucket rate limiter shared by every OpenWeatherMap request.
+
+The bucket refills at calls_per_minute / 60 tokens per second and holds at
+most `burst` tokens. When state_path is set, the bucket lives in a SQLite
+file so that several pipeline processes draw from the same budget; otherwise
+it is shared by the threads of the current process only.
+
+Usage:
+    from src.utils.rate_limiter import RateLimiter
+
+    limiter = RateLimiter(calls_per_minute=60, burst=10)
+    limiter.acquire()
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    def __init__(self, calls_per_minute, burst=1, state_path=None, name='owm'):
+        if calls_per_minute <= 0:
+            raise ValueError('calls_per_minute must be positive')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+
+        self.rate = calls_per_minute / 60.0
+        self.burst = burst
+        self.state_path = state_path
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.time()
+        self._paused_until = 0.0
+
+        if state_path:
+            self._init_shared_state()
+
+    # Block until a request may be sent
+
+    def acquire(self):
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                return
+            logger.debug('Rate limit reached, waiting %.2f seconds', wait)
+            time.sleep(wait)
+
+    # Stop handing out tokens for `seconds`, e.g. after a 429 response
+
+    def backoff(self, seconds):
+        logger.warning(f'Backing off API requests for {seconds:.2f} seconds')
+        with self._lock:
+            if self.state_path:
+                with closing(self._connect()) as conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    _, _, paused_until = self._read_state(conn)
+                    self._write_state(
+                        conn, 0.0, time.time(), max(paused_until, time.time() + seconds))
+                    conn.commit()
+            else:
+                self._tokens = 0.0
+                self._updated = time.time()
+                self._paused_until = max(
+                    self._paused_until, time.time() + seconds)
+
+    # Take a token if available, otherwise return the seconds to wait
+
+    def _try_acquire(self):
+        with self._lock:
+            if self.state_path:
+                with closing(self._connect()) as conn:
+                    conn.execute('BEGIN IMMEDIATE')
+                    state = self._read_state(conn)
+                    tokens, updated, paused_until, wait = self._take(*state)
+                    self._write_state(conn, tokens, updated, paused_until)
+                    conn.commit()
+                return wait
+
+            self._tokens, self._updated, self._paused_until, wait = self._take(
+                self._tokens, self._updated, self._paused_until)
+            return wait
+
+    def _take(self, tokens, updated, paused_until):
+        now = time.time()
+        if now < paused_until:
+            return tokens, updated, paused_until, paused_until - now
+
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, now, paused_until, 0.0
+        return tokens, now, paused_until, (1 - tokens) / self.rate
+
+    def _connect(self):
+        return sqlite3.connect(self.state_path, timeout=30,
+                               isolation_level=None)
+
+    def _init_shared_state(self):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit ('
+                'name TEXT PRIMARY KEY, tokens REAL, updated REAL, '
+                'paused_until REAL)')
+            conn.execute(
+                'INSERT OR IGNORE INTO rate_limit VALUES (?, ?, ?, ?)',
+                (self.name, float(self.burst), time.time(), 0.0))
+
+    def _read_state(self, conn):
+        return conn.execute(
+            'SELECT tokens, updated, paused_until FROM rate_limit WHERE name = ?',
+            (self.name,)).fetchone()
+
+    def _write_state(self, conn, tokens, updated, paused_until):
+        conn.execute(
+            'UPDATE rate_limit SET tokens = ?, updated = ?, paused_until = ? '
+            'WHERE name = ?',
+            (tokens, updated, paused_until, self.name))
@@ -0,0 +1,120 @@
+"""
+Serializer Module
+
+JSON encoding and decoding for raw API payloads. Uses orjson or msgspec when
+installed and falls back to the standard library json module otherwise.
+
+Raw files are written compact, optionally compressed with gzip or zstd
+(zstd needs the zstandard package). The compression is chosen from the file
+suffix when writing and detected from the file contents when reading, so
+older indented .json files remain readable.
+
+Usage:
+    from src.utils.serializer import write_json, read_json
+
+    write_json('data/raw/raw_current_weather_Athens_20250823_184954.json.gz', data)
+    data = read_json('data/raw/raw_current_weather_Athens_20250823_184954.json.gz')
+"""
+
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+COMPRESSION_SUFFIXES = {
+    None: '.json',
+    'gzip': '.json.gz',
+    'zstd': '.json.zst',
+}
+
+DECODE_ERRORS = (ValueError, EOFError, OSError)
+if msgspec is not None:
+    DECODE_ERRORS += (msgspec.DecodeError,)
+if zstandard is not None:
+    DECODE_ERRORS += (zstandard.ZstdError,)
+
+if orjson is not None:
+    BACKEND = 'orjson'
+elif msgspec is not None:
+    BACKEND = 'msgspec'
+else:
+    BACKEND = 'json'
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    if msgspec is not None:
+        return msgspec.json.encode(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    if msgspec is not None:
+        return msgspec.json.decode(raw)
+    return json.loads(raw)
+
+# Compression implied by a raw file name
+
+
+def compression_for(path):
+    name = str(path)
+    if name.endswith('.gz'):
+        return 'gzip'
+    if name.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def compress(raw, compression):
+    if compression is None:
+        return raw
+    if compression == 'gzip':
+        return gzip.compress(raw, compresslevel=6)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError('zstd compression requires the zstandard package')
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    raise ValueError(f'Unknown compression {compression}')
+
+# Undo whatever compression the bytes carry, detected from their magic number
+
+
+def decompress(raw):
+    if raw.startswith(GZIP_MAGIC):
+        return gzip.decompress(raw)
+    if raw.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ImportError('zstd compressed file requires the zstandard package')
+        return zstandard.ZstdDecompressor().decompress(raw, max_output_size=1 << 30)
+    return raw
+
+
+def write_json(path, data):
+    raw = compress(dumps(data), compression_for(path))
+    with open(path, 'wb') as f:
+        f.write(raw)
+    return len(raw)
+
+
+def read_json(path):
+    with open(path, 'rb') as f:
+        return loads(decompress(f.read()))
@@ -0,0 +1,176 @@
+"""
+Work Queue Module
+
+A shared queue of city batches in a SQLite file, so that extraction workers
+in several processes (or on several hosts sharing the file) split the city
+list between them instead of each being given a hand-maintained CITIES list.
+
+Workers claim one batch at a time under a lease. A worker renews the lease
+while it works on a batch; if it dies, the lease runs out and another worker
+claims the batch again. Batches that fail, or whose lease expires, after
+max_attempts leases are marked failed.
+
+SQLite locking needs a local disk or a network file system with working
+locks; the queue file must be reachable by every worker.
+
+Usage:
+    from src.utils.work_queue import WorkQueue
+
+    queue = WorkQueue('data/raw/work_queue.sqlite', lease_seconds=600)
+    job_ids = queue.enqueue(cities, batch_size=25)
+
+    job = queue.claim('worker-1')
+    if job is not None:
+        job_id, cities = job
+        with queue.lease(job_id, 'worker-1'):
+            ...
+        queue.complete(job_id, 'worker-1')
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ('pending', 'leased', 'done', 'failed')
+
+
+class WorkQueue:
+    def __init__(self, path, lease_seconds=600, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                'job_id INTEGER PRIMARY KEY AUTOINCREMENT, cities TEXT, '
+                "state TEXT NOT NULL DEFAULT 'pending', worker TEXT, "
+                'lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0, '
+                'error TEXT, created_at REAL, finished_at REAL)')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_jobs_state ON jobs (state, job_id)')
+
+    # Split cities into batches and add them as pending jobs, returning their ids
+
+    def enqueue(self, cities, batch_size):
+        batch_size = batch_size or len(cities) or 1
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            job_ids = [
+                conn.execute('INSERT INTO jobs (cities, created_at) VALUES (?, ?)',
+                             (json.dumps(cities[i:i + batch_size]), now)).lastrowid
+                for i in range(0, len(cities), batch_size)]
+        logger.info(f'Queued {len(cities)} cities in {len(job_ids)} batches')
+        return job_ids
+
+    # Lease the oldest pending or expired job, returning (job_id, cities) or None.
+    # Expired jobs that already used max_attempts leases (e.g. a batch that keeps
+    # killing its worker) are marked failed instead of being leased again.
+
+    def claim(self, worker):
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            while True:
+                row = conn.execute(
+                    "SELECT job_id, cities, state, worker, attempts FROM jobs "
+                    "WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) "
+                    'ORDER BY job_id LIMIT 1', (now,)).fetchone()
+                if row is None:
+                    conn.commit()
+                    return None
+
+                job_id, cities, state, previous, attempts = row
+                if state == 'pending' or attempts < self.max_attempts:
+                    break
+                logger.error(
+                    f'Lease of job {job_id} held by {previous} expired after '
+                    f'{attempts} attempts, marking it failed')
+                conn.execute(
+                    "UPDATE jobs SET state = 'failed', lease_until = NULL, "
+                    "error = 'lease expired', finished_at = ? WHERE job_id = ?",
+                    (now, job_id))
+
+            if state == 'leased':
+                logger.warning(
+                    f'Lease of job {job_id} held by {previous} expired, reclaiming it')
+            conn.execute(
+                "UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?, "
+                'attempts = attempts + 1 WHERE job_id = ?',
+                (worker, now + self.lease_seconds, job_id))
+            conn.commit()
+        return job_id, json.loads(cities)
+
+    # Extend the lease of a job the worker still holds
+
+    def renew(self, job_id, worker):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE job_id = ? AND worker = ? "
+                "AND state = 'leased'",
+                (time.time() + self.lease_seconds, job_id, worker)).rowcount == 1
+
+    # Keep renewing the lease on a background thread while the block runs
+
+    @contextmanager
+    def lease(self, job_id, worker):
+        stop = threading.Event()
+
+        def keep_alive():
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.renew(job_id, worker):
+                    logger.warning(f'Lost the lease of job {job_id}')
+                    return
+
+        thread = threading.Thread(target=keep_alive, daemon=True,
+                                  name=f'lease-{job_id}')
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, job_id, worker):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET state = 'done', finished_at = ?, lease_until = NULL "
+                'WHERE job_id = ? AND worker = ?', (time.time(), job_id, worker))
+
+    # Return a job to the queue, or mark it failed after max_attempts
+
+    def fail(self, job_id, worker, error):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' "
+                "ELSE 'pending' END, error = ?, lease_until = NULL "
+                'WHERE job_id = ? AND worker = ?',
+                (self.max_attempts, str(error), job_id, worker))
+
+    # Number of jobs in each state, over the given job ids or the whole queue
+
+    def status(self, job_ids=None):
+        with closing(self._connect()) as conn:
+            if job_ids is None:
+                rows = conn.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state')
+            else:
+                job_ids = list(job_ids)
+                rows = conn.execute(
+                    'SELECT state, COUNT(*) FROM jobs WHERE job_id IN '
+                    '(SELECT value FROM json_each(?)) GROUP BY state',
+                    (json.dumps(job_ids),))
+            counts = dict(rows)
+        return {state: counts.get(state, 0) for state in JOB_STATES}
+
+    # True once no job is pending or leased
+
+    def drained(self):
+        status = self.status()
+        return status['pending'] == 0 and status['leased'] == 0
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
@@ -0,0 +1,64 @@
+'''
+Unit tests for the change tracker module
+
+These tests cover ChangeTracker:
+- Detecting unchanged payloads per city and data type
+- Persisting the last seen state only on flush
+- Manual invalidation
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.utils.change_tracker import ChangeTracker, payload_dt
+
+CURRENT = {"dt": 1755964194, "main": {"temp": 27.06}}
+FORECAST = {"list": [{"dt": 1755972000, "main": {"temp": 26.1}}], "city": {"name": "Athens"}}
+
+
+def test_observe_detects_changes(tmp_path):
+    tracker = ChangeTracker(str(tmp_path / "changes.sqlite"))
+
+    assert tracker.observe("Athens", "current_weather", CURRENT)
+    assert not tracker.observe("athens ", "current_weather", dict(CURRENT))
+    assert tracker.observe("Athens", "forecast_weather", FORECAST)
+    assert tracker.observe("Paris", "current_weather", CURRENT)
+    assert tracker.observe("Athens", "current_weather", {**CURRENT, "dt": 1755964794})
+
+    assert tracker.skipped == {"current_weather": 1}
+    assert tracker.changed == {"current_weather": 3, "forecast_weather": 1}
+
+
+def test_state_persists_after_flush(tmp_path):
+    path = str(tmp_path / "changes.sqlite")
+    tracker = ChangeTracker(path)
+    tracker.observe("Athens", "current_weather", CURRENT)
+
+    assert ChangeTracker(path).observe("Athens", "current_weather", CURRENT)
+
+    assert tracker.flush() == 1
+    assert tracker.flush() == 0
+    assert not ChangeTracker(path).observe("Athens", "current_weather", CURRENT)
+
+
+def test_invalidate(tmp_path):
+    path = str(tmp_path / "changes.sqlite")
+    tracker = ChangeTracker(path)
+    tracker.observe("Athens", "current_weather", CURRENT)
+    tracker.observe("Paris", "current_weather", CURRENT)
+    tracker.flush()
+
+    tracker.invalidate("Athens")
+    assert tracker.observe("Athens", "current_weather", CURRENT)
+    assert not tracker.observe("Paris", "current_weather", CURRENT)
+
+    tracker.invalidate()
+    assert ChangeTracker(path).observe("Paris", "current_weather", CURRENT)
+
+
+def test_payload_dt():
+    assert payload_dt("current_weather", CURRENT) == 1755964194
+    assert payload_dt("forecast_weather", FORECAST) == 1755972000
+    assert payload_dt("air_pollution", {"list": []}) is None
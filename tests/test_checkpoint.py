@@ -0,0 +1,105 @@
+'''
+Unit tests for the checkpoint module
+
+These tests cover Checkpoint:
+- Starting and resuming runs within the resume window
+- Planning work from due retries and pairs the run has not done yet
+- Exponential backoff, dead letters and requeueing
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.utils.checkpoint import Checkpoint
+from src.utils.payload import Payload
+
+TYPES = ("air_pollution", "current_weather", "forecast_weather")
+
+
+def test_begin_resumes_unfinished_run(mocker, tmp_path):
+    mock_time = mocker.patch("src.utils.checkpoint.time.time", return_value=1000)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite"))
+
+    run_id = checkpoint.begin(resume_minutes=60)
+    assert checkpoint.begin(resume_minutes=60) == run_id
+
+    mock_time.return_value = 1000 + 3601
+    assert checkpoint.begin(resume_minutes=60) != run_id
+
+    checkpoint.finish(run_id)
+    latest = checkpoint.begin(resume_minutes=60)
+    checkpoint.finish(latest)
+    assert checkpoint.begin(resume_minutes=60) not in (run_id, latest)
+
+
+def test_begin_only_resumes_runs_for_the_same_data_types(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite"))
+
+    air_run = checkpoint.begin(data_types=["air_pollution"])
+    current_run = checkpoint.begin(data_types=["current_weather"])
+    assert current_run != air_run
+
+    # The current weather run did not close the unfinished air pollution run
+    assert checkpoint.begin(data_types=["air_pollution"]) == air_run
+    assert checkpoint.begin(data_types=["current_weather"]) == current_run
+
+
+def test_plan_skips_done_pairs(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite"))
+    run_id = checkpoint.begin()
+    raw = tmp_path / "raw_current_weather_Athens_20250823_184954.json"
+    raw.write_text("{}")
+
+    work = checkpoint.plan(run_id, ["Athens", "Paris"], TYPES)
+    assert work == [("Athens", TYPES), ("Paris", TYPES)]
+
+    checkpoint.record_fetched(
+        run_id, [("Athens", TYPES)],
+        {"Athens": [raw, Payload("forecast_weather", {}, None)]},
+        [("Athens", "air_pollution", "timeout")])
+
+    assert checkpoint.unloaded(run_id) == {"Athens": [raw]}
+    # forecast was only held in memory and air pollution failed, so both are
+    # fetched again on resume
+    assert checkpoint.plan(run_id, ["Athens", "Paris"], TYPES) == [
+        ("Athens", ("air_pollution", "forecast_weather")), ("Paris", TYPES)]
+
+    checkpoint.record_loaded(run_id)
+    assert checkpoint.unloaded(run_id) == {}
+
+
+def test_failed_fetches_back_off_and_drain_first(mocker, tmp_path):
+    mock_time = mocker.patch("src.utils.checkpoint.time.time", return_value=0)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.sqlite"),
+                            retry_base_seconds=60, max_attempts=3)
+    run_id = checkpoint.begin()
+    checkpoint.record_fetched(run_id, [("Paris", ("current_weather",))], {},
+                              [("Paris", "current_weather", "HTTP 500")])
+    checkpoint.finish(run_id)
+
+    assert checkpoint.due_retries(now=59) == []
+    assert checkpoint.due_retries(now=60) == [("Paris", "current_weather")]
+
+    mock_time.return_value = 60
+    run_id = checkpoint.begin()
+    assert checkpoint.plan(run_id, ["Athens"], ("current_weather",)) == [
+        ("Paris", ("current_weather",)), ("Athens", ("current_weather",))]
+
+    # Second failure doubles the delay, the third one makes it a dead letter
+    checkpoint.record_fetched(run_id, [("Paris", ("current_weather",))], {},
+                              [("Paris", "current_weather", "HTTP 500")])
+    assert checkpoint.due_retries(now=60 + 119) == []
+    assert checkpoint.due_retries(now=60 + 120) == [("Paris", "current_weather")]
+    checkpoint.record_fetched(run_id, [("Paris", ("current_weather",))], {},
+                              [("Paris", "current_weather", "HTTP 500")])
+    assert checkpoint.due_retries(now=10**9) == []
+    assert checkpoint.dead_letters() == [("Paris", "current_weather", 3, "HTTP 500")]
+
+    assert checkpoint.requeue() == 1
+    assert checkpoint.due_retries() == [("Paris", "current_weather")]
+
+    checkpoint.record_fetched(run_id, [("Paris", ("current_weather",))], {}, [])
+    assert checkpoint.due_retries(now=10**9) == []
+    assert checkpoint.dead_letters() == []
@@ -0,0 +1,104 @@
+'''
+Unit tests for the enrich module
+
+These tests cover the air quality aggregates:
+- rolling_aggregates: Per-city rolling averages and derived AQI, combining
+  loaded history with new rows.
+- derived_aqi: Worst grade of the pollutant averages.
+- build_aggregates: Reading history back from a SQLite database.
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.enrich import build_aggregates, derived_aqi, rolling_aggregates
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+
+def make_air_pollution(rows):
+    return pd.DataFrame(rows, columns=[
+        "city", "dt", "components_pm2_5", "components_pm10", "components_o3"]).assign(
+        dt=lambda df: pd.to_datetime(df["dt"]))
+
+
+def test_rolling_aggregates_per_city():
+    df = make_air_pollution([
+        ("Athens", "2024-01-01 00:00", 10.0, 20.0, 50.0),
+        ("Paris", "2024-01-01 06:00", 80.0, 10.0, 10.0),
+        ("Athens", "2024-01-01 12:00", 30.0, 40.0, 70.0),
+        ("Athens", "2024-01-02 06:00", None, 60.0, 90.0),
+    ])
+
+    result = rolling_aggregates(df, hours=24)
+
+    athens = result[result["city"] == "Athens"].reset_index(drop=True)
+    assert athens["pm2_5_avg"].tolist() == [10.0, 20.0, 30.0]
+    assert athens["pm10_avg"].tolist() == [20.0, 30.0, 50.0]
+    assert athens["samples"].tolist() == [1, 2, 1]
+    assert athens["aqi"].tolist() == [2, 2, 3]
+    assert athens["aqi_desc"].astype(str).tolist() == ["Fair", "Fair", "Moderate"]
+
+    paris = result[result["city"] == "Paris"]
+    assert paris["aqi_desc"].tolist() == ["Very Poor"]
+    assert result["aqi_desc"].dtype == "category"
+
+
+def test_rolling_aggregates_use_history_for_new_rows_only():
+    history = make_air_pollution([
+        ("Athens", "2024-01-01 00:00", 10.0, 10.0, 10.0),
+        ("Athens", "2024-01-01 12:00", 20.0, 10.0, 10.0),
+    ])
+    new = make_air_pollution([
+        ("Athens", "2024-01-01 12:00", 40.0, 10.0, 10.0),
+        ("Athens", "2024-01-01 18:00", 60.0, 10.0, 10.0),
+    ])
+
+    result = rolling_aggregates(new, history, hours=24)
+
+    # The reloaded 12:00 row replaces the one in history
+    assert result["dt"].tolist() == list(pd.to_datetime(["2024-01-01 12:00", "2024-01-01 18:00"]))
+    assert result["pm2_5_avg"].tolist() == [25.0, pytest.approx(110 / 3)]
+    assert result["samples"].tolist() == [2, 3]
+
+
+def test_derived_aqi_takes_worst_grade():
+    averages = {
+        "pm2_5": pd.Series([5.0, 10.0, np.nan, np.nan]),
+        "pm10": pd.Series([5.0, 5.0, 250.0, np.nan]),
+        "o3": pd.Series([100.0, 5.0, 5.0, np.nan]),
+    }
+    assert derived_aqi(averages).tolist() == [3, 2, 5, 0]
+
+
+def test_build_aggregates_reads_history(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'etl.sqlite'}")
+    history = make_air_pollution([
+        ("Athens", "2024-01-01 00:00", 10.0, 10.0, 10.0),
+        ("Athens", "2023-12-30 00:00", 99.0, 99.0, 99.0),
+        ("Paris", "2024-01-01 00:00", 99.0, 99.0, 99.0),
+    ])
+    with engine.begin() as con:
+        history.to_sql("air_pollution", con, index=False)
+
+    new = make_air_pollution([("Athens", "2024-01-01 10:00", 30.0, 10.0, 10.0)])
+    result = build_aggregates(new, engine, hours=24)
+    engine.dispose()
+
+    assert result.name == "air_quality_aggregates"
+    assert result["pm2_5_avg"].tolist() == [20.0]
+    assert result["samples"].tolist() == [2]
+
+
+def test_build_aggregates_without_history(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'etl.sqlite'}")
+    new = make_air_pollution([("Athens", "2024-01-01 10:00", 30.0, 10.0, 10.0)])
+    result = build_aggregates(new, engine)
+    engine.dispose()
+
+    assert result["samples"].tolist() == [1]
+    assert build_aggregates(pd.DataFrame(), engine).empty
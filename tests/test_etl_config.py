@@ -0,0 +1,36 @@
+'''
+Unit tests for the configuration module
+
+These tests cover setup_extraction_config:
+- Reading settings from the environment
+- Rejecting settings that cannot work in this environment
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.utils.etl_config import setup_extraction_config
+import pytest
+
+
+@pytest.fixture
+def base_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("OWM_API_KEY", "fake_key")
+    monkeypatch.setenv("CITIES", "Athens, St. Louis")
+    monkeypatch.setenv("RAW_DIR", str(tmp_path))
+    return monkeypatch
+
+
+def test_setup_extraction_config_reads_environment(base_env):
+    config = setup_extraction_config()
+    assert config.Extract.cities == ["Athens", "St. Louis"]
+    assert config.Extract.raw_compression is None
+
+
+def test_zstd_without_zstandard_is_rejected(base_env, mocker):
+    mocker.patch("src.utils.serializer.zstandard", None)
+    base_env.setenv("RAW_COMPRESSION", "zstd")
+    with pytest.raises(ValueError, match="zstandard"):
+        setup_extraction_config()
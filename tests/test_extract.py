@@ -5,6 +5,10 @@ These tests cover the functions in src.extract:
 - fetch_coordinates
 - fetch_weather
 - save_file
+- http_get
+- create_session
+- Dropping unchanged payloads with a change tracker
+- Extracting from the local mock API server
 
 Tests include:
 - Successful API calls
@@ -18,8 +22,12 @@ Usage:
         pytest tests/
 """
 
-from src.extract import extract, fetch_coordinates, fetch_weather, save_file
+from src.extract import extract, fetch_coordinates, fetch_weather, save_file, http_get, create_session
 from src.utils.etl_config import ExtractionConfig
+from src.utils.archiver import RawArchiver
+from src.utils.change_tracker import ChangeTracker
+from benchmarks.mock_server import MockServer
+from src.transform import json_open
 from requests.exceptions import ConnectionError
 import json
 
@@ -145,11 +153,13 @@ def test_fetch_weather_partial_failure(mocker, tmp_path):
         successful_response
     ]
     config = make_test_config(tmp_path)
-    result = fetch_weather("Athens", 37.98, 23.72, config)
+    failures = []
+    result = fetch_weather("Athens", 37.98, 23.72, config, failures=failures)
 
     assert mock_get.call_count == 3
 
     assert mock_save.call_count == 2
+    assert failures == [("Athens", "forecast_weather", "Network error")]
 
     assert all("Athens" in str(path) for path in result)
     assert len(result) == 2
@@ -184,3 +194,203 @@ def test_extract(mocker, tmp_path):
     assert result == {}
     mock_coords.assert_called_once()
     mock_weather.assert_not_called()
+
+# Test extracting weather data concurrently
+
+
+def test_extract_concurrent(mocker, tmp_path):
+    mocker.patch(
+        "src.extract.fetch_coordinates",
+        side_effect=lambda city, api_key, **kwargs: (None, None) if city == "InvalidCity" else (1.0, 2.0))
+    mocker.patch(
+        "src.extract.fetch_weather",
+        side_effect=lambda city, lat, lon, config, **kwargs: [f"raw_{city}.json"])
+
+    config = make_test_config(tmp_path)
+    config.cities = ["Athens", "InvalidCity", "Paris", "London"]
+    config.max_workers = 3
+    result = extract(config)
+
+    assert list(result) == ["Athens", "Paris", "London"]
+    assert result["Paris"] == ["raw_Paris.json"]
+
+# Test retrying a request after a 429 response
+
+
+def test_http_get_retries_after_rate_limit(mocker):
+    mock_get = mocker.patch("src.extract.requests.get")
+    limiter = mocker.Mock()
+
+    limited = mocker.Mock()
+    limited.status_code = 429
+    limited.headers = {"Retry-After": "2"}
+    ok = mocker.Mock()
+    ok.status_code = 200
+    mock_get.side_effect = [limited, ok]
+
+    result = http_get("http://example.com", limiter)
+
+    assert result is ok
+    assert limiter.acquire.call_count == 2
+    limiter.backoff.assert_called_once_with(2.0)
+
+# Test 5xx responses are retried through the rate limiter
+
+
+def test_http_get_retries_server_errors_through_limiter(mocker):
+    mock_sleep = mocker.patch("src.extract.time.sleep")
+    session = mocker.Mock()
+    limiter = mocker.Mock()
+    error = mocker.Mock(status_code=503)
+    ok = mocker.Mock(status_code=200)
+    session.get.side_effect = [error, error, ok]
+
+    assert http_get("http://example.com", limiter, session, retries=2) is ok
+    assert limiter.acquire.call_count == 3
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [0.5, 1.0]
+
+    session.get.side_effect = [error, error]
+    http_get("http://example.com", limiter, session, retries=1)
+    error.raise_for_status.assert_called_once()
+
+# Test extracting a city with cached coordinates skips geocoding
+
+
+def test_extract_uses_geo_cache(mocker, tmp_path):
+    mock_coords = mocker.patch(
+        "src.extract.fetch_coordinates", return_value=(37.98, 23.72))
+    mock_weather = mocker.patch(
+        "src.extract.fetch_weather", return_value=["raw_Athens.json"])
+
+    config = make_test_config(tmp_path)
+    config.geo_cache_path = str(tmp_path / "geocode_cache.sqlite")
+    extract(config)
+    result = extract(config)
+
+    assert result == {"Athens": ["raw_Athens.json"]}
+    mock_coords.assert_called_once()
+    assert mock_weather.call_count == 2
+    assert mock_weather.call_args.args[1:3] == (37.98, 23.72)
+
+# Test requests go through the shared session when one is given
+
+
+def test_http_get_uses_session(mocker):
+    mock_get = mocker.patch("src.extract.requests.get")
+    session = mocker.Mock()
+    session.get.return_value.status_code = 200
+
+    result = http_get("http://example.com", session=session)
+
+    assert result is session.get.return_value
+    session.get.assert_called_once_with("http://example.com", timeout=10)
+    mock_get.assert_not_called()
+
+# Test the pooled session is configured from the extraction config
+
+
+def test_create_session(tmp_path):
+    config = make_test_config(tmp_path)
+    config.pool_size = 4
+    config.max_workers = 8
+    config.http_retries = 2
+
+    session = create_session(config)
+    adapter = session.get_adapter("https://api.openweathermap.org")
+
+    assert adapter._pool_maxsize == 8
+    assert adapter.max_retries.connect == 2
+    # Error responses are retried by http_get, which goes through the limiter
+    assert adapter.max_retries.status == 0
+    assert adapter.max_retries.read == 0
+
+# Test streaming mode returns in-memory payloads and archives in the background
+
+
+def test_fetch_weather_stream(mocker, tmp_path):
+    mock_get = mocker.patch("src.extract.requests.get")
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = {"main": {"temp": 27.06}}
+
+    config = make_test_config(tmp_path)
+    config.stream = True
+    archiver = RawArchiver(save_file)
+    result = fetch_weather("Athens", 37.98, 23.72, config, archiver=archiver)
+    archived = archiver.close()
+
+    assert [p.data_type for p in result] == [
+        "current_weather", "forecast_weather", "air_pollution"]
+    assert all(p.data == {"main": {"temp": 27.06}} for p in result)
+    assert sorted(archived) == sorted(p.path for p in result)
+    assert all(p.path.exists() for p in result)
+
+# Test streaming mode without archival writes nothing to disk
+
+
+def test_fetch_weather_stream_no_archive(mocker, tmp_path):
+    mock_get = mocker.patch("src.extract.requests.get")
+    mock_save = mocker.patch("src.extract.save_file")
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = {"main": {"temp": 27.06}}
+
+    config = make_test_config(tmp_path)
+    config.stream = True
+    config.archive_raw = False
+    result = fetch_weather("Athens", 37.98, 23.72, config)
+
+    assert len(result) == 3
+    assert all(p.path is None for p in result)
+    mock_save.assert_not_called()
+
+# Test raw files are written with the configured compression suffix
+
+
+def test_fetch_weather_compressed(mocker, tmp_path):
+    mock_get = mocker.patch("src.extract.requests.get")
+    mock_get.return_value.status_code = 200
+    mock_get.return_value.json.return_value = {"main": {"temp": 27.06}}
+
+    config = make_test_config(tmp_path)
+    config.raw_compression = "gzip"
+    result = fetch_weather("Athens", 37.98, 23.72, config)
+
+    assert all(str(path).endswith(".json.gz") for path in result)
+    assert json_open(result[0]) == {"main": {"temp": 27.06}}
+
+# Test unchanged payloads are dropped before they are saved
+
+
+def test_fetch_weather_skips_unchanged(mocker, tmp_path):
+    mock_get = mocker.patch("src.extract.requests.get")
+    mock_save = mocker.patch("src.extract.save_file")
+    old = mocker.Mock(status_code=200, json=lambda: {"dt": 1755964194, "main": {"temp": 27.06}})
+    new = mocker.Mock(status_code=200, json=lambda: {"dt": 1755964794, "main": {"temp": 27.5}})
+    mock_get.side_effect = [old, old, old, new, old, old]
+
+    config = make_test_config(tmp_path)
+    tracker = ChangeTracker(str(tmp_path / "changes.sqlite"))
+    assert len(fetch_weather("Athens", 37.98, 23.72, config, tracker=tracker)) == 3
+    result = fetch_weather("Athens", 37.98, 23.72, config, tracker=tracker)
+
+    assert [p.name.split("_Athens")[0] for p in result] == ["raw_current_weather"]
+    assert mock_save.call_count == 4
+    assert tracker.skipped == {"forecast_weather": 1, "air_pollution": 1}
+
+# Test extraction end to end against the local mock API, including 429 retries
+
+
+def test_extract_against_mock_server(tmp_path):
+    with MockServer(rate_limit_every=3) as server:
+        config = make_test_config(tmp_path)
+        config.cities = ["Athens", "Paris"]
+        config.api_url = f"{server.url}/data/2.5"
+        config.geo_url = f"{server.url}/geo/1.0"
+        config.calls_per_minute = 10**6
+        config.rate_limit_burst = 100
+        result = extract(config)
+
+    assert server.rate_limited > 0
+    assert sorted(result) == ["Athens", "Paris"]
+    assert all(len(files) == 3 for files in result.values())
+    forecast = json_open(next(p for p in result["Paris"] if "forecast" in p.name))
+    assert len(forecast["list"]) == 40
@@ -0,0 +1,48 @@
+'''
+Unit tests for the geocoding cache module
+
+These tests cover GeoCache:
+- Storing and reading coordinates
+- TTL expiry
+- Manual invalidation
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.utils.geo_cache import GeoCache
+
+
+def test_geo_cache_roundtrip(tmp_path):
+    cache = GeoCache(str(tmp_path / "geo.sqlite"))
+    cache.set("Athens", 37.98, 23.72)
+
+    assert cache.get("athens ") == (37.98, 23.72)
+    assert cache.get("Paris") is None
+
+
+def test_geo_cache_ttl_expiry(mocker, tmp_path):
+    mock_time = mocker.patch("src.utils.geo_cache.time.time", return_value=0)
+    cache = GeoCache(str(tmp_path / "geo.sqlite"), ttl_hours=1)
+    cache.set("Athens", 37.98, 23.72)
+
+    mock_time.return_value = 1800
+    assert cache.get("Athens") == (37.98, 23.72)
+
+    mock_time.return_value = 7200
+    assert cache.get("Athens") is None
+
+
+def test_geo_cache_invalidate(tmp_path):
+    cache = GeoCache(str(tmp_path / "geo.sqlite"))
+    cache.set("Athens", 37.98, 23.72)
+    cache.set("Paris", 48.85, 2.35)
+
+    cache.invalidate("Athens")
+    assert cache.get("Athens") is None
+    assert cache.get("Paris") == (48.85, 2.35)
+
+    cache.invalidate()
+    assert cache.get("Paris") is None
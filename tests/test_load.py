@@ -0,0 +1,152 @@
+'''
+Unit tests for the load module
+
+These tests cover the functions in the load module against SQLite:
+- load: Appending frames through the configured backend.
+- load_all: Loading several tables atomically over one shared engine.
+- upsert: Idempotent merging of rows on the (city, dt) key.
+- create_db_engine: Engine options for each load method.
+- get_backend: Backend lookup and unsupported methods.
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.load import load, load_all, get_engine, create_db_engine, get_backend, upsert
+from src.utils.etl_config import LoadConfig
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+
+def make_test_config(tmp_path, method='default'):
+    return LoadConfig(
+        host=None,
+        database=None,
+        driver=None,
+        url=f"sqlite:///{tmp_path / 'weather.db'}",
+        method=method,
+        chunksize=2
+    )
+
+
+def make_weather_df():
+    df = pd.DataFrame({
+        "main_temp": [25.0, 26.0, 27.0],
+        "dt": pd.to_datetime([1690000000, 1690003600, 1690007200], unit="s"),
+        "city": ["Athens", "Athens", "Paris"]
+    })
+    df.name = "current_weather"
+    return df
+
+
+@pytest.mark.parametrize("method", ["default", "fast_executemany"])
+def test_load_sqlite(tmp_path, method):
+    config = make_test_config(tmp_path, method)
+
+    load(make_weather_df(), config)
+    load(make_weather_df(), config)
+
+    engine = create_db_engine(config)
+    result = pd.read_sql("SELECT * FROM current_weather", engine)
+    assert len(result) == 6
+    assert list(result.columns) == ["main_temp", "dt", "city"]
+
+
+def test_bulk_insert_requires_sql_server(tmp_path):
+    config = make_test_config(tmp_path, "bulk_insert")
+
+    with pytest.raises(ValueError):
+        load(make_weather_df(), config)
+
+
+def test_create_db_engine_fast_executemany(mocker):
+    mock_create = mocker.patch("src.load.sa.create_engine")
+    config = LoadConfig(host="localhost", database="Weather_db",
+                        driver="ODBC Driver 17 for SQL Server",
+                        method="fast_executemany")
+
+    create_db_engine(config)
+
+    url = mock_create.call_args.args[0]
+    assert url.drivername == "mssql+pyodbc"
+    assert mock_create.call_args.kwargs == {"fast_executemany": True}
+
+
+def test_get_backend_unknown():
+    with pytest.raises(ValueError):
+        get_backend("copy")
+
+
+def test_get_engine_is_shared(tmp_path):
+    config = make_test_config(tmp_path)
+
+    assert get_engine(config) is get_engine(config)
+
+
+def test_load_all_is_atomic(tmp_path):
+    config = make_test_config(tmp_path)
+    engine = get_engine(config)
+    with engine.begin() as con:
+        con.exec_driver_sql(
+            "CREATE TABLE current_weather (main_temp FLOAT, dt TIMESTAMP, city TEXT)")
+        con.exec_driver_sql(
+            "CREATE TABLE air_pollution (city TEXT, dt TIMESTAMP)")
+
+    current_df = make_weather_df()
+    bad_df = pd.DataFrame({"unknown_column": [1]})
+    bad_df.name = "air_pollution"
+
+    with pytest.raises((sa.exc.OperationalError, pd.errors.DatabaseError)):
+        load_all([current_df, bad_df], config)
+
+    result = pd.read_sql("SELECT * FROM current_weather", engine)
+    assert result.empty
+
+
+def test_load_all_skips_empty_frames(tmp_path):
+    config = make_test_config(tmp_path)
+    empty_df = pd.DataFrame()
+    empty_df.name = "air_pollution"
+
+    load_all([empty_df, make_weather_df()], config)
+
+    inspector = sa.inspect(get_engine(config))
+    assert not inspector.has_table("air_pollution")
+    assert inspector.has_table("current_weather")
+
+
+def test_load_upsert_is_idempotent(tmp_path):
+    config = make_test_config(tmp_path)
+    config.mode = "upsert"
+
+    load(make_weather_df(), config)
+    load(make_weather_df(), config)
+
+    updated_df = make_weather_df().iloc[[2]].copy()
+    updated_df["main_temp"] = 30.0
+    updated_df.name = "current_weather"
+    load(updated_df, config)
+
+    result = pd.read_sql(
+        "SELECT * FROM current_weather ORDER BY dt", get_engine(config))
+    assert len(result) == 3
+    assert result["main_temp"].tolist() == [25.0, 26.0, 30.0]
+    assert sa.inspect(get_engine(config)).get_table_names() == ["current_weather"]
+
+
+def test_upsert_staging_tables_are_unique(mocker, tmp_path):
+    config = make_test_config(tmp_path)
+    config.mode = "upsert"
+    backend = mocker.Mock()
+
+    engine = get_engine(config)
+    with engine.begin() as con:
+        upsert(make_weather_df(), con, config, backend)
+        upsert(make_weather_df(), con, config, backend)
+
+    staging_tables = [call.kwargs["table"] for call in backend.call_args_list]
+    assert staging_tables[0].startswith("current_weather_staging_")
+    assert staging_tables[0] != staging_tables[1]
@@ -0,0 +1,74 @@
+'''
+Unit tests for the logging configuration module
+
+These tests cover setup_logging:
+- Log level and format taken from the environment and from config.env
+- JSON output
+- Background logging through a QueueListener
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+import json
+import logging
+
+import pytest
+
+from src.utils.logger import setup_logging, stop_logging
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    stop_logging()
+    for handler in root.handlers:
+        if handler not in handlers:
+            handler.close()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_level_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("LOG_LEVEL", "warning")
+    setup_logging(use_queue=False, log_file=str(tmp_path / "etl.log"), console=False)
+
+    assert logging.getLogger().level == logging.WARNING
+
+
+def test_level_from_config_file(monkeypatch, tmp_path):
+    # setenv first so that monkeypatch removes what load_dotenv sets
+    monkeypatch.setenv("LOG_LEVEL", "")
+    monkeypatch.delenv("LOG_LEVEL")
+    (tmp_path / "config.env").write_text("LOG_LEVEL=ERROR\n")
+    monkeypatch.chdir(tmp_path)
+    setup_logging(use_queue=False, log_file=str(tmp_path / "etl.log"), console=False)
+
+    assert logging.getLogger().level == logging.ERROR
+
+
+def test_invalid_settings(monkeypatch, tmp_path):
+    with pytest.raises(ValueError):
+        setup_logging(level="LOUD", log_file=str(tmp_path / "etl.log"))
+    monkeypatch.setenv("LOG_FORMAT", "xml")
+    with pytest.raises(ValueError):
+        setup_logging(log_file=str(tmp_path / "etl.log"))
+
+
+def test_json_format_through_queue(tmp_path):
+    log_file = tmp_path / "logs" / "etl.log"
+    setup_logging("INFO", fmt="json", use_queue=True, log_file=str(log_file), console=False)
+
+    logging.getLogger("src.extract").info("Fetching weather data for %s", "Athens")
+    logging.getLogger("src.extract").debug("Filtered out")
+    stop_logging()
+
+    records = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert len(records) == 1
+    assert records[0]["level"] == "INFO"
+    assert records[0]["logger"] == "src.extract"
+    assert records[0]["message"] == "Fetching weather data for Athens"
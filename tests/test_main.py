@@ -0,0 +1,63 @@
+'''
+Unit tests for the command line entry point
+
+These tests cover main.py:
+- parse_args: Subcommands and the legacy --incremental / --schedule flags.
+- Startup cost: importing main, and the extract-only path, must not import
+  pandas or SQLAlchemy.
+- run_command: Dispatching each command to its pipeline function.
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+import subprocess
+import sys
+
+import pytest
+
+from main import parse_args, run_command
+
+HEAVY_MODULES = ["pandas", "sqlalchemy", "pyarrow"]
+
+
+def imported_modules(code):
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys; {code}; "
+         f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"],
+        capture_output=True, text=True, check=True)
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def test_parse_args():
+    assert parse_args([]).command == "run"
+    assert parse_args(["extract"]).command == "extract"
+    assert parse_args(["--incremental"]).command == "incremental"
+    assert parse_args(["--schedule"]).command == "schedule"
+    assert parse_args(["--dry-run", "load"]).dry_run
+
+
+def test_import_main_is_lightweight():
+    assert imported_modules("import main") == []
+
+
+def test_extract_only_is_lightweight():
+    assert imported_modules("import main; from src.pipeline import extract_only") == []
+
+
+@pytest.mark.parametrize("command, target", [
+    ("run", "src.pipeline.run_full"),
+    ("extract", "src.pipeline.extract_only"),
+    ("transform", "src.pipeline.transform_only"),
+    ("load", "src.pipeline.load_only"),
+    ("incremental", "src.pipeline.run_incremental"),
+])
+def test_run_command(mocker, command, target):
+    mock_stage = mocker.patch(target)
+    config = object()
+
+    run_command(command, config)
+
+    mock_stage.assert_called_once_with(config)
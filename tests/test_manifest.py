@@ -0,0 +1,62 @@
+'''
+Unit tests for the raw file manifest module
+
+These tests cover RawManifest:
+- Scanning a raw directory and listing unprocessed files per city
+- Marking files as processed
+- Re-queuing files whose content changed
+- Registering cities with dots in their name
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.utils.manifest import RawManifest
+import json
+
+
+def write_raw(raw, name, data):
+    path = raw / name
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_manifest_scan_and_pending(tmp_path):
+    manifest = RawManifest(str(tmp_path / "manifest.sqlite"))
+    first = write_raw(tmp_path, "raw_current_weather_New_York_20250823_184954.json", {"dt": 1})
+    second = write_raw(tmp_path, "raw_air_pollution_Athens_20250823_184954.json", {"list": []})
+    write_raw(tmp_path, "notes.json", {})
+
+    assert manifest.scan(tmp_path) == 2
+    assert manifest.pending() == {"Athens": [second], "New York": [first]}
+
+    manifest.mark_processed([first])
+    assert manifest.pending() == {"Athens": [second]}
+
+    assert manifest.scan(tmp_path) == 0
+
+
+def test_manifest_requeues_changed_files(tmp_path):
+    manifest = RawManifest(str(tmp_path / "manifest.sqlite"))
+    path = write_raw(tmp_path, "raw_current_weather_Athens_20250823_184954.json", {"dt": 1})
+
+    manifest.register([path], city="Athens")
+    manifest.mark_processed([path])
+    manifest.register([path], city="Athens")
+    assert manifest.pending() == {}
+
+    path.write_text(json.dumps({"dt": 12345}))
+    manifest.scan(tmp_path)
+    assert manifest.pending() == {"Athens": [path]}
+
+
+def test_manifest_registers_dotted_city_names(tmp_path):
+    manifest = RawManifest(str(tmp_path / "manifest.sqlite"))
+    plain = write_raw(tmp_path, "raw_current_weather_St._Louis_20250101_000000.json", {"dt": 1})
+    gzipped = tmp_path / "raw_air_pollution_Washington_D.C._20250101_000000.json.gz"
+    gzipped.write_bytes(b"")
+
+    assert manifest.scan(tmp_path) == 2
+    assert manifest.pending() == {"St. Louis": [plain], "Washington D.C.": [gzipped]}
@@ -0,0 +1,79 @@
+'''
+Unit tests for the run metrics module
+
+These tests cover Metrics:
+- Counters, histograms and timers
+- Rows per second per stage
+- JSON lines history and Prometheus textfile export
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+import json
+
+import pytest
+
+from src.utils.metrics import Metrics
+
+
+def test_counters_and_timings():
+    metrics = Metrics()
+    metrics.inc('etl_rows_loaded_total', 100, table='current_weather')
+    metrics.inc('etl_rows_loaded_total', 20, table='current_weather')
+    metrics.observe('etl_http_request_seconds', 0.2, endpoint='weather')
+    metrics.observe('etl_http_request_seconds', 0.4, endpoint='weather')
+    with metrics.timer('etl_stage_seconds', stage='load'):
+        pass
+
+    assert metrics.total('etl_rows_loaded_total', table='current_weather') == 120
+    assert metrics.total('etl_http_request_seconds', endpoint='weather') == pytest.approx(0.6)
+    assert metrics.total('etl_rows_loaded_total', table='forecast_weather') == 0
+
+    metrics.reset()
+    assert metrics.to_dict()['counters'] == {}
+
+
+def test_rows_per_second():
+    metrics = Metrics()
+    metrics.observe('etl_stage_seconds', 2.0, stage='transform')
+    metrics.inc('etl_stage_rows_total', 500, stage='transform')
+    metrics.inc('etl_stage_rows_total', 10, stage='load')
+
+    summary = metrics.to_dict()
+    assert summary['rows_per_second'] == {'transform': 250.0}
+    assert summary['timings']['etl_stage_seconds'] == [
+        {'labels': {'stage': 'transform'}, 'count': 1, 'sum': 2.0}]
+
+
+def test_write_json_appends_runs(tmp_path):
+    path = tmp_path / 'metrics' / 'metrics.jsonl'
+    metrics = Metrics()
+    metrics.inc('etl_raw_bytes_written_total', 2048)
+    metrics.write_json(str(path))
+    metrics.write_json(str(path))
+
+    runs = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(runs) == 2
+    assert runs[0]['counters']['etl_raw_bytes_written_total'] == [{'labels': {}, 'value': 2048}]
+
+
+def test_write_prometheus(tmp_path):
+    path = tmp_path / 'weather_etl.prom'
+    metrics = Metrics()
+    metrics.inc('etl_rows_loaded_total', 120, table='current_weather')
+    metrics.observe('etl_http_request_seconds', 0.07, endpoint='forecast')
+
+    metrics.write_prometheus(str(path))
+    lines = path.read_text().splitlines()
+
+    assert '# TYPE etl_rows_loaded_total counter' in lines
+    assert 'etl_rows_loaded_total{table="current_weather"} 120' in lines
+    assert '# TYPE etl_http_request_seconds histogram' in lines
+    assert 'etl_http_request_seconds_bucket{endpoint="forecast",le="0.05"} 0' in lines
+    assert 'etl_http_request_seconds_bucket{endpoint="forecast",le="0.1"} 1' in lines
+    assert 'etl_http_request_seconds_bucket{endpoint="forecast",le="+Inf"} 1' in lines
+    assert 'etl_http_request_seconds_count{endpoint="forecast"} 1' in lines
+    assert not (tmp_path / 'weather_etl.prom.tmp').exists()
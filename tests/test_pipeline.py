@@ -0,0 +1,354 @@
+'''
+Unit tests for the pipeline module
+
+These tests cover the run modes in src.pipeline:
+- run_full: Processing cities in bounded extract -> transform -> load batches
+  over one shared rate limiter and session.
+- Exporting run metrics when a run ends.
+- transform_only / load_only: Staging transformed frames and loading them later.
+- Resuming interrupted runs and retrying failed cities from the checkpoint.
+- run_worker / run_distributed: Extracting city batches from the shared work
+  queue and loading the results once.
+- load_frames: Writing rolling air quality aggregates on top of loaded history.
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+import json
+import pandas as pd
+
+import pytest
+import requests
+import sqlalchemy as sa
+
+from src.load import dispose_engines
+from benchmarks.mock_server import MockServer
+from src.pipeline import (enqueue_cities, load_frames, load_only, run_distributed,
+                          run_full, run_worker, transform_only)
+from src.utils.checkpoint import Checkpoint
+from src.utils.rate_limiter import RateLimiter
+from src.utils.work_queue import WorkQueue
+from src.utils.etl_config import (EtlConfig, ExtractConfig, LoadConfig, PipelineConfig,
+                                  StorageConfig, TransformConfig)
+
+
+def make_test_config(tmp_path, cities, batch_size):
+    return EtlConfig(
+        Extract=ExtractConfig(cities=cities, api_key="fake_key",
+                              raw_path=str(tmp_path), units="metric"),
+        Load=LoadConfig(host=None, database=None, driver=None),
+        Transform=TransformConfig(),
+        Storage=StorageConfig(processed_path=str(tmp_path)),
+        Pipeline=PipelineConfig(batch_size=batch_size)
+    )
+
+
+def test_run_full_in_batches(mocker, tmp_path):
+    mock_extract = mocker.patch(
+        "src.pipeline.extract", side_effect=lambda config, **kwargs: {c: [] for c in config.cities})
+    mock_transform_and_load = mocker.patch("src.pipeline.transform_and_load")
+
+    config = make_test_config(tmp_path, ["Athens", "Paris", "London", "Tokyo", "Rome"], 2)
+    run_full(config)
+
+    batches = [call.args[0].cities for call in mock_extract.call_args_list]
+    assert batches == [["Athens", "Paris"], ["London", "Tokyo"], ["Rome"]]
+    assert mock_transform_and_load.call_count == 3
+    assert config.Extract.cities == ["Athens", "Paris", "London", "Tokyo", "Rome"]
+
+
+def test_run_full_without_batches(mocker, tmp_path):
+    mock_extract = mocker.patch("src.pipeline.extract", return_value={})
+    mocker.patch("src.pipeline.transform_and_load")
+
+    run_full(make_test_config(tmp_path, ["Athens", "Paris"], 0))
+
+    mock_extract.assert_called_once()
+
+
+def test_run_full_exports_metrics(mocker, tmp_path):
+    mocker.patch("src.pipeline.extract", return_value={"Athens": ["a.json", "b.json"]})
+    mocker.patch("src.pipeline.transform_and_load")
+
+    config = make_test_config(tmp_path, ["Athens"], 0)
+    config.Pipeline.metrics_json = str(tmp_path / "metrics.jsonl")
+    config.Pipeline.metrics_textfile = str(tmp_path / "weather_etl.prom")
+    run_full(config)
+
+    run = json.loads((tmp_path / "metrics.jsonl").read_text())
+    assert run["counters"]["etl_stage_rows_total"] == [
+        {"labels": {"stage": "extract"}, "value": 2}]
+    assert run["timings"]["etl_run_seconds"][0]["count"] == 1
+    assert "etl_run_seconds_count 1" in (tmp_path / "weather_etl.prom").read_text()
+
+
+def test_transform_then_load_stages(mocker, tmp_path):
+    raw_file = tmp_path / "raw_current_weather_Athens_20250823_184954.json"
+    raw_file.write_text(json.dumps({
+        "main": {"temp": 27.06, "feels_like": 28.31, "temp_max": 28.0, "temp_min": 26.0,
+                 "humidity": 50, "pressure": 1012},
+        "dt": 1755964194, "coord": {"lat": 37.98, "lon": 23.72}}))
+
+    config = make_test_config(tmp_path, ["Athens"], 0)
+    config.Extract.manifest_path = str(tmp_path / "manifest.sqlite")
+    config.Load.url = f"sqlite:///{tmp_path / 'etl.sqlite'}"
+
+    run_dir = transform_only(config)
+    assert (run_dir / "current_weather.parquet").exists()
+    assert transform_only(config) is None
+
+    assert load_only(config) == 1
+    assert not run_dir.exists()
+    assert load_only(config) == 0
+
+    engine = sa.create_engine(config.Load.url)
+    with engine.connect() as con:
+        rows = con.exec_driver_sql("SELECT city, main_temp FROM current_weather").fetchall()
+    engine.dispose()
+    dispose_engines()
+    assert rows == [("Athens", 27.06)]
+
+
+def test_run_full_resumes_and_retries(mocker, tmp_path):
+    mock_time = mocker.patch("src.utils.checkpoint.time.time", return_value=1000)
+
+    def fake_extract(config, failures=None, **kwargs):
+        saved = {}
+        for city in config.cities:
+            if city == "Paris":
+                failures.append((city, "current_weather", "HTTP 500"))
+                continue
+            path = tmp_path / f"raw_current_weather_{city}_20250823_184954.json"
+            path.write_text("{}")
+            saved[city] = [path]
+        return saved
+
+    mock_extract = mocker.patch("src.pipeline.extract", side_effect=fake_extract)
+    mock_transform_and_load = mocker.patch(
+        "src.pipeline.transform_and_load", side_effect=[None, None, RuntimeError("DB down")])
+
+    config = make_test_config(tmp_path, ["Athens", "Paris", "Rome"], 1)
+    config.Extract.data_types = ["current_weather"]
+    config.Pipeline.checkpoint_path = str(tmp_path / "checkpoint.sqlite")
+
+    with pytest.raises(RuntimeError):
+        run_full(config)
+    assert mock_extract.call_count == 3
+
+    # The resumed run loads Rome's fetched file without calling the API again,
+    # and fetches the city that failed again
+    mock_extract.reset_mock()
+    mock_transform_and_load.reset_mock(side_effect=True)
+    run_full(config)
+    assert [call.args[0].cities for call in mock_extract.call_args_list] == [["Paris"]]
+    assert list(mock_transform_and_load.call_args_list[0].args[0]) == ["Rome"]
+
+    # Once its backoff has passed, the failed city is retried first
+    mock_extract.reset_mock()
+    mock_time.return_value = 1000 + 60 + 120
+    run_full(config)
+    batches = [call.args[0].cities for call in mock_extract.call_args_list]
+    assert batches == [["Paris"], ["Athens"], ["Rome"]]
+
+
+def test_run_worker_drains_queue(mocker, tmp_path):
+    mock_extract = mocker.patch(
+        "src.pipeline.extract", side_effect=lambda config, **kwargs: {c: [] for c in config.cities})
+
+    config = make_test_config(tmp_path, ["Athens", "Paris", "Rome"], 0)
+    config.Pipeline.queue_path = str(tmp_path / "queue.sqlite")
+    config.Pipeline.queue_batch_size = 2
+    enqueue_cities(config)
+
+    assert run_worker(config, worker="w1") == 2
+    batches = [call.args[0].cities for call in mock_extract.call_args_list]
+    assert batches == [["Athens", "Paris"], ["Rome"]]
+    assert WorkQueue(config.Pipeline.queue_path).drained()
+
+
+def fail_paris(config, failures=None, **kwargs):
+    if "Paris" in config.cities:
+        failures.append(("Paris", "current_weather", "HTTP 500"))
+    return {c: [] for c in config.cities if c != "Paris"}
+
+
+def test_run_worker_schedules_failed_cities_for_retry(mocker, tmp_path):
+    mocker.patch("src.pipeline.extract", side_effect=fail_paris)
+
+    config = make_test_config(tmp_path, ["Athens", "Paris", "Rome"], 0)
+    config.Pipeline.queue_path = str(tmp_path / "queue.sqlite")
+    config.Pipeline.checkpoint_path = str(tmp_path / "checkpoint.sqlite")
+    config.Pipeline.retry_base_seconds = 0
+    enqueue_cities(config)
+
+    assert run_worker(config, worker="w1") == 1
+    assert WorkQueue(config.Pipeline.queue_path).status()["done"] == 1
+    assert Checkpoint(config.Pipeline.checkpoint_path).due_retries() == [
+        ("Paris", "current_weather")]
+
+
+def test_run_worker_without_checkpoint_returns_failed_batch(mocker, tmp_path):
+    mock_extract = mocker.patch("src.pipeline.extract", side_effect=fail_paris)
+
+    config = make_test_config(tmp_path, ["Athens", "Paris"], 0)
+    config.Pipeline.queue_path = str(tmp_path / "queue.sqlite")
+    enqueue_cities(config)
+
+    assert run_worker(config, worker="w1") == 0
+    assert mock_extract.call_count == 3
+    assert WorkQueue(config.Pipeline.queue_path).status()["failed"] == 1
+
+
+def test_run_distributed_against_mock_server(tmp_path):
+    with MockServer() as server:
+        config = make_test_config(tmp_path, ["Athens", "Paris", "London", "Tokyo"], 0)
+        config.Extract.api_url = f"{server.url}/data/2.5"
+        config.Extract.geo_url = f"{server.url}/geo/1.0"
+        config.Extract.calls_per_minute = 10**6
+        config.Extract.rate_limit_burst = 100
+        config.Extract.manifest_path = str(tmp_path / "manifest.sqlite")
+        config.Load.url = f"sqlite:///{tmp_path / 'etl.sqlite'}"
+        config.Pipeline.queue_path = str(tmp_path / "queue.sqlite")
+        config.Pipeline.queue_batch_size = 1
+
+        # A batch that failed in an earlier run is not counted again
+        old_queue = WorkQueue(config.Pipeline.queue_path, max_attempts=1)
+        old_queue.enqueue(["Nowhere"], 1)
+        job_id, _ = old_queue.claim("old")
+        old_queue.fail(job_id, "old", RuntimeError("API down"))
+
+        status = run_distributed(config, workers=2)
+
+    assert status["done"] == 4
+    assert status["failed"] == 0
+    assert (tmp_path / "rate_limit.sqlite").exists()
+    engine = sa.create_engine(config.Load.url)
+    with engine.connect() as con:
+        cities = con.exec_driver_sql(
+            "SELECT DISTINCT city FROM current_weather ORDER BY city").fetchall()
+        forecasts = con.exec_driver_sql("SELECT COUNT(*) FROM forecast_weather").scalar()
+        aggregates = con.exec_driver_sql(
+            "SELECT COUNT(*) FROM air_quality_aggregates").scalar()
+    engine.dispose()
+    dispose_engines()
+    assert [c for (c,) in cities] == ["Athens", "London", "Paris", "Tokyo"]
+    assert forecasts == 4 * 40
+    assert aggregates == 4
+
+
+def make_air_pollution_frame(rows):
+    df = pd.DataFrame(rows, columns=["city", "dt", "main_aqi", "components_pm2_5",
+                                     "components_pm10", "components_o3"])
+    df["dt"] = pd.to_datetime(df["dt"])
+    df.name = "air_pollution"
+    return df
+
+
+def test_load_frames_writes_incremental_aggregates(tmp_path):
+    config = make_test_config(tmp_path, ["Athens"], 0)
+    config.Load.url = f"sqlite:///{tmp_path / 'etl.sqlite'}"
+
+    load_frames([make_air_pollution_frame([
+        ("Athens", "2024-01-01 00:00", 1, 10.0, 10.0, 10.0)])], config)
+    load_frames([make_air_pollution_frame([
+        ("Athens", "2024-01-01 06:00", 2, 20.0, 10.0, 10.0),
+        ("Athens", "2024-01-01 12:00", 2, 30.0, 10.0, 10.0)])], config)
+
+    config.Transform.aggregate_hours = 0
+    load_frames([make_air_pollution_frame([
+        ("Athens", "2024-01-01 18:00", 2, 40.0, 10.0, 10.0)])], config)
+
+    engine = sa.create_engine(config.Load.url)
+    with engine.connect() as con:
+        rows = con.exec_driver_sql(
+            "SELECT pm2_5_avg, samples, aqi_desc FROM air_quality_aggregates "
+            "ORDER BY dt").fetchall()
+    engine.dispose()
+    dispose_engines()
+    assert rows == [(10.0, 1, "Fair"), (15.0, 2, "Fair"), (20.0, 3, "Fair")]
+
+
+def test_run_full_shares_limiter_and_session_across_batches(mocker, tmp_path):
+    rate_limiter = mocker.patch("src.extract.RateLimiter", side_effect=RateLimiter)
+    session = mocker.patch("src.extract.requests.Session", side_effect=requests.Session)
+
+    with MockServer() as server:
+        config = make_test_config(tmp_path, ["Athens", "Paris", "Rome"], 1)
+        config.Extract.calls_per_minute = 10**6
+        config.Extract.rate_limit_burst = 100
+        config.Extract.api_url = f"{server.url}/data/2.5"
+        config.Extract.geo_url = f"{server.url}/geo/1.0"
+        config.Load.url = f"sqlite:///{tmp_path / 'etl.sqlite'}"
+        run_full(config)
+    dispose_engines()
+
+    assert rate_limiter.call_count == 1
+    assert session.call_count == 1
+
+
+def test_retry_groups_share_limiter_and_session(mocker, tmp_path):
+    mock_extract = mocker.patch(
+        "src.pipeline.extract", side_effect=lambda config, **kwargs: {})
+    mocker.patch("src.pipeline.transform_and_load")
+
+    config = make_test_config(tmp_path, ["Athens", "Rome"], 0)
+    config.Pipeline.checkpoint_path = str(tmp_path / "checkpoint.sqlite")
+    checkpoint = Checkpoint(config.Pipeline.checkpoint_path, retry_base_seconds=0)
+    checkpoint.record_fetched("old", [("Paris", ("air_pollution",))], {},
+                              [("Paris", "air_pollution", "HTTP 500")])
+
+    run_full(config)
+
+    calls = mock_extract.call_args_list
+    assert [call.args[0].cities for call in calls] == [["Paris"], ["Athens", "Rome"]]
+    assert len({id(call.kwargs["limiter"]) for call in calls}) == 1
+    assert len({id(call.kwargs["session"]) for call in calls}) == 1
+    assert calls[0].kwargs["limiter"] is not None
+
+
+def test_failed_cycle_is_not_resumed_by_other_endpoint(mocker, tmp_path):
+    def fake_extract(config, **kwargs):
+        saved = {}
+        for city in config.cities:
+            path = tmp_path / f"raw_{config.data_types[0]}_{city}_20250823_184954.json"
+            path.write_text("{}")
+            saved[city] = [path]
+        return saved
+
+    mock_extract = mocker.patch("src.pipeline.extract", side_effect=fake_extract)
+    mocker.patch("src.pipeline.transform_and_load",
+                 side_effect=[None, RuntimeError("DB down"), None, None])
+
+    config = make_test_config(tmp_path, ["Athens", "Paris"], 1)
+    config.Pipeline.checkpoint_path = str(tmp_path / "checkpoint.sqlite")
+    config.Extract.data_types = ["air_pollution"]
+    with pytest.raises(RuntimeError):
+        run_full(config)
+
+    mock_extract.reset_mock()
+    config.Extract.data_types = ["current_weather"]
+    run_full(config)
+    batches = [call.args[0].cities for call in mock_extract.call_args_list]
+    assert batches == [["Athens"], ["Paris"]]
+
+
+def test_processed_parquet_is_written_after_load(mocker, tmp_path):
+    config = make_test_config(tmp_path, ["Athens"], 0)
+    config.Load.url = f"sqlite:///{tmp_path / 'etl.sqlite'}"
+    config.Storage.write_parquet = True
+    config.Transform.aggregate_hours = 0
+    frames = [make_air_pollution_frame([("Athens", "2024-01-01 00:00", 1, 10.0, 10.0, 10.0)])]
+
+    mocker.patch("src.load.load_all", side_effect=RuntimeError("DB down"))
+    with pytest.raises(RuntimeError):
+        load_frames(frames, config)
+    assert not (tmp_path / "air_pollution").exists()
+
+    mocker.stopall()
+    load_frames(frames, config)
+    load_frames(frames, config)
+    dispose_engines()
+    assert len(pd.read_parquet(tmp_path / "air_pollution")) == 1
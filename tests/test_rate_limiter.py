@@ -0,0 +1,71 @@
+'''
+Unit tests for the rate limiter module
+
+These tests cover the RateLimiter token bucket:
+- Bursting up to the bucket size and waiting for refills
+- Pausing after a backoff
+- Sharing one budget between instances through a SQLite state file
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def patch_clock(mocker):
+    clock = FakeClock()
+    mocker.patch("src.utils.rate_limiter.time.time", side_effect=clock.time)
+    mocker.patch("src.utils.rate_limiter.time.sleep", side_effect=clock.sleep)
+    return clock
+
+
+def test_rate_limiter_burst_then_waits(mocker):
+    clock = patch_clock(mocker)
+    limiter = RateLimiter(calls_per_minute=60, burst=3)
+
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.slept == []
+
+    limiter.acquire()
+    assert sum(clock.slept) == 1.0
+
+
+def test_rate_limiter_backoff(mocker):
+    clock = patch_clock(mocker)
+    limiter = RateLimiter(calls_per_minute=600, burst=5)
+
+    limiter.backoff(30)
+    limiter.acquire()
+
+    assert sum(clock.slept) >= 30
+
+
+def test_rate_limiter_shared_state(mocker, tmp_path):
+    clock = patch_clock(mocker)
+    state = str(tmp_path / "rate_limit.sqlite")
+    first = RateLimiter(calls_per_minute=60, burst=2, state_path=state)
+    second = RateLimiter(calls_per_minute=60, burst=2, state_path=state)
+
+    first.acquire()
+    second.acquire()
+    assert clock.slept == []
+
+    first.acquire()
+    assert sum(clock.slept) == 1.0
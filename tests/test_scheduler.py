@@ -0,0 +1,84 @@
+'''
+Unit tests for the scheduler module
+
+These tests cover the Scheduler daemon in src.scheduler:
+- due: Selecting the endpoints whose refresh interval has elapsed.
+- run_once: Fetching only the due endpoints and surviving failed cycles.
+- run: Stopping cleanly once stop() is called.
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+import threading
+
+from src.scheduler import Scheduler
+from src.utils.etl_config import (EtlConfig, ExtractConfig, LoadConfig, PipelineConfig,
+                                  StorageConfig, TransformConfig)
+
+
+def make_test_config(tmp_path):
+    return EtlConfig(
+        Extract=ExtractConfig(cities=["Athens"], api_key="fake_key",
+                              raw_path=str(tmp_path), units="metric"),
+        Load=LoadConfig(host=None, database=None, driver=None),
+        Transform=TransformConfig(),
+        Storage=StorageConfig(processed_path=str(tmp_path)),
+        Pipeline=PipelineConfig(intervals={
+            'air_pollution': 60, 'current_weather': 10, 'forecast_weather': 180})
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_run_once_fetches_only_due_endpoints(mocker, tmp_path):
+    mock_run_full = mocker.patch("src.scheduler.run_full")
+    clock = FakeClock()
+    scheduler = Scheduler(make_test_config(tmp_path), clock=clock)
+
+    # First cycle refreshes everything, next one is due in 10 minutes
+    assert scheduler.run_once() == 600
+    assert mock_run_full.call_args.args[0].Extract.data_types == [
+        'air_pollution', 'current_weather', 'forecast_weather']
+
+    clock.now = 600
+    assert scheduler.run_once() == 600
+    assert mock_run_full.call_args.args[0].Extract.data_types == ['current_weather']
+
+    clock.now = 3600
+    scheduler.run_once()
+    assert mock_run_full.call_args.args[0].Extract.data_types == [
+        'air_pollution', 'current_weather']
+    assert mock_run_full.call_count == 3
+
+
+def test_run_once_survives_failed_cycle(mocker, tmp_path):
+    mocker.patch("src.scheduler.run_full", side_effect=RuntimeError("API down"))
+    clock = FakeClock()
+    scheduler = Scheduler(make_test_config(tmp_path), clock=clock)
+
+    assert scheduler.run_once() == 600
+    assert scheduler.due(clock.now) == []
+
+
+def test_run_stops_when_requested(mocker, tmp_path):
+    mocker.patch("src.scheduler.dispose_engines")
+    scheduler = Scheduler(make_test_config(tmp_path))
+    mock_run_full = mocker.patch(
+        "src.scheduler.run_full", side_effect=lambda *args, **kwargs: scheduler.stop())
+
+    thread = threading.Thread(target=scheduler.run)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert mock_run_full.call_count == 1
+    assert mock_run_full.call_args.kwargs['session'] is not None
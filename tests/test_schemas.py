@@ -0,0 +1,84 @@
+'''
+Unit tests for the payload schemas module
+
+These tests cover the typed decoders and column buffers:
+- Decoding nested API payloads and pre-flattened payloads
+- Missing fields decoding as None
+- Column dtypes built from the schema types
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.schemas import (decode_air_pollution, decode_current_weather, decode_forecast_weather,
+                         TypedColumns, CurrentWeather, AirPollution)
+import pytest
+
+
+def test_decode_current_weather_nested():
+    data = {
+        "coord": {"lon": 23.72, "lat": 37.98},
+        "weather": [{"id": 800}],
+        "main": {"temp": 27.06, "feels_like": 28.31, "temp_min": 26.0, "temp_max": 28.5,
+                 "pressure": 1012, "humidity": 50, "sea_level": 1012},
+        "wind": {"speed": 3.6},
+        "dt": 1690000000
+    }
+
+    [record] = decode_current_weather(data)
+
+    assert record == CurrentWeather(27.06, 28.31, 28.5, 26.0, 50, 1012,
+                                    1690000000, 37.98, 23.72)
+    assert not hasattr(record, "__dict__")
+
+
+def test_decode_current_weather_flat_and_missing():
+    data = {"main_temp": 25, "main_humidity": 50, "dt": 1690000000,
+            "coord": {"lat": 37.98, "lon": 23.72}}
+
+    [record] = decode_current_weather(data)
+
+    assert record.main_temp == 25
+    assert record.main_humidity == 50
+    assert record.main_pressure is None
+
+
+def test_decode_forecast_weather():
+    data = {
+        "list": [{"dt": 1690000000 + 10800 * k, "main": {"temp": 20.0 + k}} for k in range(3)],
+        "city": {"coord": {"lat": 37.98, "lon": 23.72}}
+    }
+
+    records = decode_forecast_weather(data)
+
+    assert [r.main_temp for r in records] == [20.0, 21.0, 22.0]
+    assert all(r.coord_lon == 23.72 for r in records)
+
+
+def test_decode_air_pollution_requires_coord():
+    with pytest.raises(KeyError):
+        decode_air_pollution({"list": []})
+
+
+def test_typed_columns_to_frame():
+    data = {
+        "coord": {"lon": 23.72, "lat": 37.98},
+        "list": [
+            {"main": {"aqi": 2}, "components": {"co": 201, "pm2_5": 0.5}, "dt": 1690000000},
+            {"main": {"aqi": 3}, "components": {"co": 190.2}, "dt": 1690003600},
+        ]
+    }
+    columns = TypedColumns(AirPollution)
+    columns.extend(decode_air_pollution(data))
+
+    df = columns.to_frame()
+
+    assert list(df.columns) == ["dt", "main_aqi", "components_co", "components_no",
+                                "components_no2", "components_o3", "components_so2",
+                                "components_pm2_5", "components_pm10", "components_nh3",
+                                "coord_lon", "coord_lat"]
+    assert str(df["main_aqi"].dtype) == "int64"
+    assert str(df["components_co"].dtype) == "float64"
+    assert df["components_pm2_5"].isna().tolist() == [False, True]
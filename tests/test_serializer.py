@@ -0,0 +1,64 @@
+'''
+Unit tests for the serializer module
+
+These tests cover reading and writing raw JSON files:
+- Compact and gzip compressed round trips
+- Compression detected from file contents rather than suffix
+- Reading legacy indented files
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.utils.serializer import write_json, read_json, compression_for
+import gzip
+import json
+
+DATA = {"city": "Athens", "main": {"temp": 27.06}, "weather": [{"description": "ciel dégagé"}]}
+
+
+def test_write_json_compact(tmp_path):
+    path = tmp_path / "raw.json"
+
+    write_json(path, DATA)
+
+    assert b"\n" not in path.read_bytes()
+    assert read_json(path) == DATA
+
+
+def test_write_json_gzip(tmp_path):
+    path = tmp_path / "raw.json.gz"
+
+    write_json(path, DATA)
+
+    assert compression_for(path) == "gzip"
+    assert json.loads(gzip.decompress(path.read_bytes())) == DATA
+    assert read_json(path) == DATA
+
+
+def test_read_json_detects_compression(tmp_path):
+    path = tmp_path / "renamed.json"
+    path.write_bytes(gzip.compress(json.dumps(DATA).encode("utf-8")))
+
+    assert read_json(path) == DATA
+
+
+def test_read_json_legacy_indented(tmp_path):
+    path = tmp_path / "legacy.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(DATA, f, ensure_ascii=False, indent=4)
+
+    assert read_json(path) == DATA
+
+
+def test_stdlib_fallback(mocker, tmp_path):
+    mocker.patch("src.utils.serializer.orjson", None)
+    mocker.patch("src.utils.serializer.msgspec", None)
+    path = tmp_path / "raw.json"
+
+    write_json(path, DATA)
+
+    assert json.loads(path.read_bytes()) == DATA
+    assert read_json(path) == DATA
@@ -0,0 +1,74 @@
+'''
+Unit tests for the storage module
+
+These tests cover the functions in the storage module:
+- write_processed / read_processed: Partitioned Parquet round trip with
+  column and partition pruning.
+- compact_raw: Compacting raw JSON files into Parquet.
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.storage import write_processed, read_processed, compact_raw
+from src.utils.etl_config import StorageConfig
+import json
+import pandas as pd
+
+
+def make_current_weather_df():
+    df = pd.DataFrame({
+        "main_temp": [25.0, 26.0, 18.0],
+        "dt": pd.to_datetime(["2025-08-23 10:00", "2025-08-24 10:00", "2025-08-23 10:00"]),
+        "city": ["Athens", "Athens", "Paris"]
+    })
+    df.name = "current_weather"
+    return df
+
+
+def test_write_and_read_processed(tmp_path):
+    config = StorageConfig(processed_path=str(tmp_path), write_parquet=True)
+
+    write_processed([make_current_weather_df()], config)
+
+    assert (tmp_path / "current_weather" / "date=2025-08-23" / "city=Paris").is_dir()
+
+    result = read_processed("current_weather", config,
+                            columns=["main_temp", "city"],
+                            filters=[("city", "=", "Athens")])
+    assert sorted(result["main_temp"]) == [25.0, 26.0]
+    assert set(result["city"]) == {"Athens"}
+
+
+def test_write_processed_again_does_not_duplicate(tmp_path):
+    config = StorageConfig(processed_path=str(tmp_path), write_parquet=True)
+
+    write_processed([make_current_weather_df()], config)
+    write_processed([make_current_weather_df()], config)
+
+    assert len(read_processed("current_weather", config)) == 3
+
+
+def test_compact_raw(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    forecast = {
+        "list": [{"dt": 1690000000, "main": {"temp": 20.0}, "weather": [{"id": 500}]},
+                 {"dt": 1690010800, "main": {"temp": 21.0}, "weather": [{"id": 800}]}],
+        "city": {"name": "New York", "coord": {"lat": 40.7, "lon": -74.0}}
+    }
+    (raw / "raw_forecast_weather_New_York_20250823_184954.json").write_text(
+        json.dumps(forecast))
+    (raw / "geocode_cache.sqlite").write_text("")
+
+    compacted = compact_raw(raw, tmp_path / "processed", remove=True)
+
+    assert len(compacted) == 1
+    assert not compacted[0].exists()
+    df = pd.read_parquet(tmp_path / "processed" / "raw_forecast_weather",
+                         columns=["dt", "main_temp", "city", "city_coord_lat"])
+    assert df["main_temp"].tolist() == [20.0, 21.0]
+    assert set(df["city"]) == {"New York"}
+    assert df["city_coord_lat"].iloc[0] == 40.7
@@ -4,7 +4,10 @@ Unit tests for the transform module
 These tests cover the functions in the transform module.
 - json_open: Tests for opening and reading JSON files.
 - drop_dupes_and_fill: Tests for dropping duplicates and filling missing values.
-- transform: Integration tests for the entire transformation process.
+- transform: Integration tests for the entire transformation process,
+  from files on disk and from in-memory payloads.
+- transform_batch: Batch transformation must match transform exactly.
+- transform_parallel: Process-pool transformation must match the serial path.
 
 Usage:
 Run all tests with pytest:
@@ -12,9 +15,11 @@ Run all tests with pytest:
 
 '''
 
-from src.transform import json_open, drop_dupes_and_fill, transform
+from src.transform import json_open, drop_dupes_and_fill, transform, transform_batch, transform_parallel
+from src.utils.payload import Payload
 import json
 import pandas as pd
+import pytest
 
 
 def test_json_open_success(tmp_path):
@@ -99,3 +104,98 @@ def test_transform_integration(tmp_path):
     assert not forecast_df.empty
     assert "coord_lon" in forecast_df.columns
     assert forecast_df["coord_lon"].iloc[0] == 23.72
+
+
+def test_transform_payloads_match_files(tmp_path):
+    payloads = {
+        "air_pollution": {
+            "list": [{"main": {"aqi": 2}, "components": {"pm2_5": 4.1}, "dt": 1690000000}],
+            "coord": {"lon": 23.72, "lat": 37.98}
+        },
+        "current_weather": {
+            "main": {"temp": 25, "feels_like": 26, "temp_max": 27, "temp_min": 24,
+                     "humidity": 50, "pressure": 1012},
+            "dt": 1690000000, "coord": {"lon": 23.72, "lat": 37.98}
+        },
+        "forecast_weather": {
+            "list": [{"main": {"temp": 25, "feels_like": 26, "temp_max": 27, "temp_min": 24,
+                               "humidity": 50, "pressure": 1012}, "dt": 1690000000}],
+            "city": {"coord": {"lat": 37.98, "lon": 23.72}}
+        }
+    }
+    files = []
+    for data_type, data in payloads.items():
+        path = tmp_path / f"raw_{data_type}_Athens_20250101_000000.json"
+        path.write_text(json.dumps(data))
+        files.append(path)
+
+    from_files = transform({"Athens": files})
+    from_memory = transform({"Athens": [
+        Payload(data_type, data) for data_type, data in payloads.items()]})
+
+    for expected, result in zip(from_files, from_memory):
+        pd.testing.assert_frame_equal(expected, result)
+
+
+def make_city_payloads(i):
+    air_pollution = {
+        "coord": {"lon": 23.72 + i, "lat": 37.98 + i},
+        "list": [
+            {"main": {"aqi": 1 + i % 5}, "components": {"co": 201.9, "pm2_5": 0.5 + i, "pm10": 1.2},
+             "dt": 1690000000},
+            {"main": {"aqi": 9}, "components": {"co": 190.2, "pm2_5": 0.7, "pm10": 1.1},
+             "dt": 1690003600},
+            {"components": {"co": 190.2, "pm2_5": 0.7, "pm10": 1.1}, "dt": 1690003600},
+        ]
+    }
+    current_weather = {
+        "coord": {"lon": 23.72 + i, "lat": 37.98 + i},
+        "weather": [{"id": 800, "main": "Clear"}],
+        "main": {"temp": 25.1 + i, "feels_like": 26, "temp_min": 24, "temp_max": 27,
+                 "pressure": 1012, "humidity": 50},
+        "dt": 1690000000 + i,
+        "name": f"City{i}"
+    }
+    forecast_weather = {
+        "list": [{"dt": 1690000000 + 10800 * (k % 3),
+                  "main": {"temp": 20.0 + k, "feels_like": 19.5, "temp_min": 18.0, "temp_max": 22.0,
+                           "pressure": 1010, "humidity": 60 + k},
+                  "weather": [{"id": 500}]} for k in range(4)],
+        "city": {"id": i, "name": f"City{i}", "coord": {"lat": 37.98 + i, "lon": 23.72 + i}}
+    }
+    return [
+        Payload("current_weather", current_weather),
+        Payload("forecast_weather", forecast_weather),
+        Payload("air_pollution", air_pollution),
+        Payload("current_weather", current_weather),
+    ]
+
+
+def test_transform_batch_matches_transform():
+    raw_file = {f"City{i}": make_city_payloads(i) for i in range(5)}
+
+    expected = transform(raw_file)
+    result = transform_batch(raw_file)
+
+    for expected_df, result_df in zip(expected, result):
+        pd.testing.assert_frame_equal(expected_df, result_df)
+    assert set(result[0]["main_aqi_desc"]) == {
+        "Good", "Fair", "Moderate", "Poor", "Very Poor", "Unknown"}
+    assert result[0]["main_aqi_desc"].dtype == "category"
+
+
+@pytest.mark.parametrize("transform_func", [transform, transform_batch])
+def test_transform_parallel_matches_serial(transform_func):
+    raw_file = {f"City{i}": make_city_payloads(i) for i in range(9)}
+
+    expected = transform_func(raw_file)
+    result = transform_parallel(raw_file, 2, transform_func)
+
+    for expected_df, result_df in zip(expected, result):
+        pd.testing.assert_frame_equal(expected_df, result_df)
+
+
+def test_transform_batch_empty():
+    air_df, current_df, forecast_df = transform_batch({})
+
+    assert air_df.empty and current_df.empty and forecast_df.empty
@@ -0,0 +1,96 @@
+'''
+Unit tests for the work queue module
+
+These tests cover WorkQueue:
+- Enqueueing cities in batches and claiming them in order
+- Reclaiming batches whose lease expired
+- Completing, failing and renewing jobs
+- Giving up on batches whose lease keeps expiring
+
+Usage:
+Run all tests with pytest:
+        pytest tests/
+
+'''
+
+from src.utils.work_queue import WorkQueue
+
+
+def test_enqueue_and_claim(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"))
+    assert len(queue.enqueue(["Athens", "Paris", "London", "Tokyo", "Rome"], 2)) == 3
+
+    claimed = [queue.claim("w1"), queue.claim("w2"), queue.claim("w1")]
+    assert [cities for _, cities in claimed] == [
+        ["Athens", "Paris"], ["London", "Tokyo"], ["Rome"]]
+    assert queue.claim("w2") is None
+    assert queue.status() == {"pending": 0, "leased": 3, "done": 0, "failed": 0}
+
+    for job_id, _ in claimed:
+        queue.complete(job_id, "w1")
+    # w2 still holds its job, so completing it as w1 has no effect
+    assert queue.status()["leased"] == 1
+    assert not queue.drained()
+
+
+def test_expired_lease_is_reclaimed(mocker, tmp_path):
+    mock_time = mocker.patch("src.utils.work_queue.time.time", return_value=0)
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=60)
+    queue.enqueue(["Athens"], 1)
+
+    job_id, _ = queue.claim("w1")
+    mock_time.return_value = 30
+    assert queue.renew(job_id, "w1")
+    mock_time.return_value = 80
+    assert queue.claim("w2") is None
+
+    mock_time.return_value = 91
+    assert queue.claim("w2") == (job_id, ["Athens"])
+    assert not queue.renew(job_id, "w1")
+
+    queue.complete(job_id, "w2")
+    assert queue.drained()
+
+
+def test_failed_jobs_are_retried_then_given_up(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=2)
+    queue.enqueue(["Athens"], 1)
+
+    job_id, _ = queue.claim("w1")
+    queue.fail(job_id, "w1", RuntimeError("API down"))
+    assert queue.status()["pending"] == 1
+
+    job_id, _ = queue.claim("w1")
+    queue.fail(job_id, "w1", RuntimeError("API down"))
+    assert queue.status()["failed"] == 1
+    assert queue.claim("w1") is None
+
+
+def test_job_whose_lease_keeps_expiring_is_failed(mocker, tmp_path):
+    mock_time = mocker.patch("src.utils.work_queue.time.time", return_value=0)
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=60, max_attempts=3)
+    queue.enqueue(["Athens", "Paris"], 1)
+
+    first, _ = queue.claim("w1")
+    second, _ = queue.claim("w1")
+    queue.complete(second, "w1")
+    for attempt in range(2):
+        mock_time.return_value += 61
+        assert queue.claim(f"w{attempt + 2}") == (first, ["Athens"])
+
+    mock_time.return_value += 61
+    assert queue.claim("w4") is None
+    assert queue.status() == {"pending": 0, "leased": 0, "done": 1, "failed": 1}
+    assert queue.drained()
+
+
+def test_status_of_selected_jobs(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=1)
+    old_ids = queue.enqueue(["Athens"], 1)
+    job_id, _ = queue.claim("w1")
+    queue.fail(job_id, "w1", RuntimeError("API down"))
+
+    new_ids = queue.enqueue(["Paris", "Rome"], 1)
+    assert old_ids == [job_id] and len(new_ids) == 2
+    assert queue.status()["failed"] == 1
+    assert queue.status(new_ids) == {"pending": 2, "leased": 0, "done": 0, "failed": 0}